@@ -44,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'dealer.middleware.InstrumentationMiddleware',
+    'dealer.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -94,6 +96,77 @@ DATABASES = {
         'HOST': 'localhost',
         'PORT': '5432',
     },
+    # a second database the replica routing tests read from, never routed to outside them
+    'replica': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('POSTGRES_DB', 'car_dealer_db'),
+        'USER': os.getenv('POSTGRES_USER', 'admin'),
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'admin'),
+        'HOST': '172.17.0.1',
+        'PORT': '5432',
+        'TEST': {'NAME': 'test_car_dealer_replica_db'},
+    },
+}
+
+# Read replicas of the default database, e.g. POSTGRES_REPLICA_HOSTS=10.0.0.2,10.0.0.3
+# Safe requests read from a replica, see dealer.middleware.ReplicaRoutingMiddleware
+
+DATABASE_REPLICAS = []
+for number, host in enumerate(filter(None, os.getenv('POSTGRES_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica{number}'] = dict(DATABASES['default'], HOST=host.strip(), TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['dealer.routers.ReplicaRouter']
+
+# seconds a client's reads stay on the primary after it wrote
+REPLICA_STICKINESS_SECONDS = float(os.getenv('REPLICA_STICKINESS_SECONDS', '5'))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Responses are keyed on store inventory versions, so any shared backend can be used
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+INVENTORY_CACHE_TIMEOUT = 300
+
+
+# Queued purchases
+# Buy requests of the API are queued as tickets and applied in batches by `manage.py process_purchases`
+
+QUEUED_PURCHASES = os.getenv('QUEUED_PURCHASES', '') == '1'
+
+
+# Money in integer cents
+# Aggregates and JSON list pages read money from the integer cents columns, which database
+# triggers keep in step on PostgreSQL and SQLite; see dealer.money
+
+MONEY_CENTS = os.getenv('MONEY_CENTS', '') == '1'
+
+
+# Request instrumentation
+# Adds Server-Timing headers and logs SQL and timing statistics of every request
+
+REQUEST_INSTRUMENTATION = os.getenv('REQUEST_INSTRUMENTATION', '') == '1'
+
+SLOW_REQUEST_THRESHOLD_MS = int(os.getenv('SLOW_REQUEST_THRESHOLD_MS', '500'))
+
+# statements repeated this often within one request are logged as a likely N+1 query
+REPEATED_QUERY_THRESHOLD = int(os.getenv('REPEATED_QUERY_THRESHOLD', '5'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'dealer.instrumentation': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
 }
 
 
@@ -1,6 +1,59 @@
 from django.contrib import admin
-from .models import Store, Car, Transaction
+from .models import Store, Car, Transaction, TransactionSummary, TransactionRollup, PurchaseTicket
+from .services import bump_inventory_version
+
+
+@admin.register(Store)
+class StoreAdmin(admin.ModelAdmin):
+    """
+    Admin for stores, invalidating cached store responses and logging every change.
+    """
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        bump_inventory_version(obj.pk)
+
+    def delete_model(self, request, obj):
+        store_id = obj.pk
+        car_ids = list(obj.cars.values_list('id', flat=True))
+        super().delete_model(request, obj)
+        bump_inventory_version(store_id, deleted_car_ids=car_ids)
+
+    def delete_queryset(self, request, queryset):
+        deleted = {store_id: [] for store_id in queryset.values_list('id', flat=True)}
+        for car_id, store_id in Car.objects.filter(store__in=queryset).values_list('id', 'store_id'):
+            deleted[store_id].append(car_id)
+        super().delete_queryset(request, queryset)
+        for store_id, car_ids in deleted.items():
+            bump_inventory_version(store_id, deleted_car_ids=car_ids)
+
+
+@admin.register(Car)
+class CarAdmin(admin.ModelAdmin):
+    """
+    Admin for cars, invalidating the cached inventory of the stores involved and logging every change.
+    """
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # the car leaves its old store before it shows up in the new one
+        if change and 'store' in form.changed_data:
+            bump_inventory_version(form.initial['store'], deleted_car_ids=[obj.pk])
+        bump_inventory_version(obj.store_id, car_ids=[obj.pk])
+
+    def delete_model(self, request, obj):
+        car_id = obj.pk
+        super().delete_model(request, obj)
+        bump_inventory_version(obj.store_id, deleted_car_ids=[car_id])
+
+    def delete_queryset(self, request, queryset):
+        deleted = {}
+        for car_id, store_id in queryset.values_list('id', 'store_id'):
+            deleted.setdefault(store_id, []).append(car_id)
+        super().delete_queryset(request, queryset)
+        for store_id, car_ids in deleted.items():
+            bump_inventory_version(store_id, deleted_car_ids=car_ids)
+
 
-admin.site.register(Store)
-admin.site.register(Car)
 admin.site.register(Transaction)
+admin.site.register(TransactionSummary)
+admin.site.register(TransactionRollup)
+admin.site.register(PurchaseTicket)
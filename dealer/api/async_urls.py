@@ -0,0 +1,18 @@
+from django.urls import path
+from .async_views import (
+    store_list,
+    store_detail,
+    car_list,
+    transaction_list,
+    transactions_summary,
+)
+
+# async versions of the read endpoints, for deployments serving car_dealer.asgi
+urlpatterns = [
+    path('stores/', store_list, name='async-store-list'),
+    path('stores/<int:pk>/', store_detail, name='async-store-detail'),
+    path('cars/', car_list, name='async-car-list'),
+    path('stores/<int:store_id>/cars/', car_list, name='async-store-car-list'),
+    path('transactions/summary/', transactions_summary, name='async-transaction-summary'),
+    path('transactions/', transaction_list, name='async-transaction-list'),
+]
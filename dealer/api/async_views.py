@@ -0,0 +1,184 @@
+import logging
+from typing import Optional
+
+from django.http import HttpRequest, HttpResponse, HttpResponseNotAllowed
+
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from dealer.models import Car, Store, Transaction, TransactionSummary
+from dealer.money import cents_enabled
+from dealer.stores import InvalidStore, requested_store_id
+from .encoders import RowEncoder, render_json, render_page
+from .filters import InvalidFilter, filter_transactions, includes
+from .pagination import InvalidCursor, KeysetPagination
+from .serializers import StoreSerializer
+from .views import CAR_ENCODERS, CAR_ORDERINGS, TRANSACTION_ENCODERS, TRANSACTION_ORDERINGS
+
+
+STORE_ENCODERS = {cents: RowEncoder(StoreSerializer, cents=cents) for cents in (False, True)}
+
+
+def _json_response(data, status_code: int = status.HTTP_200_OK) -> HttpResponse:
+    """
+    Render data as the JSON renderer of the sync API views does.
+    """
+    return HttpResponse(JSONRenderer().render(data), content_type=JSONRenderer.media_type, status=status_code)
+
+
+def _json_body(body: bytes) -> HttpResponse:
+    """
+    Wrap a body rendered by the encoders in a JSON response.
+    """
+    return HttpResponse(body, content_type=JSONRenderer.media_type)
+
+
+async def store_list(request: HttpRequest) -> HttpResponse:
+    """
+    Async API view listing stores.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: The same JSON as the GET of store_list_create_api_view.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    store_encoder = STORE_ENCODERS[cents_enabled()]
+    stores = [row async for row in Store.objects.values_list(*store_encoder.columns)]
+    return _json_body(render_json(store_encoder.encode(stores)))
+
+
+async def store_detail(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Async API view retrieving a store, along with its cars when asked with `include=cars`.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        pk (int): The primary key of the store to retrieve.
+
+    Returns:
+        HttpResponse: The same JSON as get_store_with_cars.
+
+    Raises:
+        HTTP 404 Error: If the requested store does not exist.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    cents = cents_enabled()
+    store_encoder, car_encoder = STORE_ENCODERS[cents], CAR_ENCODERS[cents]
+    store = await Store.objects.filter(pk=pk).values_list(*store_encoder.columns).afirst()
+    if store is None:
+        return _json_response({'detail': 'Not found.'}, status.HTTP_404_NOT_FOUND)
+    if not includes(request.GET, 'cars'):
+        return _json_body(render_json(f'{{"store":{store_encoder.encode_one(store)}}}'))
+
+    cars = [row async for row in Car.objects.filter(store_id=pk).values_list(*car_encoder.columns)]
+    return _json_body(render_json(f'{{"store":{store_encoder.encode_one(store)},"cars":{car_encoder.encode(cars)}}}'))
+
+
+async def car_list(request: HttpRequest, store_id: Optional[int] = None) -> HttpResponse:
+    """
+    Async API view listing cars, one page at a time.
+
+    Accepts the same ordering, cursor, page size and store as the sync car_list.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        store_id (Optional[int]): Only list the cars of this store.
+
+    Returns:
+        HttpResponse: The same JSON as the sync car_list.
+
+    Raises:
+        HTTP 400 Error: If the cursor or store is invalid.
+        HTTP 500 Error: If an unexpected error occurs while fetching the list of cars.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    try:
+        ordering_field = CAR_ORDERINGS.get(request.GET.get('ordering', 'price'), 'price')
+
+        cars = Car.objects.all()
+        store_id = requested_store_id(request, store_id)
+        if store_id is not None:
+            cars = cars.filter(store_id=store_id)
+
+        paginator = KeysetPagination(ordering_field)
+        encoder = CAR_ENCODERS[cents_enabled()]
+        rows = await paginator.apaginate_queryset(cars, request, encoder.columns)
+        return _json_body(render_page(paginator.get_next_link(), encoder.encode(rows)))
+    except (InvalidCursor, InvalidStore) as e:
+        return _json_response({'error': str(e)}, status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logging.error(f"An error occurred in async car_list view: {e}")
+        return _json_response({'error': 'An unexpected error occurred. Please try again later.'}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+async def transaction_list(request: HttpRequest) -> HttpResponse:
+    """
+    Async API view listing transactions, one page at a time.
+
+    Accepts the same ordering, cursor, page size and filters as the sync transaction_list.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: The same JSON as the sync transaction_list.
+
+    Raises:
+        HTTP 400 Error: If the cursor or a filter is invalid.
+        HTTP 500 Error: If an unexpected error occurs while fetching the transactions.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    try:
+        ordering_field = TRANSACTION_ORDERINGS.get(request.GET.get('ordering', 'id'), 'id')
+        transactions = filter_transactions(Transaction.objects.all(), request.GET)
+
+        paginator = KeysetPagination(ordering_field)
+        encoder = TRANSACTION_ENCODERS[cents_enabled()]
+        rows = await paginator.apaginate_queryset(transactions, request, encoder.columns)
+        return _json_body(render_page(paginator.get_next_link(), encoder.encode(rows)))
+    except (InvalidCursor, InvalidFilter) as e:
+        return _json_response({'error': str(e)}, status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logging.error(f"An error occurred in async transaction_list view: {e}")
+        return _json_response({'error': 'An unexpected error occurred. Please try again later.'}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+async def transactions_summary(request: HttpRequest) -> HttpResponse:
+    """
+    Async API view summarizing transactions, optionally for the store in the `store` query parameter.
+
+    The totals are maintained on write, so the summary is a single aggregate query.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: The same JSON as the sync transactions_summary.
+
+    Raises:
+        HTTP 400 Error: If the store parameter is not a valid store id.
+        HTTP 500 Error: If an unexpected error occurs while summarizing transactions.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    store_id = request.GET.get('store')
+    if store_id is not None and not store_id.isdigit():
+        return _json_response({'error': 'Invalid store.'}, status.HTTP_400_BAD_REQUEST)
+
+    try:
+        totals, _ = await TransactionSummary.asummarize(store_id)
+        return _json_response(totals)
+    except Exception as e:
+        logging.error(f"An error occurred in async transactions_summary view: {e}")
+        return _json_response({'error': 'An unexpected error occurred. Please try again later.'}, status.HTTP_500_INTERNAL_SERVER_ERROR)
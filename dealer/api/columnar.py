@@ -0,0 +1,83 @@
+from typing import Iterable, Sequence
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from .encoders import RowEncoder, _encode_string
+
+
+class ColumnarRenderer(JSONRenderer):
+    """
+    JSON renderer of the columnar list format, selected with `?format=columnar` or its media type.
+
+    List views encode their pages with a ColumnarEncoder and bypass the renderer, which
+    only renders the other responses, e.g. errors, as plain JSON.
+    """
+    media_type = 'application/vnd.dealer.columnar+json'
+    format = 'columnar'
+
+
+# the renderers of the list views offering the columnar format
+LIST_RENDERERS: list = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarRenderer]
+
+
+def accepts_columnar(request) -> bool:
+    """
+    Tell whether the negotiated response is the columnar list format.
+    """
+    return isinstance(getattr(request, 'accepted_renderer', None), ColumnarRenderer)
+
+
+class ColumnarEncoder(RowEncoder):
+    """
+    Encodes value tuples as one JSON array per field rather than one object per row.
+
+    Field names are written once per page instead of once per row, and the values of
+    the dictionary fields, short strings repeated across rows, are replaced by their
+    index in a list of the distinct values of the page. Values are otherwise encoded
+    as in the row format, so a page decodes to the same data:
+
+        {"count": 2,
+         "columns": {"id": [1, 2], "make": [0, 0], "price": ["9.99", "12.50"]},
+         "dictionaries": {"make": ["Škoda"]}}
+
+    Attributes:
+        dictionary (tuple): The names of the dictionary encoded fields.
+    """
+    def __init__(self, serializer_class: type, dictionary: Sequence[str] = (), cents: bool = False) -> None:
+        """
+        Initialize the encoder from a ModelSerializer with plain model fields.
+
+        Args:
+            serializer_class (type): The serializer whose fields are encoded.
+            dictionary (Sequence[str]): The string fields to dictionary encode.
+            cents (bool): Read money fields from their integer cents columns.
+        """
+        super().__init__(serializer_class, cents)
+        assert set(dictionary) <= set(self.fields)
+        self.dictionary = tuple(dictionary)
+
+    def encode(self, rows: Iterable[tuple]) -> str:
+        """
+        Encode rows as a JSON object of columns.
+
+        Args:
+            rows (Iterable[tuple]): Tuples of the values of `columns`, as returned by values_list().
+
+        Returns:
+            str: The JSON object with the row count, the columns and the dictionaries.
+        """
+        rows = list(rows)
+        values = list(zip(*rows)) or [()] * len(self.fields)
+        columns = []
+        dictionaries = []
+        for name, encode, column in zip(self.fields, self.get_encoders(), values):
+            if name in self.dictionary:
+                # indexes in order of first appearance
+                codes = {}
+                encoded = ','.join('null' if value is None else str(codes.setdefault(value, len(codes))) for value in column)
+                dictionaries.append(f'{_encode_string(name)}:[{",".join(map(_encode_string, codes))}]')
+            else:
+                encoded = ','.join('null' if value is None else encode(value) for value in column)
+            columns.append(f'{_encode_string(name)}:[{encoded}]')
+        return f'{{"count":{len(rows)},"columns":{{{",".join(columns)}}},"dictionaries":{{{",".join(dictionaries)}}}}}'
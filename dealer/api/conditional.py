@@ -0,0 +1,131 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Optional, Tuple
+
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from dealer.cache import inventory_state
+from dealer.models import Store, TransactionSummary
+from dealer.stores import InvalidStore, requested_store_id
+
+
+# the validators of a response: its entity tag and the time it last changed, either may be None
+State = Tuple[Optional[str], Optional[datetime]]
+
+
+def conditional(state: Callable[..., State]) -> Callable:
+    """
+    Answer conditional GET requests from a cheap state lookup before the view runs.
+
+    The state function receives the view arguments and returns the entity tag and last
+    modification time of the response the view would build. When the request carries a
+    matching If-None-Match or an If-Modified-Since that is not older, a 304 is returned
+    without running the view, so no serializer work is done. Otherwise the view runs and
+    its successful responses carry ETag and Last-Modified headers.
+
+    A state function that cannot tell, e.g. because the request is invalid, returns
+    (None, None) and the view handles the request as usual.
+
+    Args:
+        state (Callable[..., State]): Computes the validators of a request, ideally with a single query.
+
+    Returns:
+        Callable: The view decorator.
+    """
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            etag, last_modified = state(request, *args, **kwargs)
+            if etag is not None:
+                etag = quote_etag(etag)
+            timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            if etag is not None and not response.has_header('ETag'):
+                response.headers['ETag'] = etag
+            if timestamp is not None and not response.has_header('Last-Modified'):
+                response.headers['Last-Modified'] = http_date(timestamp)
+            return response
+        return wrapper
+    return decorator
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a strong entity tag from everything a response body depends on.
+
+    Args:
+        *parts (Any): The request details and data versions the body is built from.
+
+    Returns:
+        str: The unquoted entity tag.
+    """
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def car_list_state(request: HttpRequest, store_id: Optional[int] = None) -> State:
+    """
+    Validators of the car list, from the inventory version and the latest inventory change.
+
+    Selling a car deletes it, so the latest submission date alone would not move. The
+    inventory timestamp of the store is set by submissions and sales alike. The version
+    is kept on the request, so the view keys its cache without reading it again.
+    """
+    try:
+        store_id = requested_store_id(request, store_id)
+    except InvalidStore:
+        return None, None
+    version, updated_at = inventory_state(store_id)
+    request.inventory_version = version
+    return make_etag('car_list', version, request.get_full_path(), request.META.get('HTTP_ACCEPT')), updated_at
+
+
+def store_state(request: HttpRequest, pk: int) -> State:
+    """
+    Validators of a store and its cars, from the store inventory version and timestamp.
+    """
+    state = Store.objects.filter(pk=pk).values_list('inventory_version', 'inventory_updated_at').first()
+    if state is None:
+        return None, None
+    version, updated_at = state
+    return make_etag('store', pk, version, request.GET.get('include'), request.META.get('HTTP_ACCEPT')), updated_at
+
+
+def transactions_summary_state(request: HttpRequest) -> State:
+    """
+    Validators of the transaction summary, from its totals and the latest transaction.
+
+    The totals are one aggregate over the summary rows, which is all the view reads.
+    """
+    store_id = request.GET.get('store')
+    if store_id is not None and not store_id.isdigit():
+        return None, None
+    totals, last_transaction_at = TransactionSummary.summarize(store_id)
+    return make_etag('transactions_summary', sorted(totals.items()), request.META.get('HTTP_ACCEPT')), last_transaction_at
+
+
+def transaction_timeseries_state(request: HttpRequest) -> State:
+    """
+    Validators of a transaction time series, from the summary totals and the latest transaction.
+
+    Rollups change only along with the summary rows. Today is part of the tag, as a
+    series without an end runs up to it.
+    """
+    store_id = request.GET.get('store')
+    if store_id is not None and not store_id.isdigit():
+        return None, None
+    totals, last_transaction_at = TransactionSummary.summarize(store_id)
+    etag = make_etag('transaction_timeseries', sorted(totals.items()), timezone.localdate(), request.get_full_path(), request.META.get('HTTP_ACCEPT'))
+    return etag, last_transaction_at
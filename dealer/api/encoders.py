@@ -0,0 +1,186 @@
+import decimal
+import json
+from typing import Callable, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ModelSerializer
+
+from dealer.money import cents_column, format_cents, has_cents_column
+
+
+# encodes strings as the JSON renderer does, leaving non-ASCII characters unescaped
+_encode_string: Callable[[str], str] = json.encoder.encode_basestring
+
+# dumps any other value as the JSON renderer does
+_dumps: Callable = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode
+
+
+def _encode_int(value: int) -> str:
+    return str(value)
+
+
+def _encode_cents(value: int) -> str:
+    return f'"{format_cents(value)}"'
+
+
+def _decimal_encoder(field: models.DecimalField) -> Callable:
+    """
+    Build the encoder of a decimal column, quantized and formatted like a DecimalField.
+    """
+    quantum = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    context.prec = field.max_digits
+
+    def encode(value: decimal.Decimal) -> str:
+        return '"{:f}"'.format(value.quantize(quantum, context=context))
+    return encode
+
+
+def _datetime_encoder() -> Callable:
+    """
+    Build the encoder of a datetime column, converted to the current time zone like a DateTimeField.
+    """
+    zone = timezone.get_current_timezone() if settings.USE_TZ else None
+
+    def encode(value) -> str:
+        if zone is not None:
+            value = value.astimezone(zone) if timezone.is_aware(value) else timezone.make_aware(value, zone)
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return f'"{value}"'
+    return encode
+
+
+class RowEncoder:
+    """
+    Encodes value tuples straight to the JSON a ModelSerializer and the JSON renderer produce.
+
+    Serializing a page with `many=True` builds a model instance and walks the serializer
+    fields for every row. This encoder reads plain tuples from `values_list()` and joins
+    precomputed key prefixes with one encoder per column, so the output is byte-for-byte
+    the same at a fraction of the cost. It covers the column types of the read-only list
+    serializers: integers, foreign keys, strings, decimals and datetimes. With `cents`,
+    money fields are read from their integer cents columns and formatted without
+    building a Decimal.
+
+    Attributes:
+        fields (tuple): The serializer field names.
+        columns (tuple): The values_list() fields, the cents column in place of each money field.
+    """
+    def __init__(self, serializer_class: type, cents: bool = False) -> None:
+        """
+        Initialize the encoder from a ModelSerializer with plain model fields.
+
+        Args:
+            serializer_class (type): The serializer whose output is reproduced.
+            cents (bool): Read money fields from their integer cents columns.
+        """
+        assert issubclass(serializer_class, ModelSerializer)
+        self.model = serializer_class.Meta.model
+        self.fields = tuple(serializer_class.Meta.fields)
+        self.cents = {name for name in self.fields if cents and has_cents_column(self.model._meta.get_field(name))}
+        self.columns = tuple(cents_column(name) if name in self.cents else name for name in self.fields)
+        self.prefixes = tuple(f'{"," if index else "{"}{_encode_string(name)}:' for index, name in enumerate(self.fields))
+
+    def get_encoders(self) -> List[Callable]:
+        """
+        Return the encoder of every column, for values other than None.
+        """
+        encoders = []
+        for name in self.fields:
+            field = self.model._meta.get_field(name)
+            if name in self.cents:
+                encoders.append(_encode_cents)
+            elif isinstance(field, models.DecimalField):
+                encoders.append(_decimal_encoder(field))
+            elif isinstance(field, models.DateTimeField):
+                encoders.append(_datetime_encoder())
+            elif isinstance(field, (models.CharField, models.TextField)):
+                encoders.append(_encode_string)
+            elif isinstance(field, (models.IntegerField, models.AutoField, models.ForeignKey)):
+                encoders.append(_encode_int)
+            else:
+                encoders.append(_dumps)
+        return encoders
+
+    def encode(self, rows: Iterable[tuple]) -> str:
+        """
+        Encode rows as a JSON array of objects.
+
+        Args:
+            rows (Iterable[tuple]): Tuples of the values of `columns`, as returned by values_list().
+
+        Returns:
+            str: The JSON array.
+        """
+        columns = tuple(zip(self.prefixes, self.get_encoders()))
+        return f'[{",".join(self._encode_row(columns, row) for row in rows)}]'
+
+    def encode_one(self, row: tuple) -> str:
+        """
+        Encode a single row as a JSON object.
+
+        Args:
+            row (tuple): The values of `columns`.
+
+        Returns:
+            str: The JSON object.
+        """
+        return self._encode_row(tuple(zip(self.prefixes, self.get_encoders())), row)
+
+    @staticmethod
+    def _encode_row(columns: tuple, row: tuple) -> str:
+        parts = [
+            prefix + ('null' if value is None else encode(value))
+            for (prefix, encode), value in zip(columns, row)
+        ]
+        parts.append('}')
+        return ''.join(parts)
+
+
+def render_page(next_link: Optional[str], results: str) -> bytes:
+    """
+    Render a keyset page around encoded results, as the JSON renderer renders the page data.
+
+    Args:
+        next_link (Optional[str]): The link to the next page, or None on the last page.
+        results (str): The results encoded by RowEncoder.encode() or ColumnarEncoder.encode().
+
+    Returns:
+        bytes: The response body.
+    """
+    return render_json(f'{{"next":{_dumps(next_link)},"results":{results}}}')
+
+
+def render_json(body: str) -> bytes:
+    """
+    Finish a JSON document assembled from encoded parts, as the JSON renderer finishes its output.
+
+    Args:
+        body (str): The JSON document.
+
+    Returns:
+        bytes: The response body.
+    """
+    # The renderer escapes these two characters so the output is also valid JavaScript
+    return body.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
+
+
+def accepts_plain_json(request) -> bool:
+    """
+    Tell whether the negotiated response is compact JSON, which the fast path reproduces.
+
+    Browsable API pages, JSON requested with an indent and renderers configured to
+    escape non-ASCII characters go through the serializers.
+    """
+    renderer = getattr(request, 'accepted_renderer', None)
+    return (
+        isinstance(renderer, JSONRenderer)
+        and request.accepted_media_type == JSONRenderer.media_type
+        and renderer.compact and not renderer.ensure_ascii
+    )
@@ -0,0 +1,214 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Optional, Tuple
+
+from django.db.models import Q, QuerySet
+from django.http import QueryDict
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+class InvalidFilter(Exception):
+    """
+    Raised when a filter query parameter cannot be parsed.
+    """
+
+
+def parse_id(params: QueryDict, name: str) -> Optional[int]:
+    """
+    Parse an optional id query parameter.
+
+    Raises:
+        InvalidFilter: If the parameter is not an id.
+    """
+    value = params.get(name)
+    if value is None:
+        return None
+    if not value.isdigit():
+        raise InvalidFilter(f"'{name}' must be an id.")
+    return int(value)
+
+
+def includes(params: QueryDict, name: str) -> bool:
+    """
+    Tell whether the comma-separated `include` query parameter asks for a related list.
+    """
+    return name in params.get('include', '').split(',')
+
+
+def parse_decimal(params: QueryDict, name: str) -> Optional[Decimal]:
+    """
+    Parse an optional decimal query parameter.
+
+    Raises:
+        InvalidFilter: If the parameter is not a finite number.
+    """
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        number = None
+    if number is None or not number.is_finite():
+        raise InvalidFilter(f"'{name}' must be a number.")
+    return number
+
+
+def parse_day(params: QueryDict, name: str) -> Optional[date]:
+    """
+    Parse an optional date query parameter.
+
+    Raises:
+        InvalidFilter: If the parameter is not an ISO 8601 date.
+    """
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise InvalidFilter(f"'{name}' must be an ISO 8601 date.")
+    return day
+
+
+def parse_moment(params: QueryDict, name: str) -> Tuple[Optional[datetime], bool]:
+    """
+    Parse an optional date or datetime query parameter into an aware datetime.
+
+    A bare date is read as midnight at the start of that day.
+
+    Args:
+        params (QueryDict): The query parameters.
+        name (str): The name of the parameter.
+
+    Returns:
+        Tuple[Optional[datetime], bool]: The parsed moment, or None if the parameter is
+            absent, and whether the parameter was a bare date.
+
+    Raises:
+        InvalidFilter: If the parameter is neither a date nor a datetime.
+    """
+    value = params.get(name)
+    if value is None:
+        return None, False
+
+    try:
+        day = parse_date(value)
+        is_date = day is not None
+        if is_date:
+            moment = datetime.combine(day, time.min)
+        else:
+            moment = parse_datetime(value)
+            if moment is None:
+                raise ValueError(value)
+    except ValueError:
+        raise InvalidFilter(f"'{name}' must be an ISO 8601 date or datetime.")
+
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment, is_date
+
+
+def filter_date_range(queryset: QuerySet, params: QueryDict, field_name: str) -> QuerySet:
+    """
+    Limit a queryset to the `date_from` and `date_to` query parameters, both inclusive.
+
+    Raises:
+        InvalidFilter: If a parameter cannot be parsed.
+    """
+    date_from, _ = parse_moment(params, 'date_from')
+    if date_from is not None:
+        queryset = queryset.filter(**{f'{field_name}__gte': date_from})
+
+    date_to, is_date = parse_moment(params, 'date_to')
+    if date_to is not None:
+        if is_date:
+            # a bare date includes that whole day
+            queryset = queryset.filter(**{f'{field_name}__lt': date_to + timedelta(days=1)})
+        else:
+            queryset = queryset.filter(**{f'{field_name}__lte': date_to})
+    return queryset
+
+
+# shortest substring searched with `q`, as the trigram index cannot serve shorter ones
+MIN_SUBSTRING_LENGTH: int = 3
+
+
+def filter_cars(queryset: QuerySet, params: QueryDict) -> QuerySet:
+    """
+    Apply the car search filters to a queryset.
+
+    Supported parameters are `make` and `model` (case-insensitive prefixes), `q` (a
+    case-insensitive substring of the make or model), `price_min`, `price_max`,
+    `date_from` and `date_to` (on the submission date). Prefixes are served by the
+    pattern indexes on the upper-cased make and model, substrings by their trigram
+    indexes on PostgreSQL.
+
+    Args:
+        queryset (QuerySet): The cars to filter.
+        params (QueryDict): The query parameters.
+
+    Returns:
+        QuerySet: The filtered cars.
+
+    Raises:
+        InvalidFilter: If a parameter cannot be parsed.
+    """
+    for name in ('make', 'model'):
+        prefix = params.get(name)
+        if prefix:
+            queryset = queryset.filter(**{f'{name}__istartswith': prefix})
+
+    substring = params.get('q')
+    if substring is not None:
+        if len(substring) < MIN_SUBSTRING_LENGTH:
+            raise InvalidFilter(f"'q' must be at least {MIN_SUBSTRING_LENGTH} characters long.")
+        queryset = queryset.filter(Q(make__icontains=substring) | Q(model__icontains=substring))
+
+    price_min = parse_decimal(params, 'price_min')
+    if price_min is not None:
+        queryset = queryset.filter(price__gte=price_min)
+
+    price_max = parse_decimal(params, 'price_max')
+    if price_max is not None:
+        queryset = queryset.filter(price__lte=price_max)
+
+    return filter_date_range(queryset, params, 'submission_date')
+
+
+def filter_transactions(queryset: QuerySet, params: QueryDict) -> QuerySet:
+    """
+    Apply the transaction list filters to a queryset.
+
+    Supported parameters are `store`, `car`, `type` (bought or sold), `date_from` and
+    `date_to`. Filtering on store, type and date range is served by the composite
+    (store, transaction_type, transaction_date) index.
+
+    Args:
+        queryset (QuerySet): The transactions to filter.
+        params (QueryDict): The query parameters.
+
+    Returns:
+        QuerySet: The filtered transactions.
+
+    Raises:
+        InvalidFilter: If a parameter cannot be parsed.
+    """
+    store_id = parse_id(params, 'store')
+    if store_id is not None:
+        queryset = queryset.filter(store_id=store_id)
+
+    car_id = parse_id(params, 'car')
+    if car_id is not None:
+        queryset = queryset.filter(car_id=car_id)
+
+    transaction_type = params.get('type')
+    if transaction_type is not None:
+        if transaction_type not in ('bought', 'sold'):
+            raise InvalidFilter("'type' must be 'bought' or 'sold'.")
+        queryset = queryset.filter(transaction_type=transaction_type)
+
+    return filter_date_range(queryset, params, 'transaction_date')
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from dealer.models import Store, Car, Transaction
+from dealer.models import Store, Car, Transaction, PurchaseTicket
 
 
 class StoreSerializer(serializers.ModelSerializer):
@@ -15,7 +15,7 @@ class StoreSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = Store
-        fields = ['id', 'name', 'budget']
+        fields = ['id', 'name', 'budget', 'inventory_count', 'inventory_value', 'inventory_updated_at']
 
 
 class CarSerializer(serializers.ModelSerializer):
@@ -45,4 +45,35 @@ class TransactionSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = Transaction
-        fields = ['id', 'car_make', 'car_model', 'buyer', 'seller', 'transaction_type', 'transaction_amount', 'transaction_date']
+        fields = ['id', 'car_make', 'car_model', 'buyer', 'seller', 'transaction_type', 'transaction_amount', 'transaction_date', 'store', 'car']
+
+
+class CarSubmissionSerializer(serializers.ModelSerializer):
+    """
+    Serializer class validating a car submitted for purchase by the store.
+
+    The store is chosen by the server rather than the client, and prices must not be negative.
+
+    Attributes:
+        model (Model): The model class that the serializer should serialize/deserialize.
+        fields (list): The fields of the model that should be included in the serialized representation.
+    """
+    class Meta:
+        model = Car
+        fields = ['make', 'model', 'price']
+        extra_kwargs = {'price': {'min_value': 0}}
+
+
+class PurchaseTicketSerializer(serializers.ModelSerializer):
+    """
+    Serializer class for the PurchaseTicket model.
+
+    Serializes PurchaseTicket model instances into JSON representations of the queued purchase status.
+
+    Attributes:
+        model (Model): The model class that the serializer should serialize/deserialize.
+        fields (list): The fields of the model that should be included in the serialized representation.
+    """
+    class Meta:
+        model = PurchaseTicket
+        fields = ['id', 'car_id', 'store_id', 'status', 'transaction', 'error', 'created_at', 'processed_at']
@@ -1,22 +1,54 @@
-from django.urls import path
+from django.urls import include, path
 from .views import (
     store_list_create_api_view,
     submit_car_for_purchase,
+    submit_cars_for_purchase_bulk,
+    import_inventory,
     purchase_car,
+    purchase_cars_batch,
+    purchase_ticket,
     get_store_with_cars,
     car_list,
+    car_search,
+    car_facets,
     transactions_summary,
+    transaction_timeseries,
     transaction_list,
     get_routes,
+    change_feed,
+    export_data,
 )
 
 urlpatterns = [
-    path('', get_routes),
+    path('', get_routes, name='api-root'),
     path('stores/', store_list_create_api_view, name='store-list-create'),
     path('stores/<int:pk>/', get_store_with_cars, name='store-detail'),
     path('cars/', car_list, name='car-list'),
+    path('cars/search/', car_search, name='car-search'),
+    path('cars/facets/', car_facets, name='car-facets'),
     path('cars/submit/', submit_car_for_purchase, name='car-submit'),
-    path('cars/<int:pk>/buy/', purchase_car, name='car-buy'),
+    path('cars/submit/bulk/', submit_cars_for_purchase_bulk, name='car-submit-bulk'),
+    path('cars/import/', import_inventory, name='car-import'),
+    path('cars/<int:car_id>/buy/', purchase_car, name='car-buy'),
+    path('cars/buy/batch/', purchase_cars_batch, name='car-buy-batch'),
+    path('purchases/<int:ticket_id>/', purchase_ticket, name='purchase-ticket'),
     path('transactions/summary/', transactions_summary, name='transaction-summary'),
+    path('transactions/timeseries/', transaction_timeseries, name='transaction-timeseries'),
     path('transactions/', transaction_list, name='transaction-list'),
+
+    # store-scoped routes, routing every write to the store in the URL
+    path('stores/<int:store_id>/cars/', car_list, name='store-car-list'),
+    path('stores/<int:store_id>/cars/search/', car_search, name='store-car-search'),
+    path('stores/<int:store_id>/cars/facets/', car_facets, name='store-car-facets'),
+    path('stores/<int:store_id>/cars/submit/', submit_car_for_purchase, name='store-car-submit'),
+    path('stores/<int:store_id>/cars/submit/bulk/', submit_cars_for_purchase_bulk, name='store-car-submit-bulk'),
+    path('stores/<int:store_id>/cars/import/', import_inventory, name='store-car-import'),
+    path('stores/<int:store_id>/cars/<int:car_id>/buy/', purchase_car, name='store-car-buy'),
+    path('stores/<int:store_id>/cars/buy/batch/', purchase_cars_batch, name='store-car-buy-batch'),
+
+    path('changes/', change_feed, name='change-feed'),
+
+    path('export/<str:resource>/<str:file_format>/', export_data, name='export'),
+
+    path('async/', include('dealer.api.async_urls')),
 ]
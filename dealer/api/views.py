@@ -1,14 +1,65 @@
+import io
 import logging
+from typing import Optional
+
+from django.conf import settings
 from django.db import transaction
+from django.db.models import QuerySet
+from django.http import Http404, HttpRequest, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import require_GET
 
 from rest_framework import status
 from rest_framework.request import Request
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, parser_classes, renderer_classes
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-
-from dealer.models import Car, Store, Transaction
-from .serializers import StoreSerializer, CarSerializer, TransactionSerializer
+from rest_framework.utils.urls import replace_query_param
+
+from dealer.exports import EXPORTS, EXPORT_FORMATS, accepts_gzip, export_chunks, gzip_chunks
+from dealer.models import Car, Change, Store, Transaction, TransactionSummary, PurchaseTicket
+from dealer.stores import InvalidStore, get_store, requested_store_id
+from dealer import changes, facets, imports, services, timeseries
+from dealer.cache import get_or_build, inventory_version, versioned_key
+from dealer.money import cents_enabled
+from .columnar import LIST_RENDERERS, ColumnarEncoder, accepts_columnar
+from .conditional import car_list_state, conditional, store_state, transaction_timeseries_state, transactions_summary_state
+from .encoders import RowEncoder, accepts_plain_json, render_page
+from .filters import InvalidFilter, filter_cars, filter_transactions, includes, parse_day, parse_decimal, parse_id
+from .pagination import InvalidCursor, KeysetPagination
+from .serializers import StoreSerializer, CarSerializer, CarSubmissionSerializer, TransactionSerializer, PurchaseTicketSerializer
+
+
+# orderings accepted by the car list
+CAR_ORDERINGS: dict = {
+    'price': 'price',
+    '-price': '-price',
+    'make': 'make',
+    '-make': '-make',
+    'model': 'model',
+    '-model': '-model',
+    'submission_date': 'submission_date',
+    '-submission_date': '-submission_date',
+}
+
+# orderings accepted by the transaction list, besides the default insertion order
+TRANSACTION_ORDERINGS: dict = {
+    'transaction_date': 'transaction_date',
+    '-transaction_date': '-transaction_date',
+}
+
+# encode list pages from values_list() tuples, matching the serializers byte for byte,
+# by whether money is read from the cents columns, see dealer.money.cents_enabled()
+CAR_ENCODERS = {cents: RowEncoder(CarSerializer, cents=cents) for cents in (False, True)}
+TRANSACTION_ENCODERS = {cents: RowEncoder(TransactionSerializer, cents=cents) for cents in (False, True)}
+
+# encode list pages in the columnar format, with the repetitive string fields dictionary encoded
+CAR_COLUMNAR_ENCODERS = {cents: ColumnarEncoder(CarSerializer, ('make', 'model'), cents=cents) for cents in (False, True)}
+TRANSACTION_COLUMNAR_ENCODERS = {
+    cents: ColumnarEncoder(TransactionSerializer, ('car_make', 'car_model', 'buyer', 'seller', 'transaction_type'), cents=cents)
+    for cents in (False, True)
+}
 
 
 @api_view(['GET'])
@@ -22,14 +73,45 @@ def get_routes(request):
     routes = [
         '/api/stores',
         '/api/stores/<int:pk>',
+        '/api/stores/<int:pk>/?include=cars',
 
         '/api/cars',
-        '/api/car_list/?ordering=ORDERING_OPTION>',
+        '/api/cars/?ordering=ORDERING_OPTION&cursor=CURSOR&page_size=PAGE_SIZE',
+        '/api/cars/search/?make=PREFIX&model=PREFIX&q=SUBSTRING&price_min=PRICE&price_max=PRICE&date_from=DATE&date_to=DATE',
+        '/api/cars/facets/?price_band=WIDTH&SEARCH_FILTERS',
         '/api/cars/submit',
+        '/api/cars/submit/bulk',
+        '/api/cars/import',
         '/api/cars/<int:pk>/buy',
+        '/api/cars/buy/batch',
+
+        '/api/stores/<int:store_id>/cars',
+        '/api/stores/<int:store_id>/cars/search',
+        '/api/stores/<int:store_id>/cars/facets',
+        '/api/stores/<int:store_id>/cars/submit',
+        '/api/stores/<int:store_id>/cars/submit/bulk',
+        '/api/stores/<int:store_id>/cars/import',
+        '/api/stores/<int:store_id>/cars/<int:pk>/buy',
+        '/api/stores/<int:store_id>/cars/buy/batch',
+
+        '/api/purchases/<int:ticket_id>',
 
         '/api/transactions/',
+        '/api/transactions/?ordering=ORDERING_OPTION&cursor=CURSOR&page_size=PAGE_SIZE',
+        '/api/transactions/?store=STORE_ID&car=CAR_ID&type=TYPE&date_from=DATE&date_to=DATE',
         '/api/transactions/summary',
+        '/api/transactions/timeseries/?granularity=day|week|month&from=DATE&to=DATE&store=STORE_ID',
+
+        '/api/changes/?since=CURSOR&store=STORE_ID&page_size=PAGE_SIZE',
+
+        '/api/export/<str:resource>/<str:file_format>/',
+
+        '/api/async/stores',
+        '/api/async/stores/<int:pk>',
+        '/api/async/cars',
+        '/api/async/stores/<int:store_id>/cars',
+        '/api/async/transactions/',
+        '/api/async/transactions/summary',
     ]
     return Response(routes)
 
@@ -56,38 +138,45 @@ def store_list_create_api_view(request: Request) -> Response:
     elif request.method == 'POST':
         serializer = StoreSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                store = serializer.save()
+                Change.record(store.pk)
             return Response(serializer.data, status=201)
         return Response(serializer.errors, status=400)
 
 
+@conditional(store_state)
 @api_view(['GET'])
 def get_store_with_cars(request: Request, pk: int) -> Response:
     """
-    API view for retrieving a store along with its associated cars.
+    API view for retrieving a store, along with its associated cars when asked.
+
+    The store carries its inventory count and value, so by default no car is read.
+    With `include=cars` the car list is embedded, cached per store inventory version.
+    Requests revalidating with If-None-Match or If-Modified-Since get a 304 while the
+    version is unchanged.
 
     Args:
         request (Request): The HTTP request object.
         pk (int): The primary key of the store to retrieve.
 
     Returns:
-        Response: The HTTP response containing store and cars data.
+        Response: The HTTP response containing store data, and cars data when included.
 
     Raises:
         HTTP 404 Error: If the requested store does not exist.
         HTTP 500 Error: If an unexpected error occurs while fetching store information.
     """
-    try:
-        store = get_object_or_404(Store, pk=pk)
-        cars = Car.objects.filter(store=store)
+    store = get_object_or_404(Store, pk=pk)
 
-        store_serializer = StoreSerializer(store)
-        cars_serializer = CarSerializer(cars, many=True)
+    try:
+        def build_cars() -> list:
+            return CarSerializer(Car.objects.filter(store=store), many=True).data
 
-        data = {
-            'store': store_serializer.data,
-            'cars': cars_serializer.data
-        }
+        data = {'store': StoreSerializer(store).data}
+        if includes(request.GET, 'cars'):
+            key = versioned_key('api:store_cars', store.pk, store.inventory_version)
+            data['cars'] = get_or_build(key, build_cars)
 
         return Response(data)
     except Exception as e:
@@ -97,12 +186,15 @@ def get_store_with_cars(request: Request, pk: int) -> Response:
 
 
 @api_view(['POST'])
-def submit_car_for_purchase(request: Request) -> Response:
+def submit_car_for_purchase(request: Request, store_id: Optional[int] = None) -> Response:
     """
     API view for submitting a car for purchase.
 
+    The store is taken from the URL or the X-Store-Id header, defaulting to the first store.
+
     Args:
         request (Request): The HTTP request object containing car data.
+        store_id (Optional[int]): The ID of the store buying the car.
 
     Returns:
         Response: The HTTP response indicating the success or failure of the car submission.
@@ -110,131 +202,427 @@ def submit_car_for_purchase(request: Request) -> Response:
     Raises:
         HTTP 400 Error: If the request data is invalid.
         HTTP 400 Error: If the store does not have enough budget to buy the car.
+        HTTP 404 Error: If the store does not exist.
         HTTP 500 Error: If an unexpected error occurs during the car submission process.
     """
-    serializer = CarSerializer(data=request.data)
+    serializer = CarSubmissionSerializer(data=request.data)
     if serializer.is_valid():
-        car = serializer.save()
-
-        store = get_object_or_404(Store)
-
-        if store.budget >= car.price:
-            try:
-                with transaction.atomic():
-                    car.store = store
-                    car.save()
-                    store.budget -= car.price
-                    store.save()
-
-                    # Create transaction object
-                    Transaction.objects.create(
-                        car_make=car.make,
-                        car_model=car.model,
-                        buyer=store.name,
-                        seller='User',
-                        transaction_type='bought',
-                        transaction_amount=car.price
-                    )
-
-                    return Response(status=status.HTTP_302_FOUND)
-            except Exception as e:
-                logging.error(f"An error occurred while submitting car: {e}")
-                return Response({'error': 'An unexpected error occurred. Please try again later.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        else:
+        try:
+            store = get_store(requested_store_id(request, store_id))
+        except (InvalidStore, Store.DoesNotExist):
+            return Response({'error': 'Store not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            services.submit_car(store, **serializer.validated_data)
+            return Response(status=status.HTTP_302_FOUND)
+        except services.InsufficientBudget:
             return Response({'warning': 'The store does not have enough money to buy this car.'}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logging.error(f"An error occurred while submitting car: {e}")
+            return Response({'error': 'An unexpected error occurred. Please try again later.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+# largest number of cars accepted by one bulk submission
+MAX_BULK_SUBMISSION: int = 10000
+
+
+@api_view(['POST'])
+def submit_cars_for_purchase_bulk(request: Request, store_id: Optional[int] = None) -> Response:
+    """
+    API view for submitting many cars for purchase in one request.
+
+    Each car is validated on its own. Valid cars are bought in the given order while
+    the store budget lasts, and every item reports whether it was accepted. All
+    accepted cars and their transactions are written in one database transaction.
+    The store is taken from the URL or the X-Store-Id header, defaulting to the first store.
+
+    Args:
+        request (Request): The HTTP request object containing a list of car data.
+        store_id (Optional[int]): The ID of the store buying the cars.
+
+    Returns:
+        Response: The HTTP response containing the outcome for every submitted car.
+
+    Raises:
+        HTTP 400 Error: If the request data is not a list of at most MAX_BULK_SUBMISSION cars.
+        HTTP 404 Error: If the store does not exist.
+        HTTP 409 Error: If the store budget kept changing during the submission.
+        HTTP 500 Error: If an unexpected error occurs during the car submission process.
+    """
+    if not isinstance(request.data, list) or len(request.data) > MAX_BULK_SUBMISSION:
+        return Response({'error': f'Expected a list of at most {MAX_BULK_SUBMISSION} cars.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        store = get_store(requested_store_id(request, store_id))
+    except (InvalidStore, Store.DoesNotExist):
+        return Response({'error': 'Store not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+    results = [None] * len(request.data)
+    valid = []
+    for index, item in enumerate(request.data):
+        serializer = CarSubmissionSerializer(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            results[index] = {'index': index, 'status': 'rejected', 'errors': serializer.errors}
+
+    try:
+        cars = services.submit_cars_bulk(store, [data for _, data in valid])
+    except services.BudgetConflict as e:
+        return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+    except Exception as e:
+        logging.error(f"An error occurred while submitting cars in bulk: {e}")
+        return Response({'error': 'An unexpected error occurred. Please try again later.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    accepted_data = iter(CarSerializer([car for car in cars if car is not None], many=True).data)
+    accepted = 0
+    for (index, _), car in zip(valid, cars):
+        if car is None:
+            results[index] = {'index': index, 'status': 'rejected', 'errors': {'price': ['The store does not have enough money to buy this car.']}}
+        else:
+            results[index] = {'index': index, 'status': 'accepted', 'car': next(accepted_data)}
+            accepted += 1
+
+    data = {
+        'accepted': accepted,
+        'rejected': len(results) - accepted,
+        'results': results,
+    }
+    return Response(data, status=status.HTTP_201_CREATED if accepted else status.HTTP_400_BAD_REQUEST)
+
+
 @api_view(['POST'])
-def purchase_car(request: Request, car_id: int) -> Response:
+@parser_classes([MultiPartParser])
+def import_inventory(request: Request, store_id: Optional[int] = None) -> Response:
+    """
+    API view buying the cars of an uploaded inventory CSV file.
+
+    The file is sent as the multipart `file` field, with make, model and price columns.
+    It is parsed and loaded in batches rather than one serializer at a time, and every
+    row left out is reported with its line number. The store is taken from the URL or
+    the X-Store-Id header, defaulting to the first store.
+
+    Args:
+        request (Request): The HTTP request object carrying the file.
+        store_id (Optional[int]): The ID of the store buying the cars.
+
+    Returns:
+        Response: The HTTP response containing the number of cars bought and the rejected rows.
+
+    Raises:
+        HTTP 400 Error: If no file is sent, or it is not a UTF-8 CSV file with the import columns.
+        HTTP 404 Error: If the store does not exist.
+        HTTP 500 Error: If an unexpected error occurs during the import.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'error': 'Expected a CSV file in the file field.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        store = get_store(requested_store_id(request, store_id))
+    except (InvalidStore, Store.DoesNotExist):
+        return Response({'error': 'Store not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        result = imports.import_inventory(store, io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''))
+    except (imports.InvalidImport, UnicodeDecodeError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logging.error(f"An error occurred while importing inventory: {e}")
+        return Response({'error': 'An unexpected error occurred. Please try again later.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    data = {
+        'accepted': result.accepted,
+        'rejected': len(result.rejections),
+        'total': str(result.total),
+        'rejections': [rejection._asdict() for rejection in result.rejections],
+    }
+    return Response(data, status=status.HTTP_201_CREATED if result.accepted else status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+def purchase_car(request: Request, car_id: int, store_id: Optional[int] = None) -> Response:
     """
     API view for purchasing a car.
 
+    When a store is given in the URL or the X-Store-Id header, only its cars can be bought.
+    With the QUEUED_PURCHASES setting, the purchase is queued for the purchase worker
+    instead, and the response carries the ticket to poll for its outcome.
+
     Args:
         request (Request): The HTTP request object.
         car_id (int): The ID of the car to be purchased.
+        store_id (Optional[int]): The ID of the store selling the car.
 
     Returns:
-        Response: The HTTP response indicating the success or failure of the car purchase.
+        Response: The HTTP response indicating the success or failure of the car purchase,
+            or the pending ticket with status 202 when purchases are queued.
 
     Raises:
+        HTTP 404 Error: If the car does not exist or has already been sold.
         HTTP 500 Error: If an unexpected error occurs during the car purchase process.
     """
     try:
-        with transaction.atomic():
-            car = get_object_or_404(Car, id=car_id)
-            store = car.store
-            transaction_amount = car.price
+        if settings.QUEUED_PURCHASES:
+            ticket = services.enqueue_purchase(car_id, requested_store_id(request, store_id))
+            data = PurchaseTicketSerializer(ticket).data
+            data['url'] = reverse('purchase-ticket', kwargs={'ticket_id': ticket.pk})
+            return Response(data, status=status.HTTP_202_ACCEPTED)
+        services.purchase_car(car_id, requested_store_id(request, store_id))
+        return Response({'message': 'Car successfully purchased.'}, status=status.HTTP_200_OK)
+    except (Car.DoesNotExist, InvalidStore):
+        return Response({'error': 'Car not found.'}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logging.error(f"An error occurred while buying car: {e}")
 
-            # Create transaction object
-            transaction_obj = Transaction.objects.create(
-                car_make=car.make,
-                car_model=car.model,
-                buyer='User',
-                seller=store.name,
-                transaction_type='sold',
-                transaction_amount=transaction_amount
-            )
+    return Response({'error': 'An unexpected error occurred. Please try again later.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            if transaction_obj:
-                store.budget += transaction_amount
-                store.save()
 
-                car.delete()
+# largest number of cars bought by one batch purchase
+MAX_BATCH_PURCHASE: int = 1000
 
-                return Response({'message': 'Car successfully purchased.'}, status=status.HTTP_200_OK)
 
+@api_view(['POST'])
+def purchase_cars_batch(request: Request, store_id: Optional[int] = None) -> Response:
+    """
+    API view for purchasing many cars in one request.
+
+    The request data is a list of car IDs. All cars found are sold in one database
+    transaction, and every item reports whether its car was sold. When a store is given
+    in the URL or the X-Store-Id header, only its cars can be bought. Batches are
+    applied right away, whatever the QUEUED_PURCHASES setting.
+
+    Args:
+        request (Request): The HTTP request object containing the car IDs.
+        store_id (Optional[int]): The ID of the store selling the cars.
+
+    Returns:
+        Response: The HTTP response containing the outcome for every requested car.
+
+    Raises:
+        HTTP 400 Error: If the request data is not a list of at most MAX_BATCH_PURCHASE car IDs.
+        HTTP 404 Error: If none of the cars could be bought.
+        HTTP 500 Error: If an unexpected error occurs during the car purchase process.
+    """
+    car_ids = request.data
+    if (not isinstance(car_ids, list) or len(car_ids) > MAX_BATCH_PURCHASE
+            or not all(isinstance(car_id, int) and not isinstance(car_id, bool) for car_id in car_ids)):
+        return Response({'error': f'Expected a list of at most {MAX_BATCH_PURCHASE} car IDs.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        transactions = services.purchase_cars(car_ids, requested_store_id(request, store_id))
+    except InvalidStore:
+        return Response({'error': 'Car not found.'}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
-        logging.error(f"An error occurred while buying car: {e}")
+        logging.error(f"An error occurred while buying cars in a batch: {e}")
+        return Response({'error': 'An unexpected error occurred. Please try again later.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    return Response({'error': 'An unexpected error occurred. Please try again later.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    sold_data = iter(TransactionSerializer([obj for obj in transactions if obj is not None], many=True).data)
+    results = []
+    for index, (car_id, transaction_obj) in enumerate(zip(car_ids, transactions)):
+        if transaction_obj is None:
+            results.append({'index': index, 'car': car_id, 'status': 'failed', 'error': 'Car not found.'})
+        else:
+            results.append({'index': index, 'car': car_id, 'status': 'sold', 'transaction': next(sold_data)})
+
+    sold = len(results) - sum(transaction_obj is None for transaction_obj in transactions)
+    data = {
+        'sold': sold,
+        'failed': len(results) - sold,
+        'results': results,
+    }
+    return Response(data, status=status.HTTP_200_OK if sold else status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['GET'])
+def purchase_ticket(request: Request, ticket_id: int) -> Response:
+    """
+    API view retrieving the status of a queued purchase.
+
+    Args:
+        request (Request): The HTTP request object.
+        ticket_id (int): The ID of the ticket returned when the purchase was queued.
+
+    Returns:
+        Response: The HTTP response containing the ticket, with the sold transaction once completed.
+
+    Raises:
+        HTTP 404 Error: If the ticket does not exist.
+    """
+    ticket = get_object_or_404(PurchaseTicket, pk=ticket_id)
+    return Response(PurchaseTicketSerializer(ticket).data)
 
 
+@conditional(car_list_state)
 @api_view(['GET'])
-def car_list(request: Request) -> Response:
+@renderer_classes(LIST_RENDERERS)
+def car_list(request: Request, store_id: Optional[int] = None) -> Response:
     """
-    API view for listing cars.
+    API view for listing cars, one page at a time.
+
+    Pages are selected with the opaque `cursor` returned as `next` by the previous page.
+    A store given in the URL or the X-Store-Id header limits the list to its cars.
+    With `format=columnar` the page holds one array per field, see ColumnarEncoder.
+    Requests revalidating with If-None-Match or If-Modified-Since get a 304 while the
+    inventory version is unchanged.
 
     Args:
         request (Request): The HTTP request object.
+        store_id (Optional[int]): Only list the cars of this store.
 
     Returns:
-        Response: The HTTP response containing the list of cars.
+        Response: The HTTP response containing a page of cars and the link to the next page.
 
     Raises:
+        HTTP 400 Error: If the cursor or store is invalid.
         HTTP 500 Error: If an unexpected error occurs while fetching the list of cars.
     """
     try:
-        ordering_options = {
-            'price': 'price',
-            '-price': '-price',
-            'make': 'make',
-            '-make': '-make',
-            'model': 'model',
-            '-model': '-model',
-            'submission_date': 'submission_date',
-            '-submission_date': '-submission_date',
-        }
+        cars = Car.objects.all()
+        store_id = requested_store_id(request, store_id)
+        if store_id is not None:
+            cars = cars.filter(store_id=store_id)
+        return _car_page(request, cars, store_id, 'api:car_list')
+    except (InvalidCursor, InvalidStore) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logging.error(f"An error occurred in car_list view: {e}")
+        return Response({'error': 'An unexpected error occurred. Please try again later.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        # Get the user's selected ordering option, defaulting to 'price' if not provided or invalid
-        ordering = request.GET.get('ordering', 'price')
-        ordering_field = ordering_options.get(ordering, 'price')
 
-        cars = Car.objects.all().order_by(ordering_field)
+@conditional(car_list_state)
+@api_view(['GET'])
+@renderer_classes(LIST_RENDERERS)
+def car_search(request: Request, store_id: Optional[int] = None) -> Response:
+    """
+    API view for searching cars, one page at a time.
 
-        serializer = CarSerializer(cars, many=True)
+    Cars can be filtered by `make` and `model` prefix, by `q`, a substring of the make or
+    model, by `price_min` and `price_max` and by submission date with `date_from` and
+    `date_to`. Ordering, pagination, store scoping, caching and the columnar format work
+    as in car_list.
 
-        return Response(serializer.data)
+    Args:
+        request (Request): The HTTP request object.
+        store_id (Optional[int]): Only search the cars of this store.
+
+    Returns:
+        Response: The HTTP response containing a page of matching cars and the link to the next page.
+
+    Raises:
+        HTTP 400 Error: If the cursor, store or a filter is invalid.
+        HTTP 500 Error: If an unexpected error occurs while searching cars.
+    """
+    try:
+        cars = Car.objects.all()
+        store_id = requested_store_id(request, store_id)
+        if store_id is not None:
+            cars = cars.filter(store_id=store_id)
+        cars = filter_cars(cars, request.query_params)
+        return _car_page(request, cars, store_id, 'api:car_search')
+    except (InvalidCursor, InvalidFilter, InvalidStore) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
-        logging.error(f"An error occurred in car_list view: {e}")
+        logging.error(f"An error occurred in car_search view: {e}")
+        return Response({'error': 'An unexpected error occurred. Please try again later.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@conditional(car_list_state)
+@api_view(['GET'])
+def car_facets(request: Request, store_id: Optional[int] = None) -> Response:
+    """
+    API view for the inventory facets: counts per make and model, a price band histogram
+    and the minimum, average and maximum price.
+
+    Accepts the same filters and store as car_search, and `price_band`, the width of
+    the histogram bands. All facets come from one grouped aggregate query, and the
+    result is cached per store inventory version.
+
+    Args:
+        request (Request): The HTTP request object.
+        store_id (Optional[int]): Only describe the cars of this store.
+
+    Returns:
+        Response: The HTTP response containing the facets.
+
+    Raises:
+        HTTP 400 Error: If the store, a filter or the price band is invalid.
+        HTTP 500 Error: If an unexpected error occurs while computing the facets.
+    """
+    try:
+        cars = Car.objects.all()
+        store_id = requested_store_id(request, store_id)
+        if store_id is not None:
+            cars = cars.filter(store_id=store_id)
+        cars = filter_cars(cars, request.query_params)
+
+        band_width = parse_decimal(request.query_params, 'price_band')
+        if band_width is None:
+            band_width = facets.PRICE_BAND_WIDTH
+        elif band_width < facets.MIN_PRICE_BAND_WIDTH:
+            raise InvalidFilter(f"'price_band' must be at least {facets.MIN_PRICE_BAND_WIDTH}.")
+
+        version = getattr(request, 'inventory_version', None) or inventory_version(store_id)
+        key = versioned_key('api:car_facets', store_id, version, request.build_absolute_uri())
+        return Response(get_or_build(key, lambda: facets.car_facets(cars, band_width)))
+    except (InvalidFilter, InvalidStore) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logging.error(f"An error occurred in car_facets view: {e}")
         return Response({'error': 'An unexpected error occurred. Please try again later.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _car_page(request: Request, cars: QuerySet, store_id: Optional[int], endpoint: str) -> HttpResponse:
+    """
+    Build the response holding the requested page of cars, cached per store inventory version.
+
+    Args:
+        request (Request): The HTTP request object.
+        cars (QuerySet): The unordered cars to paginate.
+        store_id (Optional[int]): The store the cars belong to, or None for all stores.
+        endpoint (str): The name of the endpoint in the cache key.
+
+    Returns:
+        HttpResponse: The page of cars and the link to the next page.
+    """
+    # Get the user's selected ordering option, defaulting to 'price' if not provided or invalid
+    ordering = request.GET.get('ordering', 'price')
+    ordering_field = CAR_ORDERINGS.get(ordering, 'price')
+
+    # Plain JSON and columnar pages are encoded straight from tuples, skipping the serializer
+    encoders = CAR_COLUMNAR_ENCODERS if accepts_columnar(request) else CAR_ENCODERS if accepts_plain_json(request) else None
+    encoder = encoders[cents_enabled()] if encoders else None
+    fast = encoder is not None
+
+    def build_page():
+        paginator = KeysetPagination(ordering_field)
+        if fast:
+            rows = paginator.paginate_queryset(cars, request, encoder.columns)
+            return render_page(paginator.get_next_link(), encoder.encode(rows))
+        page = paginator.paginate_queryset(cars, request)
+        serializer = CarSerializer(page, many=True)
+        return paginator.get_paginated_data(serializer.data)
+
+    # The page is cached per store inventory version, query string and encoding
+    version = getattr(request, 'inventory_version', None) or inventory_version(store_id)
+    key = versioned_key(endpoint, store_id, version, request.build_absolute_uri(), fast and request.accepted_media_type)
+    page = get_or_build(key, build_page)
+    if fast:
+        return HttpResponse(page, content_type=request.accepted_media_type)
+    return Response(page)
+
+
+@conditional(transactions_summary_state)
 @api_view(['GET'])
 def transactions_summary(request: Request) -> Response:
     """
     API view for summarizing transactions.
 
+    Optionally limited to a single store with the `store` query parameter. Requests
+    revalidating with If-None-Match or If-Modified-Since get a 304 while the totals
+    are unchanged.
+
     Args:
         request (Request): The HTTP request object.
 
@@ -242,47 +630,192 @@ def transactions_summary(request: Request) -> Response:
         Response: The HTTP response containing the summary of transactions.
 
     Raises:
+        HTTP 400 Error: If the store parameter is not a valid store id.
         HTTP 500 Error: If an unexpected error occurs while summarizing transactions.
     """
-    try:
-        total_bought_amount = Transaction.total_bought_amount()
-        total_sold_amount = Transaction.total_sold_amount()
-        total_transaction_count = Transaction.total_transaction_count()
-        total_bought_transaction_count = Transaction.total_bought_transaction_count()
-        total_sold_transaction_count = Transaction.total_sold_transaction_count()
-
-        data = {
-            'total_bought_amount': total_bought_amount,
-            'total_sold_amount': total_sold_amount,
-            'total_transaction_count': total_transaction_count,
-            'total_bought_transaction_count': total_bought_transaction_count,
-            'total_sold_transaction_count': total_sold_transaction_count,
-        }
+    store_id = request.GET.get('store')
+    if store_id is not None and not store_id.isdigit():
+        return Response({'error': 'Invalid store.'}, status=status.HTTP_400_BAD_REQUEST)
 
+    try:
+        # Totals are maintained on write, so this is a single read of the summary rows
+        data = TransactionSummary.totals(store_id)
         return Response(data)
     except Exception as e:
         logging.error(f"An error occurred in transactions_summary view: {e}")
         return Response({'error': 'An unexpected error occurred. Please try again later.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@conditional(transaction_timeseries_state)
 @api_view(['GET'])
+def transaction_timeseries(request: Request) -> Response:
+    """
+    API view for the bought and sold transaction counts and amounts per day, week or month.
+
+    The `granularity` query parameter picks the period length, `day` by default. The
+    series runs from the `from` date, by default the first day with a transaction, to
+    the `to` date, by default today, both inclusive, and can be limited to a single
+    store with the `store` query parameter. Only the daily rollups are read.
+
+    Args:
+        request (Request): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response containing every period of the range with its totals.
+
+    Raises:
+        HTTP 400 Error: If a parameter is invalid or the range holds too many periods.
+        HTTP 500 Error: If an unexpected error occurs while computing the series.
+    """
+    try:
+        granularity = request.GET.get('granularity', 'day')
+        if granularity not in timeseries.GRANULARITIES:
+            raise InvalidFilter(f"'granularity' must be one of {', '.join(timeseries.GRANULARITIES)}.")
+        series = timeseries.transaction_timeseries(
+            granularity,
+            parse_day(request.query_params, 'from'),
+            parse_day(request.query_params, 'to'),
+            parse_id(request.query_params, 'store'),
+        )
+        return Response({'granularity': granularity, 'results': series})
+    except (InvalidFilter, timeseries.InvalidRange) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logging.error(f"An error occurred in transaction_timeseries view: {e}")
+        return Response({'error': 'An unexpected error occurred. Please try again later.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@renderer_classes(LIST_RENDERERS)
 def transaction_list(request: Request) -> Response:
     """
-    API view for listing transactions.
+    API view for listing transactions, one page at a time.
+
+    Pages are selected with the opaque `cursor` returned as `next` by the previous page.
+    Transactions can be filtered by `store`, `car`, `type`, `date_from` and `date_to`.
+    With `format=columnar` the page holds one array per field, see ColumnarEncoder.
 
     Args:
         request (Request): The HTTP request object.
 
     Returns:
-        Response: The HTTP response containing the list of transactions.
+        Response: The HTTP response containing a page of transactions and the link to the next page.
 
     Raises:
+        HTTP 400 Error: If the cursor or a filter is invalid.
         HTTP 500 Error: If an unexpected error occurs while fetching the transactions.
     """
     try:
-        transactions = Transaction.objects.all()
+        # Transactions are listed in insertion order unless a date ordering is requested
+        ordering = request.GET.get('ordering', 'id')
+        ordering_field = TRANSACTION_ORDERINGS.get(ordering, 'id')
+
+        transactions = filter_transactions(Transaction.objects.all(), request.query_params)
+
+        paginator = KeysetPagination(ordering_field)
+        encoders = TRANSACTION_COLUMNAR_ENCODERS if accepts_columnar(request) else TRANSACTION_ENCODERS if accepts_plain_json(request) else None
+        encoder = encoders[cents_enabled()] if encoders else None
+        if encoder is not None:
+            # Plain JSON and columnar pages are encoded straight from tuples, skipping the serializer
+            rows = paginator.paginate_queryset(transactions, request, encoder.columns)
+            return HttpResponse(render_page(paginator.get_next_link(), encoder.encode(rows)), content_type=request.accepted_media_type)
+        transactions = paginator.paginate_queryset(transactions, request)
         serializer = TransactionSerializer(transactions, many=True)
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
+    except (InvalidCursor, InvalidFilter) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         logging.error(f"An error occurred in transaction_list view: {e}")
         return Response({'error': 'An unexpected error occurred. Please try again later.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def change_feed(request: Request) -> Response:
+    """
+    API view listing the cars and stores changed since a cursor.
+
+    Clients mirroring the inventory start without a cursor, which lists every store and
+    car, then keep following `next`, so a sync costs the changes rather than the whole
+    inventory. Each result is the current state of a changed object, with `deleted` set
+    and no data for sold and removed cars. `more` tells whether further changes are
+    already waiting. A `store` parameter limits the feed to one store.
+
+    Args:
+        request (Request): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response containing the changed objects and the link to poll next.
+
+    Raises:
+        HTTP 400 Error: If the cursor or the store is invalid.
+    """
+    store_id = request.GET.get('store')
+    if store_id is not None and not store_id.isdigit():
+        return Response({'error': 'Invalid store.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        since = changes.decode_position(request.GET.get('since'))
+    except changes.InvalidPosition as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        page_size = min(max(int(request.GET['page_size']), 1), changes.MAX_FEED_PAGE_SIZE)
+    except (KeyError, ValueError):
+        page_size = changes.FEED_PAGE_SIZE
+
+    entries, position, more = changes.read_changes(since, page_size, int(store_id) if store_id is not None else None)
+    # one list serializer per kind rather than one serializer per object
+    data = {}
+    for kind, serializer_class in (('car', CarSerializer), ('store', StoreSerializer)):
+        instances = [entry.instance for entry in entries if entry.kind == kind and entry.instance is not None]
+        data.update(zip(((kind, instance.pk) for instance in instances), serializer_class(instances, many=True).data))
+    results = [
+        {
+            'kind': entry.kind,
+            'id': entry.object_id,
+            'store': entry.store_id,
+            'deleted': entry.instance is None,
+            'data': data.get((entry.kind, entry.object_id)) if entry.instance is not None else None,
+        }
+        for entry in entries
+    ]
+    next_link = request.build_absolute_uri()
+    if position is not None:
+        next_link = replace_query_param(next_link, 'since', changes.encode_position(position))
+    return Response({'next': next_link, 'more': more, 'results': results})
+
+
+@require_GET
+def export_data(request: HttpRequest, resource: str, file_format: str) -> StreamingHttpResponse:
+    """
+    View streaming every car or transaction as NDJSON or CSV.
+
+    Rows are read from a server-side cursor and sent as they are encoded, so memory use
+    does not grow with the table. The body is gzip-compressed on the fly when the client
+    accepts it. This is a plain Django view, so clients asking for text/csv are not
+    refused by REST framework content negotiation.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        resource (str): Either 'cars' or 'transactions'.
+        file_format (str): Either 'ndjson' or 'csv'.
+
+    Returns:
+        StreamingHttpResponse: The streamed export.
+
+    Raises:
+        HTTP 404 Error: If the resource or format is unknown.
+    """
+    if resource not in EXPORTS or file_format not in EXPORT_FORMATS:
+        raise Http404('Unknown export.')
+
+    chunks = export_chunks(resource, file_format)
+    filename = f'{resource}.{file_format}'
+    gzipped = accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if gzipped:
+        chunks = gzip_chunks(chunks)
+
+    response = StreamingHttpResponse(chunks, content_type=f'{EXPORT_FORMATS[file_format]}; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Vary'] = 'Accept-Encoding'
+    if gzipped:
+        response['Content-Encoding'] = 'gzip'
+    return response
@@ -0,0 +1,344 @@
+import json
+import math
+import time
+
+from contextlib import nullcontext
+from datetime import timedelta
+from decimal import Decimal
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from django.db import connection, transaction
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models.functions import Now
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import timezone
+
+from .models import Store, Car, Transaction, TransactionSummary, TransactionRollup, PurchaseTicket, Change
+
+
+class Case(NamedTuple):
+    """
+    One benchmarked request.
+
+    Attributes:
+        name (str): The name of the URL pattern the request exercises.
+        method (str): 'get' or 'post'.
+        path (Callable[[dict], str]): Builds the request path from the seeded fixture ids.
+        data (Optional[Callable[[dict], object]]): Builds the request body, if any.
+        content_type (Optional[str]): The content type of the body, form data if None.
+        writes (bool): Whether the request writes, so each run is rolled back.
+    """
+    name: str
+    method: str
+    path: Callable[[dict], str]
+    data: Optional[Callable[[dict], object]] = None
+    content_type: Optional[str] = None
+    writes: bool = False
+
+
+# content type of the API request bodies
+JSON: str = 'application/json'
+
+
+def _car(fixtures: dict) -> dict:
+    return {'make': 'Bench', 'model': 'Car', 'price': '100.00'}
+
+
+def _cars(fixtures: dict) -> list:
+    return [_car(fixtures)] * 100
+
+
+def _car_ids(fixtures: dict) -> list:
+    return fixtures['cars']
+
+
+def _inventory(fixtures: dict) -> dict:
+    return {'file': SimpleUploadedFile('cars.csv', b'make,model,price\n' + b'Bench,Car,100.00\n' * 1000, 'text/csv')}
+
+
+# one case per URL pattern of dealer.urls and dealer.api.urls
+CASES: List[Case] = [
+    Case('car_list', 'get', lambda f: '/'),
+    Case('store_info', 'get', lambda f: '/store_info/'),
+    Case('transactions_summary', 'get', lambda f: '/transactions_summary/'),
+    Case('submit_car', 'post', lambda f: '/submit_car/', _car, writes=True),
+    Case('buy_car', 'post', lambda f: f'/buy_car/{f["car"]}/', writes=True),
+    Case('store_detail', 'get', lambda f: f'/stores/{f["store"]}/'),
+    Case('store_car_list', 'get', lambda f: f'/stores/{f["store"]}/cars/'),
+    Case('store_submit_car', 'post', lambda f: f'/stores/{f["store"]}/submit_car/', _car, writes=True),
+    Case('store_buy_car', 'post', lambda f: f'/stores/{f["store"]}/buy_car/{f["car"]}/', writes=True),
+
+    Case('api-root', 'get', lambda f: '/api/'),
+    Case('store-list-create', 'get', lambda f: '/api/stores/'),
+    Case('store-detail', 'get', lambda f: f'/api/stores/{f["store"]}/'),
+    Case('car-list', 'get', lambda f: '/api/cars/?ordering=-price'),
+    Case('car-search', 'get', lambda f: '/api/cars/search/?make=make1&price_min=1000'),
+    Case('car-facets', 'get', lambda f: '/api/cars/facets/'),
+    Case('car-submit', 'post', lambda f: '/api/cars/submit/', _car, JSON, writes=True),
+    Case('car-submit-bulk', 'post', lambda f: '/api/cars/submit/bulk/', _cars, JSON, writes=True),
+    Case('car-import', 'post', lambda f: '/api/cars/import/', _inventory, writes=True),
+    Case('car-buy', 'post', lambda f: f'/api/cars/{f["car"]}/buy/', writes=True),
+    Case('car-buy-batch', 'post', lambda f: '/api/cars/buy/batch/', _car_ids, JSON, writes=True),
+    Case('purchase-ticket', 'get', lambda f: f'/api/purchases/{f["ticket"]}/'),
+    Case('transaction-summary', 'get', lambda f: '/api/transactions/summary/'),
+    Case('transaction-timeseries', 'get', lambda f: f'/api/transactions/timeseries/?granularity=day&from={timezone.localdate() - timedelta(days=364)}'),
+    Case('transaction-list', 'get', lambda f: f'/api/transactions/?store={f["store"]}&type=bought'),
+    Case('store-car-list', 'get', lambda f: f'/api/stores/{f["store"]}/cars/'),
+    Case('store-car-search', 'get', lambda f: f'/api/stores/{f["store"]}/cars/search/?q=odel'),
+    Case('store-car-facets', 'get', lambda f: f'/api/stores/{f["store"]}/cars/facets/'),
+    Case('store-car-submit', 'post', lambda f: f'/api/stores/{f["store"]}/cars/submit/', _car, JSON, writes=True),
+    Case('store-car-submit-bulk', 'post', lambda f: f'/api/stores/{f["store"]}/cars/submit/bulk/', _cars, JSON, writes=True),
+    Case('store-car-import', 'post', lambda f: f'/api/stores/{f["store"]}/cars/import/', _inventory, writes=True),
+    Case('store-car-buy', 'post', lambda f: f'/api/stores/{f["store"]}/cars/{f["car"]}/buy/', writes=True),
+    Case('store-car-buy-batch', 'post', lambda f: f'/api/stores/{f["store"]}/cars/buy/batch/', _car_ids, JSON, writes=True),
+    Case('change-feed', 'get', lambda f: '/api/changes/'),
+    Case('export', 'get', lambda f: '/api/export/transactions/ndjson/'),
+
+    Case('async-store-list', 'get', lambda f: '/api/async/stores/'),
+    Case('async-store-detail', 'get', lambda f: f'/api/async/stores/{f["store"]}/'),
+    Case('async-car-list', 'get', lambda f: '/api/async/cars/?ordering=-price'),
+    Case('async-store-car-list', 'get', lambda f: f'/api/async/stores/{f["store"]}/cars/'),
+    Case('async-transaction-summary', 'get', lambda f: '/api/async/transactions/summary/'),
+    Case('async-transaction-list', 'get', lambda f: f'/api/async/transactions/?store={f["store"]}&type=bought'),
+]
+
+# rows per INSERT while seeding
+SEED_BATCH_SIZE: int = 5000
+
+# cars bought by the batch purchase cases
+BATCH_PURCHASE_CARS: int = 50
+
+
+def url_names(urlconfs=('dealer.urls', 'dealer.api.urls')) -> List[str]:
+    """
+    List the names of every URL pattern of the given URL modules, including the ones they include.
+    """
+    names = []
+
+    def collect(patterns) -> None:
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                collect(pattern.url_patterns)
+            elif isinstance(pattern, URLPattern):
+                names.append(pattern.name or str(pattern.pattern))
+
+    for urlconf in urlconfs:
+        collect(get_resolver(urlconf).url_patterns)
+    return names
+
+
+def seed(stores: int, cars: int, transactions: int) -> dict:
+    """
+    Fill the database with a dataset of the given size.
+
+    Cars and transactions are spread evenly over the stores, the transaction summary
+    and rollups are rebuilt from the transactions and every store and car is in the
+    change log.
+
+    Args:
+        stores (int): The number of stores.
+        cars (int): The number of cars in inventory.
+        transactions (int): The number of transactions.
+
+    Returns:
+        dict: The ids the cases refer to: 'store', 'car', a car of that store, 'cars', the
+            first BATCH_PURCHASE_CARS cars of that store, and 'ticket', a pending purchase
+            ticket for that car.
+    """
+    store_objs = Store.objects.bulk_create(
+        Store(name=f'Store {i}', budget=Decimal('90000000.00')) for i in range(max(stores, 1))
+    )
+    Store.objects.update(inventory_updated_at=Now())
+
+    for start in range(0, cars, SEED_BATCH_SIZE):
+        Car.objects.bulk_create(
+            Car(make=f'Make{i % 50}', model=f'Model{i % 500}', price=Decimal(1000 + i % 90000), store=store_objs[i % len(store_objs)])
+            for i in range(start, min(start + SEED_BATCH_SIZE, cars))
+        )
+
+    for start in range(0, transactions, SEED_BATCH_SIZE):
+        Transaction.objects.bulk_create(
+            Transaction(
+                car_make=f'Make{i % 50}',
+                car_model=f'Model{i % 500}',
+                buyer=store_objs[i % len(store_objs)].name if i % 2 == 0 else 'User',
+                seller='User' if i % 2 == 0 else store_objs[i % len(store_objs)].name,
+                transaction_type='bought' if i % 2 == 0 else 'sold',
+                transaction_amount=Decimal(1000 + i % 90000),
+                store=store_objs[i % len(store_objs)],
+            )
+            for i in range(start, min(start + SEED_BATCH_SIZE, transactions))
+        )
+    TransactionSummary.rebuild()
+    TransactionRollup.rebuild()
+    Store.rebuild_inventory()
+
+    # a change log holding the whole inventory, as left by migrating a populated database
+    Change.objects.bulk_create((Change(kind='store', object_id=store.pk, store_id=store.pk) for store in store_objs), batch_size=SEED_BATCH_SIZE)
+    Change.objects.bulk_create(
+        (Change(kind='car', object_id=car_id, store_id=store_id) for car_id, store_id in Car.objects.order_by('id').values_list('id', 'store_id').iterator()),
+        batch_size=SEED_BATCH_SIZE,
+    )
+
+    store = store_objs[0]
+    cars = list(Car.objects.filter(store=store).order_by('id').values_list('id', flat=True)[:BATCH_PURCHASE_CARS])
+    if not cars:
+        cars = [Car.objects.create(make='Bench', model='Car', price=Decimal('100.00'), store=store).pk]
+    ticket = PurchaseTicket.objects.create(car_id=cars[0], store_id=store.pk).pk
+    return {'store': store.pk, 'car': cars[0], 'cars': cars, 'ticket': ticket}
+
+
+def count_rows(response) -> int:
+    """
+    Count the rows a response carries: list entries, page results, cars or export lines.
+    """
+    if response.status_code != 200:
+        return 0
+    if response.streaming:
+        return b''.join(response.streaming_content).count(b'\n')
+    if response.get('Content-Type', '').startswith(JSON):
+        data = json.loads(response.content)
+        if isinstance(data, list):
+            return len(data)
+        for key in ('results', 'cars'):
+            if key in data:
+                return len(data[key])
+        return 1
+    context = getattr(response, 'context', None)
+    if context is not None and 'cars' in context:
+        return len(context['cars'])
+    return 1
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Return the nearest-rank percentile of a list of values.
+    """
+    ordered = sorted(values)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+def run_case(client: Client, case: Case, fixtures: dict, iterations: int, warmup: int) -> dict:
+    """
+    Time a case and count its queries.
+
+    Args:
+        client (Client): The test client sending the requests.
+        case (Case): The case to run.
+        fixtures (dict): The ids returned by seed().
+        iterations (int): The number of measured requests.
+        warmup (int): The number of unmeasured requests sent first, e.g. to fill caches.
+
+    Returns:
+        dict: The status code, p50, p95 and p99 latency in milliseconds, the largest
+            query count of a request and the rows served per second.
+    """
+    path = case.path(fixtures)
+
+    latencies = []
+    queries = 0
+    rows = 0
+    status_code = None
+    for index in range(warmup + iterations):
+        # The body is built for every request, as uploaded files are consumed by it
+        kwargs = {}
+        if case.data is not None:
+            data = case.data(fixtures)
+            kwargs = {'data': json.dumps(data), 'content_type': case.content_type} if case.content_type else {'data': data}
+
+        # Writes run in a transaction that is rolled back, so every run sees the same data
+        with transaction.atomic() if case.writes else nullcontext():
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = getattr(client, case.method)(path, **kwargs)
+                rows_served = count_rows(response)
+                elapsed = time.perf_counter() - started
+            if case.writes:
+                transaction.set_rollback(True)
+
+        if index >= warmup:
+            latencies.append(elapsed)
+            queries = max(queries, len(captured))
+            rows += rows_served
+            status_code = response.status_code
+
+    total = sum(latencies)
+    return {
+        'status': status_code,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'queries': queries,
+        'rows_per_second': round(rows / total, 1) if total else 0.0,
+    }
+
+
+def run(fixtures: dict, iterations: int = 20, warmup: int = 1, cases: Optional[List[Case]] = None) -> Dict[str, dict]:
+    """
+    Run every case against the seeded database.
+
+    Args:
+        fixtures (dict): The ids returned by seed().
+        iterations (int): The number of measured requests per case.
+        warmup (int): The number of unmeasured requests per case.
+        cases (Optional[List[Case]]): The cases to run, all of them by default.
+
+    Returns:
+        Dict[str, dict]: The results of run_case() by case name.
+    """
+    client = Client()
+    return {case.name: run_case(client, case, fixtures, iterations, warmup) for case in (cases or CASES)}
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], latency_tolerance: float) -> List[str]:
+    """
+    List the regressions of a run against a baseline run.
+
+    A case regresses when it runs more queries than in the baseline, or when its p95
+    latency exceeds the baseline by more than the tolerance. Cases missing from the
+    baseline are not compared.
+
+    Args:
+        results (Dict[str, dict]): The results of run().
+        baseline (Dict[str, dict]): The results of the baseline run.
+        latency_tolerance (float): The allowed relative p95 increase, e.g. 0.5 for 50%.
+
+    Returns:
+        List[str]: One message per regression.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if result['queries'] > reference['queries']:
+            regressions.append(f"{name}: {result['queries']} queries, baseline {reference['queries']}")
+        if result['p95_ms'] > reference['p95_ms'] * (1 + latency_tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']} ms, baseline {reference['p95_ms']} ms")
+    return regressions
+
+
+def merge_baseline(results: Dict[str, dict], baseline: Dict[str, dict]) -> Dict[str, dict]:
+    """
+    Merge a run into a baseline run, taking only the results whose query count or status changed.
+
+    Latency differs between runs of the same code, so storing every case on each update
+    would churn the whole baseline. Cases that still run the same queries with the same
+    status keep their baseline entry. New cases and cases whose query count or status
+    changed take the new result, and cases no longer run are dropped.
+
+    Args:
+        results (Dict[str, dict]): The results of run().
+        baseline (Dict[str, dict]): The results of the baseline run.
+
+    Returns:
+        Dict[str, dict]: The new baseline results, in the order of the run.
+    """
+    merged = {}
+    for name, result in results.items():
+        reference = baseline.get(name)
+        unchanged = reference is not None and (reference['queries'], reference['status']) == (result['queries'], result['status'])
+        merged[name] = reference if unchanged else result
+    return merged
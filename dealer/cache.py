@@ -0,0 +1,113 @@
+import hashlib
+import time
+
+from datetime import datetime
+from typing import Any, Callable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Store
+
+
+# seconds a cached response lives, it is never served once its store version moves on
+CACHE_TIMEOUT: int = getattr(settings, 'INVENTORY_CACHE_TIMEOUT', 300)
+
+# seconds one worker may spend rebuilding an entry before others rebuild it themselves
+REBUILD_LOCK_TIMEOUT: int = 10
+
+# seconds between checks while waiting for another worker to rebuild an entry
+REBUILD_POLL_INTERVAL: float = 0.05
+
+
+def inventory_version(store_id: Optional[int] = None) -> str:
+    """
+    Read the inventory version of one store, or a combined version of all stores.
+
+    Args:
+        store_id (Optional[int]): The store, or None for all stores.
+
+    Returns:
+        str: The version, which changes whenever the inventory or budget changes.
+    """
+    return inventory_state(store_id)[0]
+
+
+def inventory_state(store_id: Optional[int] = None) -> Tuple[str, Optional[datetime]]:
+    """
+    Read the inventory version and the time of the latest inventory change with a single query.
+
+    Args:
+        store_id (Optional[int]): The store, or None for all stores.
+
+    Returns:
+        Tuple[str, Optional[datetime]]: The version as returned by inventory_version() and
+            the time the inventory or budget last changed, or None if it never changed.
+    """
+    if store_id is not None:
+        state = Store.objects.filter(pk=store_id).values_list('inventory_version', 'inventory_updated_at').first()
+        version, updated_at = state or (None, None)
+        return str(version), updated_at
+    stores = list(Store.objects.order_by('pk').values_list('pk', 'inventory_version', 'inventory_updated_at'))
+    versions = [(pk, version) for pk, version, _ in stores]
+    updated_at = max((updated_at for _, _, updated_at in stores if updated_at is not None), default=None)
+    return hashlib.md5(repr(versions).encode()).hexdigest(), updated_at
+
+
+def versioned_key(endpoint: str, store_id: Optional[int], version: Any, *parts: Any) -> str:
+    """
+    Build the cache key of a response.
+
+    Bumping the store version moves every reader to new keys, so outdated entries are
+    never served and nothing has to be purged.
+
+    Args:
+        endpoint (str): The name of the cached endpoint.
+        store_id (Optional[int]): The store the response covers, or None for all stores.
+        version (Any): The inventory version the response was built from.
+        *parts (Any): Further request details the response depends on, e.g. the ordering.
+
+    Returns:
+        str: The cache key.
+    """
+    details = hashlib.md5(repr(parts).encode()).hexdigest()
+    return f'dealer:{endpoint}:{store_id or "all"}:{version}:{details}'
+
+
+def get_or_build(key: str, build: Callable[[], Any], timeout: int = CACHE_TIMEOUT) -> Any:
+    """
+    Return a cached value, building and caching it on a miss.
+
+    Only one worker rebuilds a missing entry. The others wait for it to appear and
+    build the value themselves only if the rebuilding worker takes too long.
+
+    Args:
+        key (str): The cache key.
+        build (Callable[[], Any]): Builds the value on a miss.
+        timeout (int): Seconds the built value stays cached.
+
+    Returns:
+        Any: The cached or freshly built value.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, REBUILD_LOCK_TIMEOUT):
+        try:
+            value = build()
+            cache.set(key, value, timeout)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    deadline = time.monotonic() + REBUILD_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(REBUILD_POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+        if cache.get(lock_key) is None:
+            break
+    return build()
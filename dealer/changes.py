@@ -0,0 +1,137 @@
+import base64
+import binascii
+import json
+
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+from django.db import connection
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from .models import Store, Car, Change
+
+
+# default and largest number of log entries read per feed page
+FEED_PAGE_SIZE: int = 500
+MAX_FEED_PAGE_SIZE: int = 5000
+
+# the (txid, id) of the last log entry a client has read
+Position = Tuple[int, int]
+
+
+class InvalidPosition(Exception):
+    """
+    Raised when a change feed cursor cannot be decoded.
+    """
+
+
+class FeedEntry(NamedTuple):
+    """
+    The latest state of an object changed since the requested position.
+
+    Attributes:
+        kind (str): Either 'car' or 'store'.
+        object_id (int): The id of the car or store.
+        store_id (int): The store of the car, or the store itself.
+        instance (Optional[Union[Car, Store]]): The current object, None if it was deleted.
+    """
+    kind: str
+    object_id: int
+    store_id: int
+    instance: Optional[Union[Car, Store]]
+
+
+def encode_position(position: Position) -> str:
+    """
+    Encode a feed position as an opaque URL-safe cursor.
+    """
+    return base64.urlsafe_b64encode(json.dumps(list(position), separators=(',', ':')).encode()).decode()
+
+
+def decode_position(encoded: Optional[str]) -> Optional[Position]:
+    """
+    Decode a cursor issued by encode_position(), None meaning the start of the log.
+
+    Raises:
+        InvalidPosition: If the cursor is malformed.
+    """
+    if not encoded:
+        return None
+    try:
+        txid, pk = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise InvalidPosition('Invalid cursor.') from e
+    if not isinstance(txid, int) or not isinstance(pk, int):
+        raise InvalidPosition('Invalid cursor.')
+    return txid, pk
+
+
+def settled_changes(store_id: Optional[int] = None) -> QuerySet:
+    """
+    Return the log entries that can be served without ever missing one.
+
+    Entry ids are handed out before commit, so a transaction committing late can add
+    entries behind ones already served. On PostgreSQL only entries of transactions
+    older than every transaction still running are served. Their set only grows
+    past the (txid, id) of any entry served. Elsewhere writers are serialized,
+    so ids follow commit order.
+
+    Args:
+        store_id (Optional[int]): Only return the entries of this store.
+
+    Returns:
+        QuerySet: The settled entries.
+    """
+    changes = Change.objects.all()
+    if connection.vendor == 'postgresql':
+        changes = changes.filter(txid__lt=RawSQL('txid_snapshot_xmin(txid_current_snapshot())', []))
+    if store_id is not None:
+        changes = changes.filter(store_id=store_id)
+    return changes
+
+
+def read_changes(since: Optional[Position], limit: int = FEED_PAGE_SIZE, store_id: Optional[int] = None) -> Tuple[List[FeedEntry], Optional[Position], bool]:
+    """
+    Read the objects changed after a feed position.
+
+    Entries of the same object are merged into one carrying its current state. A car
+    that no longer exists, or has moved to another store, is reported as deleted.
+    The cost is one query over the log and one per kind of object, however large the
+    inventory is.
+
+    Args:
+        since (Optional[Position]): The position returned by the previous read, None for the whole log.
+        limit (int): The largest number of log entries read.
+        store_id (Optional[int]): Only read the changes of this store.
+
+    Returns:
+        Tuple[List[FeedEntry], Optional[Position], bool]: The changed objects in log order,
+            the position to read from next and whether more entries are waiting.
+    """
+    changes = settled_changes(store_id)
+    if since is not None:
+        txid, pk = since
+        changes = changes.filter(Q(txid__gte=txid) & (Q(txid__gt=txid) | Q(pk__gt=pk)))
+    rows = list(changes.order_by('txid', 'id').values_list('txid', 'id', 'kind', 'object_id', 'store_id')[:limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        since = rows[-1][0], rows[-1][1]
+
+    # the latest entry of every object, in the order of those entries
+    latest = {}
+    for _, _, kind, object_id, change_store_id in rows:
+        latest.pop((kind, object_id), None)
+        latest[(kind, object_id)] = change_store_id
+
+    instances = {
+        'car': Car.objects.in_bulk([object_id for kind, object_id in latest if kind == 'car']),
+        'store': Store.objects.in_bulk([object_id for kind, object_id in latest if kind == 'store']),
+    }
+    entries = []
+    for (kind, object_id), change_store_id in latest.items():
+        instance = instances[kind].get(object_id)
+        if kind == 'car' and instance is not None and instance.store_id != change_store_id:
+            instance = None
+        entries.append(FeedEntry(kind, object_id, change_store_id, instance))
+    return entries, since, more
@@ -0,0 +1,144 @@
+import csv
+import json
+import zlib
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, Iterator
+
+from .models import Car, Transaction
+
+
+# the exported columns, named as in the API serializers
+EXPORTS: dict = {
+    'cars': (Car, ('id', 'make', 'model', 'price', 'store', 'submission_date')),
+    'transactions': (Transaction, ('id', 'car_make', 'car_model', 'buyer', 'seller', 'transaction_type', 'transaction_amount', 'transaction_date', 'store', 'car')),
+}
+
+EXPORT_FORMATS: dict = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# rows fetched from the server-side cursor per round trip
+CHUNK_SIZE: int = 2000
+
+
+class _Echo:
+    """
+    File-like object whose write() returns the value, so csv.writer can format single lines.
+    """
+    def write(self, value: str) -> str:
+        return value
+
+
+def _format_value(value):
+    """
+    Format a database value the way the API serializers do.
+    """
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+    return value
+
+
+def export_rows(resource: str, chunk_size: int = CHUNK_SIZE) -> Iterator[tuple]:
+    """
+    Iterate over every row of an exported resource without loading the table into memory.
+
+    Rows are read as tuples through a server-side cursor, chunk_size rows at a time.
+
+    Args:
+        resource (str): Either 'cars' or 'transactions'.
+        chunk_size (int): The number of rows fetched per database round trip.
+
+    Returns:
+        Iterator[tuple]: The exported rows, ordered by id.
+    """
+    model, fields = EXPORTS[resource]
+    queryset = model.objects.order_by('id').values_list(*fields)
+    for row in queryset.iterator(chunk_size=chunk_size):
+        yield tuple(_format_value(value) for value in row)
+
+
+def export_chunks(resource: str, file_format: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Encode an exported resource as NDJSON or CSV, one chunk of rows at a time.
+
+    Args:
+        resource (str): Either 'cars' or 'transactions'.
+        file_format (str): Either 'ndjson' or 'csv'.
+        chunk_size (int): The number of rows per database round trip and per yielded chunk.
+
+    Returns:
+        Iterator[bytes]: The UTF-8 encoded export.
+    """
+    fields = EXPORTS[resource][1]
+    if file_format == 'csv':
+        writer = csv.writer(_Echo())
+        encode = writer.writerow
+        yield encode(fields).encode()
+    else:
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+        def encode(row: tuple) -> str:
+            return dumps(dict(zip(fields, row))) + '\n'
+
+    lines = []
+    for row in export_rows(resource, chunk_size):
+        lines.append(encode(row))
+        if len(lines) >= chunk_size:
+            yield ''.join(lines).encode()
+            lines = []
+    if lines:
+        yield ''.join(lines).encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Gzip-compress a stream of chunks on the fly.
+
+    Args:
+        chunks (Iterable[bytes]): The uncompressed chunks.
+
+    Returns:
+        Iterator[bytes]: The gzip stream.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Tell whether an Accept-Encoding header allows a gzip response.
+
+    gzip is allowed when listed, or matched by `*`, with a quality above zero, so
+    `gzip;q=0` refuses it. An entry for gzip takes precedence over `*`.
+
+    Args:
+        accept_encoding (str): The header value, empty when the header is missing.
+
+    Returns:
+        bool: True if the response may be gzip-compressed.
+    """
+    qualities = {}
+    for entry in accept_encoding.split(','):
+        coding, *params = [part.strip() for part in entry.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    quality = qualities.get('gzip', qualities.get('x-gzip', qualities.get('*', 0.0)))
+    return quality > 0
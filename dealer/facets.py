@@ -0,0 +1,104 @@
+from collections import Counter
+from decimal import Decimal
+from typing import Optional
+
+from django.db.models import Count, F, Max, Min, QuerySet, Sum, Value
+from django.db.models.functions import Floor
+
+from .money import cents_enabled, divide_cents, format_cents, money_column, to_cents
+
+
+# default width of the price bands of the histogram
+PRICE_BAND_WIDTH: Decimal = Decimal('5000')
+
+# narrowest price band accepted, bounding the number of groups the query returns
+MIN_PRICE_BAND_WIDTH: Decimal = Decimal('100')
+
+# the precision of the facet prices, matching the Car price field
+CENTS: Decimal = Decimal('0.01')
+
+
+def car_facets(cars: QuerySet, band_width: Decimal = PRICE_BAND_WIDTH) -> dict:
+    """
+    Compute the inventory facets of a set of cars with a single grouped aggregate query.
+
+    The cars are grouped by make, model and price band, each group carrying its count,
+    minimum, maximum and total price. Every facet is then rolled up from these groups
+    in Python, so the table is read once however many facets there are. Prices are
+    aggregated in integer cents where the MONEY_CENTS setting allows.
+
+    Args:
+        cars (QuerySet): The cars to describe, already filtered.
+        band_width (Decimal): The width of the price bands of the histogram.
+
+    Returns:
+        dict: The car count, the minimum, average and maximum price, the counts per make
+            and per make and model, most common first, and the price band histogram.
+            Prices are strings, as in the serialized cars.
+    """
+    cents = cents_enabled()
+    price = money_column('price', cents)
+    groups = cars.values('make', 'model', band=Floor(F('price') / Value(band_width))).annotate(
+        count=Count('id'),
+        min_price=Min(price),
+        max_price=Max(price),
+        total_price=Sum(price),
+    ).order_by()
+    if not cents:
+        # a handful of groups, converted to the cents the rest works in
+        groups = [
+            dict(group, **{key: to_cents(group[key]) for key in ('min_price', 'max_price', 'total_price')})
+            for group in groups
+        ]
+
+    makes = Counter()
+    models = Counter()
+    bands = Counter()
+    count = 0
+    total = 0
+    min_price = max_price = None
+    for group in groups:
+        makes[group['make']] += group['count']
+        models[(group['make'], group['model'])] += group['count']
+        bands[int(group['band'])] += group['count']
+        count += group['count']
+        total += group['total_price']
+        min_price = group['min_price'] if min_price is None else min(min_price, group['min_price'])
+        max_price = group['max_price'] if max_price is None else max(max_price, group['max_price'])
+
+    return {
+        'count': count,
+        'price': {
+            'min': _format_cents(min_price),
+            'avg': _format_cents(divide_cents(total, count)) if count else None,
+            'max': _format_cents(max_price),
+        },
+        'makes': [
+            {'make': make, 'count': make_count}
+            for make, make_count in sorted(makes.items(), key=lambda item: (-item[1], item[0]))
+        ],
+        'models': [
+            {'make': make, 'model': model, 'count': model_count}
+            for (make, model), model_count in sorted(models.items(), key=lambda item: (-item[1], item[0]))
+        ],
+        'price_bands': [
+            {'from': _format_price(band * band_width), 'to': _format_price((band + 1) * band_width), 'count': band_count}
+            for band, band_count in sorted(bands.items())
+        ],
+    }
+
+
+def _format_cents(cents: Optional[int]) -> Optional[str]:
+    """
+    Format a price in cents as the serializers format the Car price field.
+    """
+    return None if cents is None else format_cents(cents)
+
+
+def _format_price(price: Optional[Decimal]) -> Optional[str]:
+    """
+    Format a price as the serializers format the Car price field.
+    """
+    if price is None:
+        return None
+    return '{:f}'.format(price.quantize(CENTS))
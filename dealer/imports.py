@@ -0,0 +1,243 @@
+import csv
+import io
+
+from decimal import Decimal
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Now
+
+from .facets import CENTS
+from .models import Store, Car, Transaction, TransactionSummary, Change
+from .services import BATCH_SIZE
+
+
+# the columns an inventory CSV must have, further columns are ignored
+IMPORT_COLUMNS: Tuple[str, ...] = ('make', 'model', 'price')
+
+# rows validated and loaded per round trip
+IMPORT_BATCH_SIZE: int = 5000
+
+# temporary table the rows of a batch are copied into on PostgreSQL, dropped at commit
+STAGING_TABLE: str = 'dealer_car_import'
+
+INSUFFICIENT_BUDGET: str = 'The store does not have enough money to buy this car.'
+
+
+class InvalidImport(Exception):
+    """
+    Raised when an inventory file is not a CSV file with the import columns.
+    """
+
+
+class Rejection(NamedTuple):
+    """
+    A row left out of an import.
+
+    Attributes:
+        line (int): The line number of the row in the file, the header being line 1.
+        row (dict): The values of the import columns as read from the file.
+        errors (dict): The error messages by column.
+    """
+    line: int
+    row: dict
+    errors: Dict[str, List[str]]
+
+
+class ImportResult(NamedTuple):
+    """
+    The outcome of an inventory import.
+
+    Attributes:
+        accepted (int): The number of cars bought.
+        total (Decimal): The amount debited from the store budget.
+        rejections (List[Rejection]): The rows left out, in file order.
+    """
+    accepted: int
+    total: Decimal
+    rejections: List[Rejection]
+
+
+def read_rows(lines: Iterable[str]) -> Iterator[Tuple[int, dict]]:
+    """
+    Parse an inventory CSV one row at a time.
+
+    Args:
+        lines (Iterable[str]): The lines of the file, e.g. an open text file.
+
+    Returns:
+        Iterator[Tuple[int, dict]]: The line number and the import column values of every row.
+
+    Raises:
+        InvalidImport: If the header lacks an import column.
+    """
+    reader = csv.DictReader(lines)
+    missing = [column for column in IMPORT_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        raise InvalidImport(f'Missing CSV columns: {", ".join(missing)}.')
+    for row in reader:
+        yield reader.line_num, {column: (row[column] or '').strip() for column in IMPORT_COLUMNS}
+
+
+def clean_row(row: dict) -> Tuple[dict, Dict[str, List[str]]]:
+    """
+    Validate the values of a row against the Car fields, as the submission serializer does.
+
+    Returns:
+        Tuple[dict, Dict[str, List[str]]]: The cleaned values and the error messages by column.
+    """
+    values = {}
+    errors = {}
+    for column in IMPORT_COLUMNS:
+        try:
+            values[column] = Car._meta.get_field(column).clean(row[column], None)
+        except ValidationError as e:
+            errors[column] = e.messages
+    if 'price' in values:
+        if values['price'] < 0:
+            errors['price'] = ['Ensure this value is greater than or equal to 0.']
+        # exact, the field allows two decimal places at most
+        values['price'] = values['price'].quantize(CENTS)
+    return values, errors
+
+
+def _batches(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _copy_cars(store: Store, cars: List[tuple]) -> None:
+    """
+    Load cars through COPY into a staging table, then insert them, their bought
+    transactions and their change log entries with a single statement.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(cars)
+    buffer.seek(0)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING_TABLE} '
+            f'(line integer, make varchar(50), model varchar(50), price numeric(10, 2)) ON COMMIT DROP'
+        )
+        cursor.execute(f'TRUNCATE {STAGING_TABLE}')
+        cursor.copy_expert(f'COPY {STAGING_TABLE} (line, make, model, price) FROM STDIN WITH (FORMAT csv)', buffer)
+        cursor.execute(
+            f'WITH new_cars AS ('
+            f'  INSERT INTO {Car._meta.db_table} (make, model, price, store_id, submission_date)'
+            f'  SELECT make, model, price, %s, NOW() FROM {STAGING_TABLE} ORDER BY line'
+            f'  RETURNING id, make, model, price'
+            f'), new_transactions AS ('
+            f'  INSERT INTO {Transaction._meta.db_table}'
+            f'  (car_make, car_model, buyer, seller, transaction_type, transaction_amount, transaction_date, store_id, car_id)'
+            f"  SELECT make, model, %s, 'User', 'bought', price, NOW(), %s, id FROM new_cars"
+            f') '
+            f'INSERT INTO {Change._meta.db_table} (kind, object_id, store_id, deleted, txid, created_at) '
+            f"SELECT 'car', id, %s, false, 0, NOW() FROM new_cars ORDER BY id",
+            [store.pk, store.name, store.pk, store.pk],
+        )
+
+
+def _bulk_create_cars(store: Store, cars: List[tuple]) -> None:
+    """
+    Insert cars and their bought transactions with batched INSERTs.
+    """
+    new_cars = Car.objects.bulk_create(
+        [Car(make=make, model=model, price=price, store=store) for _, make, model, price in cars],
+        batch_size=BATCH_SIZE,
+    )
+    Transaction.objects.bulk_create([
+        Transaction(
+            car_make=car.make,
+            car_model=car.model,
+            buyer=store.name,
+            seller='User',
+            transaction_type='bought',
+            transaction_amount=car.price,
+            store=store,
+            car=car,
+        )
+        for car in new_cars
+    ], batch_size=BATCH_SIZE)
+    Change.record(store.pk, car_ids=[car.pk for car in new_cars], store=False)
+
+
+def import_inventory(store: Store, lines: Iterable[str], batch_size: int = IMPORT_BATCH_SIZE) -> ImportResult:
+    """
+    Buy every valid car of an inventory CSV for a store.
+
+    The file is parsed and validated batch_size rows at a time, so memory use does not
+    grow with it. Valid cars are bought in file order while the store budget lasts.
+    On PostgreSQL every batch is copied into a staging table and inserted along with
+    its bought transactions in one statement, elsewhere through bulk_create. The budget
+    is debited and the transaction summary updated once for the whole import. Every car
+    bought is added to the change log.
+
+    Everything runs in one database transaction holding the store row lock, so the
+    budget cannot change during the import and a failure leaves nothing behind.
+
+    Args:
+        store (Store): The store buying the cars.
+        lines (Iterable[str]): The lines of the CSV file, with make, model and price columns.
+        batch_size (int): The number of rows per batch.
+
+    Returns:
+        ImportResult: The number of cars bought, the amount debited and the rejected rows.
+
+    Raises:
+        InvalidImport: If the header lacks an import column.
+    """
+    load = _copy_cars if connection.vendor == 'postgresql' else _bulk_create_cars
+    rejections = []
+    accepted = 0
+    total = Decimal('0.00')
+
+    with transaction.atomic():
+        remaining = Store.objects.select_for_update().values_list('budget', flat=True).get(pk=store.pk)
+        for batch in _batches(read_rows(lines), batch_size):
+            cars = []
+            for line, row in batch:
+                values, errors = clean_row(row)
+                if not errors and values['price'] > remaining:
+                    errors = {'price': [INSUFFICIENT_BUDGET]}
+                if errors:
+                    rejections.append(Rejection(line, row, errors))
+                    continue
+                remaining -= values['price']
+                cars.append((line, values['make'], values['model'], values['price']))
+            if cars:
+                load(store, cars)
+                accepted += len(cars)
+                total += sum(price for *_, price in cars)
+
+        if accepted:
+            Store.objects.filter(pk=store.pk).update(
+                budget=F('budget') - total,
+                inventory_version=F('inventory_version') + 1,
+                inventory_updated_at=Now(),
+                inventory_count=F('inventory_count') + accepted,
+                inventory_value=F('inventory_value') + total,
+            )
+            TransactionSummary.record(store, 'bought', total, count=accepted)
+            Change.record(store.pk)
+
+    store.budget = remaining
+    return ImportResult(accepted, total, rejections)
+
+
+def write_report(rejections: Iterable[Rejection], output) -> None:
+    """
+    Write rejected rows as CSV: the line number, the import columns and the errors.
+    """
+    writer = csv.writer(output)
+    writer.writerow(('line',) + IMPORT_COLUMNS + ('errors',))
+    for rejection in rejections:
+        errors = '; '.join(f'{column}: {message}' for column, messages in rejection.errors.items() for message in messages)
+        writer.writerow((rejection.line,) + tuple(rejection.row[column] for column in IMPORT_COLUMNS) + (errors,))
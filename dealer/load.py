@@ -0,0 +1,320 @@
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from queue import Empty, SimpleQueue
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from django.db import connections
+from django.db.models import Count, Sum
+from django.test import Client
+
+from .bench import JSON, SEED_BATCH_SIZE, percentile
+from .models import Store, Car, Transaction, TransactionSummary, TransactionRollup
+
+
+# the request kinds a load mixes
+OPERATIONS: Tuple[str, ...] = ('list', 'summary', 'submit', 'buy')
+
+# the default share of each request kind, in percent
+DEFAULT_MIX: Dict[str, int] = {'list': 40, 'summary': 20, 'submit': 20, 'buy': 20}
+
+# the budget every load store starts with, far above what a load can spend
+INITIAL_BUDGET: Decimal = Decimal('1000000.00')
+
+# the price of the cars submitted during a load
+SUBMIT_PRICE: Decimal = Decimal('100.00')
+
+
+class InvalidMix(Exception):
+    """
+    Raised when a request mix names an unknown request kind or has no positive weight.
+    """
+
+
+class Outcome(NamedTuple):
+    """
+    The result of one load request.
+
+    Attributes:
+        operation (str): The request kind, one of OPERATIONS.
+        status (Optional[int]): The response status code, None if the request raised.
+        latency (float): The time the request took, in seconds.
+    """
+    operation: str
+    status: Optional[int]
+    latency: float
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """
+    Parse a request mix such as 'list=40,summary=20,submit=20,buy=20'.
+
+    Kinds left out get no requests. Weights are relative and need not add up to 100.
+
+    Raises:
+        InvalidMix: If a kind is unknown, a weight is not a non-negative integer or all weights are zero.
+    """
+    mix = {}
+    for part in value.split(','):
+        operation, _, weight = part.partition('=')
+        operation = operation.strip()
+        if operation not in OPERATIONS:
+            raise InvalidMix(f'Unknown request kind {operation!r}, expected one of {", ".join(OPERATIONS)}.')
+        if not weight.strip().isdigit():
+            raise InvalidMix(f'Invalid weight for {operation!r}.')
+        mix[operation] = int(weight)
+    if not any(mix.values()):
+        raise InvalidMix('The mix has no requests.')
+    return mix
+
+
+def seed_stores(stores: int, cars_per_store: int) -> List[int]:
+    """
+    Create stores with INITIAL_BUDGET and cars_per_store cars each, for a load to run against.
+
+    Returns:
+        List[int]: The ids of the new stores.
+    """
+    store_ids = [store.pk for store in Store.objects.bulk_create(
+        Store(name=f'Load Store {i}', budget=INITIAL_BUDGET) for i in range(stores)
+    )]
+    cars = [
+        Car(make=f'Make{i % 50}', model=f'Model{i % 500}', price=Decimal(100 + i % 900), store_id=store_id)
+        for store_id in store_ids for i in range(cars_per_store)
+    ]
+    Car.objects.bulk_create(cars, batch_size=SEED_BATCH_SIZE)
+    Store.objects.filter(pk__in=store_ids).update(**Store.counted_inventory())
+    return store_ids
+
+
+class ClientTransport:
+    """
+    Sends requests through the Django test client, in-process and without HTTP.
+
+    Every thread gets its own client and closes its database connections after each
+    request, as a WSGI worker does.
+    """
+    def __init__(self) -> None:
+        self.local = threading.local()
+
+    def send(self, method: str, path: str, body: Optional[object] = None) -> int:
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = Client()
+        try:
+            if body is None:
+                return getattr(client, method)(path).status_code
+            return getattr(client, method)(path, data=json.dumps(body), content_type=JSON).status_code
+        finally:
+            connections.close_all()
+
+
+class HTTPTransport:
+    """
+    Sends requests over HTTP to a running server, e.g. a live test server.
+    """
+    def __init__(self, base_url: str) -> None:
+        self.base_url = base_url.rstrip('/')
+
+    def send(self, method: str, path: str, body: Optional[object] = None) -> int:
+        data = None if body is None else json.dumps(body).encode()
+        request = urllib.request.Request(self.base_url + path, data=data, method=method.upper())
+        if data is not None:
+            request.add_header('Content-Type', JSON)
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+class Load:
+    """
+    A mix of list, summary, submit and buy requests spread over a set of stores.
+
+    The request sequence is drawn up front from the mix and a seed, so runs with the
+    same arguments send the same requests. Every buy takes a different car, so buys
+    only fail on contention, never because another buyer got the car first.
+
+    Attributes:
+        store_ids (List[int]): The stores the requests go to.
+        operations (List[Tuple[str, int]]): The request kind and store of every request, in order.
+    """
+    def __init__(self, store_ids: List[int], mix: Dict[str, int], requests: int, seed: int = 0) -> None:
+        self.store_ids = store_ids
+        generator = random.Random(seed)
+        kinds = [operation for operation in OPERATIONS if mix.get(operation)]
+        weights = [mix[operation] for operation in kinds]
+        self.operations = [(generator.choices(kinds, weights)[0], generator.choice(store_ids)) for _ in range(requests)]
+
+        # one car per buy, from the store the buy goes to
+        self.cars = {store_id: SimpleQueue() for store_id in store_ids}
+        needed = defaultdict(int)
+        for operation, store_id in self.operations:
+            if operation == 'buy':
+                needed[store_id] += 1
+        for store_id, count in needed.items():
+            for car_id in Car.objects.filter(store_id=store_id).order_by('id').values_list('id', flat=True)[:count]:
+                self.cars[store_id].put(car_id)
+
+    def request(self, operation: str, store_id: int) -> Tuple[str, str, Optional[object]]:
+        """
+        Return the method, path and JSON body of a request of a kind to a store.
+        """
+        if operation == 'list':
+            return 'get', f'/api/stores/{store_id}/cars/', None
+        if operation == 'summary':
+            return 'get', f'/api/transactions/summary/?store={store_id}', None
+        if operation == 'submit':
+            return 'post', f'/api/stores/{store_id}/cars/submit/', {'make': 'Load', 'model': 'Car', 'price': str(SUBMIT_PRICE)}
+        try:
+            car_id = self.cars[store_id].get_nowait()
+        except Empty:
+            # the store ran out of cars, which only happens when it was seeded with too few
+            car_id = 0
+        return 'post', f'/api/stores/{store_id}/cars/{car_id}/buy/', None
+
+    def run(self, send: Callable[..., int], threads: int) -> List[Outcome]:
+        """
+        Send every request, threads at a time.
+
+        Args:
+            send (Callable[..., int]): Sends a request given its method, path and body and returns the status code.
+            threads (int): The number of requests in flight at once.
+
+        Returns:
+            List[Outcome]: The outcome of every request, in completion order.
+        """
+        def perform(operation: Tuple[str, int]) -> Outcome:
+            kind, store_id = operation
+            method, path, body = self.request(kind, store_id)
+            started = time.perf_counter()
+            try:
+                status = send(method, path, body)
+            except Exception:
+                status = None
+            return Outcome(kind, status, time.perf_counter() - started)
+
+        with ThreadPoolExecutor(threads) as executor:
+            return list(executor.map(perform, self.operations))
+
+
+def report(outcomes: List[Outcome], elapsed: float) -> Dict[str, dict]:
+    """
+    Summarize the outcomes of a load per request kind and overall.
+
+    Requests answered with a 4xx status count as rejected, those answered with a 5xx
+    status or raising as errors.
+
+    Args:
+        outcomes (List[Outcome]): The outcomes returned by Load.run().
+        elapsed (float): The wall time of the run, in seconds.
+
+    Returns:
+        Dict[str, dict]: By request kind and 'all': the request count, the successful
+            requests per second, the rejected and error counts, the error rate and the
+            p50, p95 and p99 latency in milliseconds.
+    """
+    groups = defaultdict(list)
+    for outcome in outcomes:
+        groups[outcome.operation].append(outcome)
+    groups['all'] = outcomes
+
+    results = {}
+    for name, group in groups.items():
+        if not group:
+            continue
+        ok = sum(1 for outcome in group if outcome.status is not None and outcome.status < 400)
+        rejected = sum(1 for outcome in group if outcome.status is not None and 400 <= outcome.status < 500)
+        errors = len(group) - ok - rejected
+        latencies = [outcome.latency for outcome in group]
+        results[name] = {
+            'requests': len(group),
+            'per_second': round(ok / elapsed, 1) if elapsed else 0.0,
+            'rejected': rejected,
+            'errors': errors,
+            'error_rate': round(errors / len(group), 4),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        }
+    return results
+
+
+def reconcile(store_ids: List[int], outcomes: Optional[List[Outcome]] = None) -> List[str]:
+    """
+    Check that the stores of a load are consistent with their transactions.
+
+    Every store must hold INITIAL_BUDGET less what it bought plus what it sold, its
+    inventory count and value must match its cars, and its transaction summary and
+    daily rollups must match its transactions. Given the outcomes, the transactions
+    must also account for the submits and buys: every acknowledged one and none of
+    the rejected ones. A request answered with a 5xx status or raising may have failed
+    after its transaction committed, so it may or may not have left a transaction.
+
+    Args:
+        store_ids (List[int]): The stores seeded for the load, without transactions of their own before it.
+        outcomes (Optional[List[Outcome]]): The outcomes returned by Load.run().
+
+    Returns:
+        List[str]: A description of every discrepancy, empty when everything reconciles.
+    """
+    totals = {
+        (row['store'], row['transaction_type']): (row['count'], row['amount'])
+        for row in Transaction.objects.filter(store__in=store_ids).order_by().values('store', 'transaction_type').annotate(
+            count=Count('id'), amount=Sum('transaction_amount'),
+        )
+    }
+    summaries = {summary.store_id: summary for summary in TransactionSummary.objects.filter(store__in=store_ids)}
+    rollups = {
+        (row['store'], row['transaction_type']): (row['count'], row['amount'])
+        for row in TransactionRollup.objects.filter(store__in=store_ids).order_by().values('store', 'transaction_type').annotate(
+            count=Sum('count'), amount=Sum('amount'),
+        )
+    }
+    inventories = {
+        row['store']: (row['count'], row['value'])
+        for row in Car.objects.filter(store__in=store_ids).order_by().values('store').annotate(count=Count('id'), value=Sum('price'))
+    }
+
+    problems = []
+    for store in Store.objects.filter(pk__in=store_ids).order_by('pk'):
+        bought_count, bought = totals.get((store.pk, 'bought'), (0, Decimal('0')))
+        sold_count, sold = totals.get((store.pk, 'sold'), (0, Decimal('0')))
+        expected = INITIAL_BUDGET - bought + sold
+        if store.budget != expected:
+            problems.append(f'{store}: budget {store.budget}, expected {expected} from its transactions.')
+
+        count, value = inventories.get(store.pk, (0, Decimal('0')))
+        if (store.inventory_count, store.inventory_value) != (count, value):
+            problems.append(f'{store}: inventory {store.inventory_count} cars worth {store.inventory_value}, counted {count} worth {value}.')
+
+        summary = summaries.get(store.pk)
+        for transaction_type, count, amount in (('bought', bought_count, bought), ('sold', sold_count, sold)):
+            recorded = (getattr(summary, f'{transaction_type}_count', 0), getattr(summary, f'{transaction_type}_amount', Decimal('0')))
+            if recorded != (count, amount):
+                problems.append(f'{store}: summary of {transaction_type} transactions {recorded}, counted {(count, amount)}.')
+            rolled_up = rollups.get((store.pk, transaction_type), (0, Decimal('0')))
+            if rolled_up != (count, amount):
+                problems.append(f'{store}: rollups of {transaction_type} transactions {rolled_up}, counted {(count, amount)}.')
+
+    if outcomes is not None:
+        for operation, transaction_type in (('submit', 'bought'), ('buy', 'sold')):
+            statuses = [outcome.status for outcome in outcomes if outcome.operation == operation]
+            acknowledged = sum(1 for status in statuses if status is not None and status < 400)
+            unknown = sum(1 for status in statuses if status is None or status >= 500)
+            recorded = sum(count for (_, kind), (count, _) in totals.items() if kind == transaction_type)
+            if not acknowledged <= recorded <= acknowledged + unknown:
+                problems.append(
+                    f'{acknowledged} {operation} requests succeeded and {unknown} errored '
+                    f'but {recorded} {transaction_type} transactions were recorded.'
+                )
+    return problems
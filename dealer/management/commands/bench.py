@@ -0,0 +1,101 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from dealer import bench
+
+
+# the stored baseline the regression gates compare against
+BASELINE_PATH: str = os.path.join(os.path.dirname(bench.__file__), 'bench_baseline.json')
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark every URL of dealer.urls and dealer.api.urls against a seeded test database. '
+        'Reports p50/p95/p99 latency, query count and rows per second per endpoint and fails '
+        'when an endpoint runs more queries or is slower than the stored baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stores', type=int, default=10)
+        parser.add_argument('--cars', type=int, default=10000)
+        parser.add_argument('--transactions', type=int, default=10000)
+        parser.add_argument('--iterations', type=int, default=20, help='Measured requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=1, help='Unmeasured requests per endpoint, sent first.')
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--baseline', default=BASELINE_PATH, help='The baseline results to compare against.')
+        parser.add_argument(
+            '--latency-tolerance', type=float, default=0.5,
+            help='Allowed relative p95 increase over the baseline, e.g. 0.5 for 50%%.',
+        )
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='Store the results of the cases whose query count or status changed in the baseline.',
+        )
+        parser.add_argument(
+            '--reset-baseline', action='store_true',
+            help='With --update-baseline, store the results of every case, e.g. after moving to other hardware.',
+        )
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database between runs.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            # A private cache, so benchmark entries never reach a shared cache
+            with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'dealer-bench'}}):
+                fixtures = bench.seed(options['stores'], options['cars'], options['transactions'])
+                results = bench.run(fixtures, options['iterations'], options['warmup'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        self.stdout.write(f'{"endpoint":<28} {"status":>6} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"queries":>7} {"rows/s":>11}')
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<28} {result["status"]:>6} {result["p50_ms"]:>9.2f} {result["p95_ms"]:>9.2f} '
+                f'{result["p99_ms"]:>9.2f} {result["queries"]:>7} {result["rows_per_second"]:>11,.0f}'
+            )
+
+        report = {
+            'dataset': {key: options[key] for key in ('stores', 'cars', 'transactions')},
+            'database': settings.DATABASES['default']['ENGINE'],
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+        if options['update_baseline']:
+            self.update_baseline(options['baseline'], report, options['reset_baseline'])
+            return
+
+        if not os.path.exists(options['baseline']):
+            self.stdout.write(self.style.WARNING('No baseline to compare against.'))
+            return
+        with open(options['baseline']) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        regressions = bench.compare(results, baseline, options['latency_tolerance'])
+        if regressions:
+            raise CommandError('Regressions against the baseline:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def update_baseline(self, path: str, report: dict, reset: bool) -> None:
+        """
+        Store a run in the baseline, merged into the stored one unless reset or measured on other data.
+        """
+        stored = None
+        if not reset and os.path.exists(path):
+            with open(path) as baseline_file:
+                stored = json.load(baseline_file)
+        if stored and (stored['dataset'], stored['database']) == (report['dataset'], report['database']):
+            results = bench.merge_baseline(report['results'], stored['results'])
+            changed = [name for name, result in results.items() if result is report['results'][name]]
+            report = {**report, 'results': results}
+            self.stdout.write(f'Updated {len(changed)} cases: {", ".join(changed) or "none"}.')
+        with open(path, 'w') as output:
+            json.dump(report, output, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Stored the baseline in {path}.'))
@@ -0,0 +1,121 @@
+import asyncio
+import io
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from car_dealer.asgi import application as asgi_application
+from car_dealer.wsgi import application as wsgi_application
+
+
+# read endpoints benchmarked by default, each served sync under WSGI and async under ASGI
+PATHS: tuple = (
+    ('/api/stores/', '/api/async/stores/'),
+    ('/api/cars/', '/api/async/cars/'),
+    ('/api/transactions/', '/api/async/transactions/'),
+    ('/api/transactions/summary/', '/api/async/transactions/summary/'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the throughput of concurrent read requests served by the sync views through '
+        'car_dealer.wsgi and by the async views through car_dealer.asgi. Both applications are '
+        'driven in-process, so the numbers exclude the HTTP server.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint and application.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight at once.')
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='WSGI workers, each serving one request at a time like a gunicorn sync worker.',
+        )
+
+    def handle(self, *args, **options):
+        self.host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'
+        count, concurrency = options['requests'], options['concurrency']
+
+        self.stdout.write(f'{"endpoint":<30} {"wsgi req/s":>11} {"asgi req/s":>11}')
+        for sync_path, async_path in PATHS:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(options['workers']) as executor:
+                statuses = list(executor.map(self.wsgi_request, [sync_path] * count))
+            wsgi_time = time.perf_counter() - started
+            self.check_statuses(sync_path, statuses)
+
+            started = time.perf_counter()
+            statuses = asyncio.run(self.asgi_requests(async_path, count, concurrency))
+            asgi_time = time.perf_counter() - started
+            self.check_statuses(async_path, statuses)
+
+            self.stdout.write(f'{sync_path:<30} {count / wsgi_time:>11,.0f} {count / asgi_time:>11,.0f}')
+
+    def check_statuses(self, path: str, statuses: list) -> None:
+        failed = [code for code in statuses if code != 200]
+        if failed:
+            self.stderr.write(self.style.ERROR(f'{path}: {len(failed)} requests failed with status {failed[0]}.'))
+
+    def wsgi_request(self, path: str) -> int:
+        """
+        Serve one GET request through the WSGI application and return its status code.
+        """
+        environ = {'PATH_INFO': path, 'HTTP_HOST': self.host, 'wsgi.input': io.BytesIO()}
+        setup_testing_defaults(environ)
+        statuses = []
+
+        def start_response(status: str, headers: list, exc_info=None):
+            statuses.append(int(status.split()[0]))
+
+        body = wsgi_application(environ, start_response)
+        try:
+            for _ in body:
+                pass
+        finally:
+            body.close()
+        return statuses[0]
+
+    async def asgi_requests(self, path: str, count: int, concurrency: int) -> list:
+        """
+        Serve count GET requests through the ASGI application, concurrency at a time.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def limited() -> int:
+            async with semaphore:
+                return await self.asgi_request(path)
+        return await asyncio.gather(*(limited() for _ in range(count)))
+
+    async def asgi_request(self, path: str) -> int:
+        """
+        Serve one GET request through the ASGI application and return its status code.
+        """
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'root_path': '',
+            'query_string': b'',
+            'headers': [(b'host', self.host.encode())],
+            'client': ('127.0.0.1', 0),
+            'server': (self.host, 80),
+        }
+        statuses = []
+
+        async def receive() -> dict:
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message: dict) -> None:
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+
+        await asgi_application(scope, receive, send)
+        return statuses[0]
@@ -0,0 +1,127 @@
+import json
+import time
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+
+from dealer.api.pagination import KeysetPagination
+from dealer.models import Store, Car, Transaction, TransactionSummary
+from dealer.money import CENTS_VENDORS, cents_enabled
+
+
+# rows per INSERT while generating the benchmark data
+INSERT_BATCH_SIZE: int = 5000
+
+# timed runs of every measurement, the best one is reported
+RUNS: int = 3
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare rows per second of the transaction summary, the inventory facets and the car and '
+        'transaction lists with money read from the decimal columns and from the integer cents '
+        'columns, i.e. with the MONEY_CENTS setting off and on, on generated data. The data is '
+        'written in a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000], help='Row counts to benchmark.')
+
+    def handle(self, *args, **options):
+        with override_settings(MONEY_CENTS=True):
+            if not cents_enabled():
+                raise CommandError(f'The cents columns are only maintained on {", ".join(CENTS_VENDORS)}.')
+
+        # responses are built on every request rather than served from the cache
+        self.client = Client()
+        test_settings = override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+        )
+
+        self.stdout.write(f'{"rows":>10} {"path":>18} {"decimal rows/s":>15} {"cents rows/s":>13} {"speedup":>8}')
+        with test_settings:
+            for count in options['rows']:
+                with transaction.atomic():
+                    self.generate(count)
+                    paths = {
+                        'summary': lambda: (TransactionSummary.rebuild(), TransactionSummary.summarize()[0]),
+                        'facets': lambda: self.get('/api/cars/facets/'),
+                        'car list': lambda: self.get_pages('/api/cars/'),
+                        'transaction list': lambda: self.get_pages('/api/transactions/'),
+                    }
+                    for name, run in paths.items():
+                        with override_settings(MONEY_CENTS=False):
+                            decimal_time, decimal_output = self.measure(run)
+                        with override_settings(MONEY_CENTS=True):
+                            cents_time, cents_output = self.measure(run)
+                        self.report(count, name, decimal_time, cents_time)
+                        if decimal_output != cents_output:
+                            self.stderr.write(self.style.ERROR(f'The {name} output differs at {count} rows.'))
+                    transaction.set_rollback(True)
+
+    def get(self, path: str) -> bytes:
+        response = self.client.get(path)
+        if response.status_code != 200:
+            raise CommandError(f'{path} answered {response.status_code}.')
+        return response.content
+
+    def get_pages(self, path: str) -> list:
+        """
+        Fetch every page of a list, in the largest pages allowed.
+        """
+        pages = []
+        url = f'{path}?page_size={KeysetPagination.max_page_size}'
+        while url:
+            pages.append(self.get(url))
+            url = json.loads(pages[-1])['next']
+        return pages
+
+    @staticmethod
+    def measure(run) -> tuple:
+        """
+        Return the best time of RUNS runs and the result of the last one.
+        """
+        best = None
+        for _ in range(RUNS):
+            started = time.perf_counter()
+            result = run()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def report(self, count: int, path: str, decimal_time: float, cents_time: float) -> None:
+        self.stdout.write(
+            f'{count:>10} {path:>18} {count / decimal_time:>15,.0f} {count / cents_time:>13,.0f} '
+            f'{decimal_time / cents_time:>7.1f}x'
+        )
+
+    def generate(self, count: int) -> None:
+        """
+        Insert count cars and count transactions over a few stores.
+        """
+        stores = Store.objects.bulk_create(Store(name=f'Benchmark Store {i}', budget=0) for i in range(10))
+        for start in range(0, count, INSERT_BATCH_SIZE):
+            batch = range(start, min(start + INSERT_BATCH_SIZE, count))
+            Car.objects.bulk_create(
+                Car(make=f'Make{i % 50}', model=f'Model{i % 500}', price=Decimal(i % 100000) / 4, store=stores[i % len(stores)])
+                for i in batch
+            )
+            Transaction.objects.bulk_create(
+                Transaction(
+                    car_make=f'Make{i % 50}',
+                    car_model=f'Model{i % 500}',
+                    buyer=stores[i % len(stores)].name,
+                    seller='User',
+                    transaction_type='bought' if i % 2 == 0 else 'sold',
+                    transaction_amount=Decimal(i % 100000) / 4,
+                    store=stores[i % len(stores)],
+                    car_id=i + 1,
+                )
+                for i in batch
+            )
@@ -0,0 +1,70 @@
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from dealer import bench, services
+from dealer.models import Store, Car
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare committed sales per second of synchronous purchases, one transaction each, '
+        'with queued purchases applied in batches by the purchase worker. Runs against a '
+        'seeded test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sales', type=int, default=2000, help='Cars sold by each path.')
+        parser.add_argument('--stores', type=int, default=1, help='Stores the cars are spread over.')
+        parser.add_argument('--workers', type=int, default=1, help='Concurrent synchronous buyers.')
+        parser.add_argument('--batch-size', type=int, default=services.PURCHASE_BATCH_SIZE, help='Tickets applied per transaction.')
+
+    def handle(self, *args, **options):
+        sales = options['sales']
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            bench.seed(options['stores'], sales * 2, 0)
+            # sales credit the budget, so start from zero to stay within the budget field
+            Store.objects.update(budget=0)
+            car_ids = list(Car.objects.order_by('id').values_list('id', flat=True)[:sales * 2])
+            sync_ids, queued_ids = car_ids[:sales], car_ids[sales:]
+
+            # one share of the cars per buyer, so every buyer keeps one connection as the worker does
+            workers = options['workers']
+            started = time.perf_counter()
+            with ThreadPoolExecutor(workers) as executor:
+                list(executor.map(self.purchase, [sync_ids[i::workers] for i in range(workers)]))
+            sync_time = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for car_id in queued_ids:
+                services.enqueue_purchase(car_id)
+            enqueue_time = time.perf_counter() - started
+
+            started = time.perf_counter()
+            while services.process_purchase_queue(options['batch_size']):
+                pass
+            drain_time = time.perf_counter() - started
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f'synchronous purchases:   {sales / sync_time:>9,.0f} sales/s')
+        self.stdout.write(f'queue drained by worker: {sales / drain_time:>9,.0f} sales/s')
+        self.stdout.write(f'enqueue requests:        {sales / enqueue_time:>9,.0f} tickets/s')
+
+    def purchase(self, car_ids: list) -> None:
+        """
+        Buy cars one transaction each, on the connection of the calling thread.
+        """
+        try:
+            for car_id in car_ids:
+                services.purchase_car(car_id)
+        finally:
+            # each worker thread has its own connection, closed once its cars are sold
+            connections.close_all()
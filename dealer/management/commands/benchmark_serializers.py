@@ -0,0 +1,88 @@
+import time
+
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rest_framework.renderers import JSONRenderer
+
+from dealer.api.encoders import RowEncoder
+from dealer.api.serializers import CarSerializer, TransactionSerializer
+from dealer.models import Car, Store, Transaction
+from dealer.money import cents_enabled
+
+
+SERIALIZERS: dict = {
+    'cars': CarSerializer,
+    'transactions': TransactionSerializer,
+}
+
+# rows per INSERT while generating the benchmark data
+INSERT_BATCH_SIZE: int = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare rows per second of the serializer and the values_list() encoder on generated data. '
+        'The data is written in a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('resource', choices=sorted(SERIALIZERS))
+        parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000], help='Row counts to benchmark.')
+
+    def handle(self, *args, **options):
+        serializer_class = SERIALIZERS[options['resource']]
+        encoder = RowEncoder(serializer_class, cents=cents_enabled())
+        renderer = JSONRenderer()
+
+        self.stdout.write(f'{"rows":>10} {"serializer rows/s":>18} {"encoder rows/s":>15} {"speedup":>8}')
+        for count in options['rows']:
+            with transaction.atomic():
+                queryset = self.generate(serializer_class.Meta.model, count)
+
+                started = time.perf_counter()
+                expected = renderer.render(serializer_class(queryset.all(), many=True).data)
+                serializer_time = time.perf_counter() - started
+
+                started = time.perf_counter()
+                encoded = encoder.encode(queryset.values_list(*encoder.columns)).encode()
+                encoder_time = time.perf_counter() - started
+
+                transaction.set_rollback(True)
+
+            if encoded != expected:
+                self.stderr.write(self.style.ERROR(f'Output differs at {count} rows.'))
+            self.stdout.write(
+                f'{count:>10} {count / serializer_time:>18,.0f} {count / encoder_time:>15,.0f} '
+                f'{serializer_time / encoder_time:>7.1f}x'
+            )
+
+    def generate(self, model, count: int):
+        """
+        Insert count rows of the benchmarked model and return a queryset over exactly those rows.
+        """
+        store = Store.objects.create(name='Benchmark Store', budget=0)
+        for start in range(0, count, INSERT_BATCH_SIZE):
+            size = min(INSERT_BATCH_SIZE, count - start)
+            if model is Car:
+                Car.objects.bulk_create(
+                    Car(make=f'Make{i % 50}', model=f'Model{i % 500}', price=Decimal(i % 100000) / 4, store=store)
+                    for i in range(start, start + size)
+                )
+            else:
+                Transaction.objects.bulk_create(
+                    Transaction(
+                        car_make=f'Make{i % 50}',
+                        car_model=f'Model{i % 500}',
+                        buyer=store.name,
+                        seller='User',
+                        transaction_type='bought',
+                        transaction_amount=Decimal(i % 100000) / 4,
+                        store=store,
+                        car_id=i + 1,
+                    )
+                    for i in range(start, start + size)
+                )
+        return model.objects.filter(store=store).order_by('id')
@@ -0,0 +1,44 @@
+import io
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dealer.imports import IMPORT_BATCH_SIZE, InvalidImport, import_inventory, write_report
+from dealer.models import Store
+from dealer.stores import get_store
+
+
+class Command(BaseCommand):
+    help = (
+        'Buy the cars of an inventory CSV file with make, model and price columns for a store. '
+        'Rows are validated and loaded in batches, and rejected rows can be written to a report.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="Inventory CSV file, or '-' for stdin.")
+        parser.add_argument('--store', type=int, help='The id of the store buying the cars, the first store by default.')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='Rows validated and loaded per batch.')
+        parser.add_argument('--report', help="File the rejected rows are written to as CSV, or '-' for stdout.")
+
+    def handle(self, *args, **options):
+        try:
+            store = get_store(options['store'])
+        except Store.DoesNotExist:
+            raise CommandError('Store not found.')
+
+        try:
+            if options['input'] == '-':
+                result = import_inventory(store, io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline=''), options['batch_size'])
+            else:
+                with open(options['input'], encoding='utf-8-sig', newline='') as input_file:
+                    result = import_inventory(store, input_file, options['batch_size'])
+        except (InvalidImport, OSError, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+
+        if options['report'] == '-':
+            write_report(result.rejections, self.stdout)
+        elif options['report']:
+            with open(options['report'], 'w', newline='') as report_file:
+                write_report(result.rejections, report_file)
+
+        self.stderr.write(f'Bought {result.accepted} cars for {result.total} for {store.name}, rejected {len(result.rejections)} rows.')
@@ -0,0 +1,127 @@
+import json
+import logging
+import time
+
+from contextlib import contextmanager
+from typing import Iterator
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.testcases import LiveServerThread, _StaticFilesHandler
+from django.test.utils import modify_settings, override_settings, setup_test_environment, teardown_test_environment
+
+from dealer import load, services
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive a concurrent mix of list, summary, submit and buy requests against a seeded '
+        'test database, once per store count, and report throughput, latency percentiles and '
+        'error rates per request kind. Fewer stores concentrate the writes on fewer budget '
+        'rows. Afterwards budgets, inventories and transaction totals must still reconcile.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stores', type=int, nargs='+', default=[1, 4, 16],
+            help='Store counts to run the load against, one scenario each.',
+        )
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per scenario.')
+        parser.add_argument('--threads', type=int, default=8, help='Requests in flight at once.')
+        parser.add_argument(
+            '--mix', default=','.join(f'{kind}={weight}' for kind, weight in load.DEFAULT_MIX.items()),
+            help='Relative share of each request kind, e.g. list=40,summary=20,submit=20,buy=20.',
+        )
+        parser.add_argument('--cars-per-store', type=int, help='Cars seeded per store, by default enough for every request to be a buy.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the request sequence.')
+        parser.add_argument('--server', action='store_true', help='Send the requests over HTTP to a live test server instead of in-process.')
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+
+    def handle(self, *args, **options):
+        try:
+            mix = load.parse_mix(options['mix'])
+        except load.InvalidMix as e:
+            raise CommandError(str(e))
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        scenarios = {}
+        problems = []
+        try:
+            # A private cache, so load test entries never reach a shared cache
+            with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'dealer-load'}}):
+                with self.transport(options['server']) as transport:
+                    for stores in options['stores']:
+                        store_ids = load.seed_stores(stores, options['cars_per_store'] or options['requests'])
+                        run = load.Load(store_ids, mix, options['requests'], options['seed'])
+
+                        # failed requests are counted, logging each one would flood the output
+                        if options['verbosity'] < 2:
+                            logging.disable(logging.ERROR)
+                        try:
+                            started = time.perf_counter()
+                            outcomes = run.run(transport.send, options['threads'])
+                            elapsed = time.perf_counter() - started
+                        finally:
+                            logging.disable(logging.NOTSET)
+
+                        # queued purchases are acknowledged before they are applied
+                        if settings.QUEUED_PURCHASES:
+                            while services.process_purchase_queue():
+                                pass
+
+                        scenarios[stores] = load.report(outcomes, elapsed)
+                        problems += [f'{stores} stores: {problem}' for problem in load.reconcile(store_ids, outcomes)]
+                        self.write_scenario(stores, scenarios[stores])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({
+                    'database': settings.DATABASES['default']['ENGINE'],
+                    'requests': options['requests'],
+                    'threads': options['threads'],
+                    'mix': mix,
+                    'transport': 'http' if options['server'] else 'client',
+                    'scenarios': scenarios,
+                }, output, indent=2)
+
+        if problems:
+            raise CommandError('The stores do not reconcile:\n' + '\n'.join(problems))
+        self.stdout.write(self.style.SUCCESS('Budgets, inventories and transaction totals reconcile.'))
+
+    def write_scenario(self, stores: int, results: dict) -> None:
+        self.stdout.write(f'\n{stores} store{"s" if stores != 1 else ""}')
+        self.stdout.write(
+            f'{"requests":<10} {"count":>7} {"ok/s":>9} {"4xx":>6} {"errors":>6} {"error %":>8} '
+            f'{"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9}'
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<10} {result["requests"]:>7} {result["per_second"]:>9,.1f} {result["rejected"]:>6} '
+                f'{result["errors"]:>6} {result["error_rate"] * 100:>7.2f}% {result["p50_ms"]:>9.2f} '
+                f'{result["p95_ms"]:>9.2f} {result["p99_ms"]:>9.2f}'
+            )
+
+    @contextmanager
+    def transport(self, server: bool) -> Iterator:
+        """
+        Yield the transport sending the requests, serving a live test server while it is used.
+        """
+        if not server:
+            yield load.ClientTransport()
+            return
+        thread = LiveServerThread('localhost', _StaticFilesHandler, port=0)
+        thread.daemon = True
+        with modify_settings(ALLOWED_HOSTS={'append': 'localhost'}):
+            thread.start()
+            thread.is_ready.wait()
+            if thread.error:
+                raise thread.error
+            try:
+                yield load.HTTPTransport(f'http://localhost:{thread.port}')
+            finally:
+                thread.terminate()
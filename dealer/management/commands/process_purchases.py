@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dealer.services import PURCHASE_BATCH_SIZE, process_purchase_queue
+
+
+class Command(BaseCommand):
+    help = (
+        'Apply the queued purchase tickets, many per database transaction. Runs until stopped, '
+        'polling the queue when it is empty, or until the queue is drained with --once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PURCHASE_BATCH_SIZE, help='Tickets applied per transaction.')
+        parser.add_argument('--interval', type=float, default=0.1, help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty.')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = process_purchase_queue(options['batch_size'])
+            total += processed
+            if processed:
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Processed {processed} tickets.')
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(f'Processed {total} tickets.')
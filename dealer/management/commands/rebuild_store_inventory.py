@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from dealer.models import Store
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the inventory count and value of every store from the car table. '
+        'Run it while no cars are being submitted or bought.'
+    )
+
+    def handle(self, *args, **options):
+        count = Store.rebuild_inventory()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the inventory counters of {count} stores.'))
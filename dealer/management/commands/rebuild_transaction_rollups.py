@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from dealer.models import TransactionRollup
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the daily transaction rollups from the transaction table. '
+        'Run it while no cars are being submitted or bought.'
+    )
+
+    def handle(self, *args, **options):
+        count = TransactionRollup.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} transaction rollup rows.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from dealer.models import TransactionSummary
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the transaction summary rows from the transaction table. '
+        'Run it while no cars are being submitted or bought.'
+    )
+
+    def handle(self, *args, **options):
+        count = TransactionSummary.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} transaction summary rows.'))
@@ -0,0 +1,185 @@
+import json
+import logging
+import math
+import time
+
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from django.template.backends.django import Template
+
+from .routers import pick_replica, reading_from, replica_aliases
+
+
+logger = logging.getLogger('dealer.instrumentation')
+
+# cookie of clients that wrote lately, holding the time their reads may go back to the replicas
+STICKY_COOKIE: str = 'dealer_primary_until'
+
+# requests routed to the replicas, as they never write
+SAFE_METHODS: tuple = ('GET', 'HEAD', 'OPTIONS')
+
+# the statistics of the request being served in the current thread or task
+_current: ContextVar[Optional['RequestStats']] = ContextVar('dealer_request_stats', default=None)
+
+
+class RequestStats:
+    """
+    SQL and timing statistics collected while serving one request.
+
+    Attributes:
+        queries (Counter): The number of executions of every distinct SQL statement.
+        db_time (float): Seconds spent executing SQL.
+        render_time (float): Seconds spent rendering Django templates.
+    """
+    def __init__(self) -> None:
+        self.queries: Counter = Counter()
+        self.db_time: float = 0.0
+        self.render_time: float = 0.0
+
+    @property
+    def query_count(self) -> int:
+        return sum(self.queries.values())
+
+    def repeated_queries(self, threshold: int) -> list:
+        """
+        Return the statements executed at least threshold times, the usual sign of an N+1 query.
+        """
+        return [(sql, count) for sql, count in self.queries.most_common() if count >= threshold]
+
+    def execute(self, execute: Callable, sql: str, params, many: bool, context: dict):
+        """
+        Database execute wrapper counting and timing every statement.
+        """
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries[sql] += 1
+
+
+def _timed_render(render: Callable) -> Callable:
+    """
+    Wrap Template.render so its time is added to the statistics of the current request.
+    """
+    def wrapper(self, *args, **kwargs):
+        stats = _current.get()
+        if stats is None:
+            return render(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            stats.render_time += time.perf_counter() - started
+    wrapper.instrumented = True
+    return wrapper
+
+
+class InstrumentationMiddleware:
+    """
+    Opt-in middleware measuring the SQL and time spent serving every request.
+
+    Enabled with the REQUEST_INSTRUMENTATION setting. Each response carries a
+    Server-Timing header with the total SQL time and query count, the template render
+    time and the view time, which includes both. A JSON line with the same numbers is
+    logged to the 'dealer.instrumentation' logger, as a warning when the request is
+    slower than SLOW_REQUEST_THRESHOLD_MS or repeats a statement at least
+    REPEATED_QUERY_THRESHOLD times.
+    """
+    def __init__(self, get_response: Callable) -> None:
+        if not getattr(settings, 'REQUEST_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed('Request instrumentation is disabled.')
+        self.get_response = get_response
+        self.slow_threshold: float = getattr(settings, 'SLOW_REQUEST_THRESHOLD_MS', 500)
+        self.repeated_threshold: int = getattr(settings, 'REPEATED_QUERY_THRESHOLD', 5)
+        if not getattr(Template.render, 'instrumented', False):
+            Template.render = _timed_render(Template.render)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(stats.execute))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        view_time = time.perf_counter() - started
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={stats.db_time * 1000:.3f};desc="{stats.query_count} queries"',
+            f'render;dur={stats.render_time * 1000:.3f}',
+            f'view;dur={view_time * 1000:.3f}',
+        ])
+        self.log(request, response, stats, view_time)
+        return response
+
+    def log(self, request: HttpRequest, response: HttpResponse, stats: RequestStats, view_time: float) -> None:
+        """
+        Log one JSON line describing the request.
+        """
+        repeated = stats.repeated_queries(self.repeated_threshold)
+        slow = view_time * 1000 >= self.slow_threshold
+        line = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': stats.query_count,
+            'db_ms': round(stats.db_time * 1000, 3),
+            'render_ms': round(stats.render_time * 1000, 3),
+            'view_ms': round(view_time * 1000, 3),
+            'slow': slow,
+            'repeated_queries': [{'sql': sql, 'count': count} for sql, count in repeated],
+        }
+        logger.log(logging.WARNING if slow or repeated else logging.INFO, json.dumps(line))
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Middleware routing the reads of safe requests to a read replica.
+
+    Enabled by listing replica aliases in the DATABASE_REPLICAS setting. GET, HEAD and
+    OPTIONS requests read from one replica picked per request. Every other request
+    reads and writes the primary and marks the client with a cookie that keeps its
+    reads on the primary for REPLICA_STICKINESS_SECONDS, so clients see their own
+    writes however far the replicas lag behind.
+    """
+    def __init__(self, get_response: Callable) -> None:
+        if not replica_aliases():
+            raise MiddlewareNotUsed('No read replicas are configured.')
+        self.get_response = get_response
+        self.stickiness: float = getattr(settings, 'REPLICA_STICKINESS_SECONDS', 5)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        writes = request.method not in SAFE_METHODS
+        alias = None if writes or self.is_sticky(request) else pick_replica()
+        with reading_from(alias):
+            response = self.get_response(request)
+        if writes:
+            response.set_cookie(
+                STICKY_COOKIE,
+                f'{time.time() + self.stickiness:.3f}',
+                max_age=math.ceil(self.stickiness),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    @staticmethod
+    def is_sticky(request: HttpRequest) -> bool:
+        """
+        Tell whether the client wrote recently enough to be kept on the primary.
+        """
+        try:
+            return float(request.COOKIES[STICKY_COOKIE]) > time.time()
+        except (KeyError, ValueError):
+            return False
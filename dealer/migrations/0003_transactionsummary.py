@@ -0,0 +1,55 @@
+# Generated by Django 4.2.10 on 2026-10-18 14:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.comparison
+
+
+def backfill_transaction_summary(apps, schema_editor):
+    Store = apps.get_model('dealer', 'Store')
+    Transaction = apps.get_model('dealer', 'Transaction')
+    TransactionSummary = apps.get_model('dealer', 'TransactionSummary')
+
+    store_ids = {}
+    for store_id, name in Store.objects.values_list('id', 'name'):
+        store_ids[name] = None if name in store_ids else store_id
+
+    summaries = {}
+    rows = Transaction.objects.values('transaction_type', 'buyer', 'seller').annotate(
+        count=models.Count('id'),
+        amount=models.Sum('transaction_amount'),
+    )
+    for row in rows.order_by():
+        transaction_type = row['transaction_type']
+        name = row['buyer'] if transaction_type == 'bought' else row['seller']
+        store_id = store_ids.get(name)
+        summary = summaries.setdefault(store_id, TransactionSummary(store_id=store_id))
+        setattr(summary, f'{transaction_type}_count', getattr(summary, f'{transaction_type}_count') + row['count'])
+        setattr(summary, f'{transaction_type}_amount', getattr(summary, f'{transaction_type}_amount') + row['amount'])
+    TransactionSummary.objects.bulk_create(summaries.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealer', '0002_car_submission_date_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bought_count', models.PositiveBigIntegerField(default=0)),
+                ('bought_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('sold_count', models.PositiveBigIntegerField(default=0)),
+                ('sold_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('store', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='transaction_summaries', to='dealer.store')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='transactionsummary',
+            constraint=models.UniqueConstraint(django.db.models.functions.comparison.Coalesce('store', 0), name='dealer_transactionsummary_unique_store'),
+        ),
+        migrations.RunPython(backfill_transaction_summary, migrations.RunPython.noop),
+    ]
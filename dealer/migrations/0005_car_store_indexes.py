@@ -0,0 +1,36 @@
+# Generated by Django 4.2.10 on 2026-10-18 14:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealer', '0004_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['store', 'price', 'id'], name='dealer_car_store_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['store', 'make', 'id'], name='dealer_car_store_make_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['store', 'model', 'id'], name='dealer_car_store_model_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['store', 'submission_date', 'id'], name='dealer_car_store_submitted_idx'),
+        ),
+        # the plain store index is dropped once the composite indexes covering it exist
+        migrations.AlterField(
+            model_name='car',
+            name='store',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='cars', to='dealer.store'),
+        ),
+    ]
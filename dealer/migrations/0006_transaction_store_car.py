@@ -0,0 +1,28 @@
+# Generated by Django 4.2.10 on 2026-10-18 14:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealer', '0005_car_store_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='car',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='transactions', to='dealer.car'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='store',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='dealer.store'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['store', 'transaction_type', 'transaction_date', 'id'], name='dealer_txn_store_type_date_idx'),
+        ),
+    ]
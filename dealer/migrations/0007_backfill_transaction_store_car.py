@@ -0,0 +1,122 @@
+# Generated by Django 4.2.10 on 2026-10-18 14:15
+
+from django.db import migrations, transaction
+from django.db.models import Count, Min, Q
+
+
+# transactions handled per batch, each batch committing on its own
+BATCH_SIZE = 1000
+
+# cars handled per batch, each batch committing on its own. Their keys are matched in
+# a single WHERE clause, which SQLite caps at 1000 levels of expression depth.
+CAR_BATCH_SIZE = 200
+
+
+def backfill_transaction_store_car(apps, schema_editor):
+    """
+    Link existing transactions to their store and, where it can be told apart, their car.
+
+    Bought transactions belong to the store named as buyer, sold transactions to the store
+    named as seller. A car still in inventory is linked to a bought transaction of its store
+    only when the match on make, model and price is one-to-one: no other car of the store
+    and no other bought transaction of the store share them. Ambiguous transactions keep a
+    NULL car. Sold cars have been deleted, so their transactions keep only the store.
+    """
+    backfill_transaction_store(apps)
+    backfill_transaction_car(apps)
+
+
+def backfill_transaction_store(apps):
+    Store = apps.get_model('dealer', 'Store')
+    Transaction = apps.get_model('dealer', 'Transaction')
+
+    store_ids = {}
+    for store_id, name in Store.objects.values_list('id', 'name'):
+        # Names shared by several stores cannot be attributed
+        store_ids[name] = None if name in store_ids else store_id
+
+    last_id = 0
+    while True:
+        batch = list(
+            Transaction.objects.filter(id__gt=last_id, store__isnull=True)
+            .order_by('id')
+            .only('id', 'transaction_type', 'buyer', 'seller')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        updated = []
+        for transaction_obj in batch:
+            if transaction_obj.transaction_type == 'bought':
+                transaction_obj.store_id = store_ids.get(transaction_obj.buyer)
+            else:
+                transaction_obj.store_id = store_ids.get(transaction_obj.seller)
+            if transaction_obj.store_id is not None:
+                updated.append(transaction_obj)
+
+        with transaction.atomic():
+            Transaction.objects.bulk_update(updated, ['store'])
+
+
+def backfill_transaction_car(apps):
+    Car = apps.get_model('dealer', 'Car')
+    Transaction = apps.get_model('dealer', 'Transaction')
+
+    last_id = 0
+    while True:
+        cars = list(
+            Car.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'store_id', 'make', 'model', 'price')[:CAR_BATCH_SIZE]
+        )
+        if not cars:
+            break
+        last_id = cars[-1][0]
+
+        # every read below is limited to the keys of the batch and grouped by key,
+        # so it returns at most one row per car of the batch
+        keys = {(store_id, make, model, price) for _, store_id, make, model, price in cars}
+        car_keys = Q()
+        transaction_keys = Q()
+        for store_id, make, model, price in keys:
+            car_keys |= Q(store_id=store_id, make=make, model=model, price=price)
+            transaction_keys |= Q(store_id=store_id, car_make=make, car_model=model, transaction_amount=price)
+
+        # keys shared by several cars, in this batch or any other
+        shared = {
+            (row['store_id'], row['make'], row['model'], row['price'])
+            for row in Car.objects.filter(car_keys)
+            .order_by().values('store_id', 'make', 'model', 'price')
+            .annotate(cars=Count('id')).filter(cars__gt=1)
+        }
+        # cars linked by an earlier, interrupted run
+        linked = set(Transaction.objects.filter(car_id__in=[car[0] for car in cars]).values_list('car_id', flat=True))
+        # the unlinked bought transaction of each key matched by exactly one
+        matches = {
+            (row['store_id'], row['car_make'], row['car_model'], row['transaction_amount']): row['transaction_id']
+            for row in Transaction.objects.filter(transaction_keys, transaction_type='bought', car__isnull=True)
+            .order_by().values('store_id', 'car_make', 'car_model', 'transaction_amount')
+            .annotate(transactions=Count('id'), transaction_id=Min('id')).filter(transactions=1)
+        }
+
+        updated = []
+        for car_id, store_id, make, model, price in cars:
+            key = (store_id, make, model, price)
+            if key in matches and key not in shared and car_id not in linked:
+                updated.append(Transaction(id=matches[key], car_id=car_id))
+
+        with transaction.atomic():
+            Transaction.objects.bulk_update(updated, ['car'])
+
+
+class Migration(migrations.Migration):
+    # every batch commits on its own, so a large table is never locked as a whole
+    atomic = False
+
+    dependencies = [
+        ('dealer', '0006_transaction_store_car'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_transaction_store_car, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.10 on 2026-10-18 14:16
+
+import dealer.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealer', '0007_backfill_transaction_store_car'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='store',
+            name='inventory_version',
+            field=models.PositiveBigIntegerField(default=dealer.models.initial_inventory_version, editable=False),
+        ),
+    ]
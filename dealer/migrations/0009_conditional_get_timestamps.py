@@ -0,0 +1,47 @@
+# Generated by Django 4.2.10 on 2026-10-18 14:18
+
+from django.db import migrations, models
+
+
+def backfill_timestamps(apps, schema_editor):
+    """
+    Date existing stores and summaries from their latest car submission and transaction.
+    """
+    Store = apps.get_model('dealer', 'Store')
+    Transaction = apps.get_model('dealer', 'Transaction')
+    TransactionSummary = apps.get_model('dealer', 'TransactionSummary')
+
+    latest_transactions = dict(
+        Transaction.objects.values_list('store').annotate(latest=models.Max('transaction_date')).order_by()
+    )
+    for summary in TransactionSummary.objects.all():
+        summary.last_transaction_at = latest_transactions.get(summary.store_id)
+        summary.save(update_fields=['last_transaction_at'])
+
+    stores = Store.objects.annotate(latest_car=models.Max('cars__submission_date'))
+    for store in stores:
+        moments = [moment for moment in (store.latest_car, latest_transactions.get(store.pk)) if moment is not None]
+        if moments:
+            store.inventory_updated_at = max(moments)
+            store.save(update_fields=['inventory_updated_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealer', '0008_store_inventory_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='store',
+            name='inventory_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='transactionsummary',
+            name='last_transaction_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_timestamps, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 4.2.10 on 2026-10-18 14:40
+
+import warnings
+
+from django.db import migrations
+
+
+# (name, column) of the indexes backing case-insensitive prefix matches
+PREFIX_INDEXES = [
+    ('dealer_car_make_prefix_idx', 'make'),
+    ('dealer_car_model_prefix_idx', 'model'),
+]
+
+# (name, column) of the trigram indexes backing case-insensitive substring matches
+TRIGRAM_INDEXES = [
+    ('dealer_car_make_trgm_idx', 'make'),
+    ('dealer_car_model_trgm_idx', 'model'),
+]
+
+
+def trigram_available(schema_editor) -> bool:
+    """
+    Tell whether pg_trgm is installed, creating it when the database user may.
+
+    Creating an extension takes superuser rights, or, for extensions marked trusted as
+    pg_trgm is from PostgreSQL 13, the CREATE privilege on the database.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+        if cursor.fetchone()[0]:
+            return True
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm')")
+        if not cursor.fetchone()[0]:
+            return False
+        cursor.execute('SELECT rolsuper FROM pg_roles WHERE rolname = current_user')
+        allowed = cursor.fetchone()[0]
+        if not allowed and schema_editor.connection.pg_version >= 130000:
+            cursor.execute(
+                "SELECT has_database_privilege(current_database(), 'CREATE') AND EXISTS ("
+                "SELECT 1 FROM pg_available_extension_versions WHERE name = 'pg_trgm' AND trusted)"
+            )
+            allowed = cursor.fetchone()[0]
+    if allowed:
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    return allowed
+
+
+def create_search_indexes(apps, schema_editor):
+    """
+    Index the car make and model for the search endpoint.
+
+    On PostgreSQL istartswith and icontains compare UPPER(column::text) with LIKE, so the
+    prefix indexes are pattern-ops B-trees and the substring indexes pg_trgm GIN indexes
+    on that expression. They are built concurrently so the table stays writable. Other
+    databases get case-insensitive B-trees, which SQLite uses for LIKE prefixes.
+
+    Without pg_trgm, which the database user may not be allowed to create, the trigram
+    indexes are skipped with a warning and substring matches scan the table.
+    """
+    execute = schema_editor.execute
+    if schema_editor.connection.vendor == 'postgresql':
+        for name, column in PREFIX_INDEXES:
+            execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON dealer_car (UPPER({column}::text) text_pattern_ops)')
+        if not trigram_available(schema_editor):
+            warnings.warn(
+                'The pg_trgm extension is not installed and the database user may not create it, '
+                'so car search substring matches are not indexed. Create the extension and the '
+                'TRIGRAM_INDEXES of dealer/migrations/0010_car_search_indexes.py to index them.'
+            )
+            return
+        for name, column in TRIGRAM_INDEXES:
+            execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON dealer_car USING gin (UPPER({column}::text) gin_trgm_ops)')
+    elif schema_editor.connection.vendor == 'sqlite':
+        for name, column in PREFIX_INDEXES:
+            execute(f'CREATE INDEX IF NOT EXISTS {name} ON dealer_car ({column} COLLATE NOCASE)')
+
+
+def drop_search_indexes(apps, schema_editor):
+    for name, _ in PREFIX_INDEXES + TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('dealer', '0009_conditional_get_timestamps'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.10 on 2026-10-18 14:39
+
+from django.db import migrations, models
+
+
+def create_txid_trigger(apps, schema_editor):
+    """
+    Stamp every change log entry on PostgreSQL with the id of the transaction writing it.
+
+    The change feed only serves entries of transactions older than every transaction
+    still running, so an entry committed late can never fall behind a client's cursor.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE OR REPLACE FUNCTION dealer_change_set_txid() RETURNS trigger AS $$ '
+        'BEGIN NEW.txid := txid_current(); RETURN NEW; END $$ LANGUAGE plpgsql'
+    )
+    schema_editor.execute(
+        'CREATE TRIGGER dealer_change_txid BEFORE INSERT ON dealer_change '
+        'FOR EACH ROW EXECUTE PROCEDURE dealer_change_set_txid()'
+    )
+
+
+def drop_txid_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP TRIGGER IF EXISTS dealer_change_txid ON dealer_change')
+    schema_editor.execute('DROP FUNCTION IF EXISTS dealer_change_set_txid()')
+
+
+def backfill_changes(apps, schema_editor):
+    """
+    Log every existing store and car, so a client starting from an empty cursor gets the whole inventory.
+    """
+    schema_editor.execute(
+        "INSERT INTO dealer_change (kind, object_id, store_id, deleted, txid, created_at) "
+        "SELECT 'store', id, id, false, 0, CURRENT_TIMESTAMP FROM dealer_store ORDER BY id"
+    )
+    schema_editor.execute(
+        "INSERT INTO dealer_change (kind, object_id, store_id, deleted, txid, created_at) "
+        "SELECT 'car', id, store_id, false, 0, CURRENT_TIMESTAMP FROM dealer_car ORDER BY id"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealer', '0011_purchase_ticket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('car', 'Car'), ('store', 'Store')], max_length=5)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('store_id', models.PositiveBigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('txid', models.PositiveBigIntegerField(default=0, editable=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['txid', 'id'], name='dealer_change_txid_id_idx'), models.Index(fields=['store_id', 'txid', 'id'], name='dealer_change_store_txid_idx')],
+            },
+        ),
+        migrations.RunPython(create_txid_trigger, drop_txid_trigger),
+        migrations.RunPython(backfill_changes, migrations.RunPython.noop),
+    ]
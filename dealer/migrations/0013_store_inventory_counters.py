@@ -0,0 +1,41 @@
+# Generated by Django 4.2.10 on 2026-10-18 14:44
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_inventory(apps, schema_editor):
+    """
+    Count the cars and their total price of every existing store.
+    """
+    Store = apps.get_model('dealer', 'Store')
+    Car = apps.get_model('dealer', 'Car')
+
+    cars = Car.objects.filter(store=models.OuterRef('pk')).order_by().values('store')
+    Store.objects.update(
+        inventory_count=Coalesce(models.Subquery(cars.annotate(count=models.Count('id')).values('count')), 0),
+        inventory_value=Coalesce(models.Subquery(cars.annotate(value=models.Sum('price')).values('value')), Decimal('0')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealer', '0012_change_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='store',
+            name='inventory_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='inventory_value',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.RunPython(count_inventory, migrations.RunPython.noop),
+    ]
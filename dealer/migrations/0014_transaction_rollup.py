@@ -0,0 +1,55 @@
+# Generated by Django 4.2.10 on 2026-10-18 14:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.comparison
+from django.db.models.functions import TruncDate
+
+
+def fill_rollups(apps, schema_editor):
+    """
+    Roll up the existing transactions by store, day and type.
+
+    Transactions were attributed to stores by migration 0007, those left without one
+    go to the rollups without a store.
+    """
+    Transaction = apps.get_model('dealer', 'Transaction')
+    TransactionRollup = apps.get_model('dealer', 'TransactionRollup')
+
+    rows = Transaction.objects.values('store', 'transaction_type', day=TruncDate('transaction_date')).annotate(
+        count=models.Count('id'),
+        amount=models.Sum('transaction_amount'),
+    ).order_by()
+    TransactionRollup.objects.bulk_create(
+        TransactionRollup(store_id=row['store'], day=row['day'], transaction_type=row['transaction_type'], count=row['count'], amount=row['amount'])
+        for row in rows.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealer', '0013_store_inventory_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('transaction_type', models.CharField(choices=[('bought', 'Bought'), ('sold', 'Sold')], max_length=6)),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('store', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='transaction_rollups', to='dealer.store')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='dealer_rollup_day_idx'), models.Index(fields=['store', 'day'], name='dealer_rollup_store_day_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='transactionrollup',
+            constraint=models.UniqueConstraint(django.db.models.functions.comparison.Coalesce('store', 0), models.F('day'), models.F('transaction_type'), name='dealer_transactionrollup_unique_day'),
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
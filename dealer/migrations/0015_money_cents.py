@@ -0,0 +1,91 @@
+# Generated by Django 4.2.10 on 2026-10-18 14:57
+
+import warnings
+
+from django.db import migrations, models
+
+
+# the money columns and the integer cents columns shadowing them
+MONEY_COLUMNS = (
+    ('dealer_store', 'budget'),
+    ('dealer_car', 'price'),
+    ('dealer_transaction', 'transaction_amount'),
+)
+
+
+def create_cents_triggers(apps, schema_editor):
+    """
+    Keep every cents column equal to its money column times 100 on every write.
+
+    Triggers cover the F() updates, bulk inserts and the COPY path of the imports
+    alike, which would all have to be changed to maintain the columns themselves.
+    Other databases keep the columns unmaintained and readers on the money fields,
+    see dealer.money.cents_enabled().
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor not in ('postgresql', 'sqlite'):
+        warnings.warn(f'The money cents columns are not maintained on {vendor}, MONEY_CENTS has no effect there.')
+        return
+    for table, column in MONEY_COLUMNS:
+        if vendor == 'postgresql':
+            schema_editor.execute(
+                f'CREATE OR REPLACE FUNCTION {table}_set_{column}_cents() RETURNS trigger AS $$ '
+                f'BEGIN NEW.{column}_cents := ROUND(NEW.{column} * 100); RETURN NEW; END $$ LANGUAGE plpgsql'
+            )
+            schema_editor.execute(
+                f'CREATE TRIGGER {table}_{column}_cents BEFORE INSERT OR UPDATE OF {column} ON {table} '
+                f'FOR EACH ROW EXECUTE PROCEDURE {table}_set_{column}_cents()'
+            )
+        elif vendor == 'sqlite':
+            # SQLite triggers cannot assign NEW, so the row is updated once written
+            update = f'UPDATE {table} SET {column}_cents = CAST(ROUND(NEW.{column} * 100) AS INTEGER) WHERE id = NEW.id;'
+            schema_editor.execute(f'CREATE TRIGGER {table}_{column}_cents_insert AFTER INSERT ON {table} BEGIN {update} END')
+            schema_editor.execute(f'CREATE TRIGGER {table}_{column}_cents_update AFTER UPDATE OF {column} ON {table} BEGIN {update} END')
+
+
+def drop_cents_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, column in MONEY_COLUMNS:
+        if vendor == 'postgresql':
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_{column}_cents ON {table}')
+            schema_editor.execute(f'DROP FUNCTION IF EXISTS {table}_set_{column}_cents()')
+        elif vendor == 'sqlite':
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_{column}_cents_insert')
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_{column}_cents_update')
+
+
+def backfill_cents(apps, schema_editor):
+    """
+    Convert the existing amounts, which have two decimal places, to integer cents.
+    """
+    if schema_editor.connection.vendor not in ('postgresql', 'sqlite'):
+        return
+    for table, column in MONEY_COLUMNS:
+        schema_editor.execute(f'UPDATE {table} SET {column}_cents = CAST(ROUND({column} * 100) AS BIGINT)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealer', '0014_transaction_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='price_cents',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='budget_cents',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='transaction_amount_cents',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(create_cents_triggers, drop_cents_triggers),
+        migrations.RunPython(backfill_cents, migrations.RunPython.noop),
+    ]
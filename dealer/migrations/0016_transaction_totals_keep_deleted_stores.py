@@ -0,0 +1,24 @@
+# Generated by Django 4.2.10 on 2026-10-18 15:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dealer', '0015_money_cents'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transactionrollup',
+            name='store',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transaction_rollups', to='dealer.store'),
+        ),
+        migrations.AlterField(
+            model_name='transactionsummary',
+            name='store',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transaction_summaries', to='dealer.store'),
+        ),
+    ]
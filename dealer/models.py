@@ -1,17 +1,69 @@
 import logging
+import secrets
 
 from decimal import Decimal
+from typing import Iterable, Optional, Union
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Now, TruncDate
+from django.utils import timezone
+
+from .money import CentsAmount, CentsModel, cents_enabled, money_column, read_money
+
+
+def initial_inventory_version() -> int:
+    """
+    Pick a random starting inventory version.
+
+    A random start keeps a store whose id is reused, e.g. after a rolled back insert,
+    from matching response cache entries of the earlier store.
+    """
+    return secrets.randbits(62)
 
 
 # store
-class Store(models.Model):
+class Store(CentsModel):
     """
     Model representing a store.
+
+    The inventory version is bumped and the inventory timestamp set by every write to
+    the store inventory or budget, in the same UPDATE statement. They key the cached
+    responses and validate the conditional requests built from them. The same UPDATE
+    maintains the number and total price of the cars in inventory, so store summaries
+    never read the car table.
     """
     name = models.CharField(max_length=100)
     budget = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # the budget in integer cents, set from it by a database trigger on every write, see dealer.money
+    budget_cents = models.BigIntegerField(default=0, editable=False)
+    budget_from_cents = CentsAmount('budget')
+    inventory_version = models.PositiveBigIntegerField(default=initial_inventory_version, editable=False)
+    inventory_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # not constrained positive, so cars written around the services cannot block sales until the next rebuild
+    inventory_count = models.IntegerField(default=0, editable=False)
+    inventory_value = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+
+    @staticmethod
+    def counted_inventory() -> dict:
+        """
+        Return update() expressions recounting the inventory of each store from the car table.
+        """
+        cars = Car.objects.filter(store=OuterRef('pk')).order_by().values('store')
+        return {
+            'inventory_count': Coalesce(Subquery(cars.annotate(count=Count('id')).values('count')), 0),
+            'inventory_value': Coalesce(Subquery(cars.annotate(value=Sum('price')).values('value')), Decimal('0')),
+        }
+
+    @classmethod
+    def rebuild_inventory(cls) -> int:
+        """
+        Recompute the inventory count and value of every store from the car table.
+
+        Returns:
+            int: The number of stores updated.
+        """
+        return cls.objects.update(**cls.counted_inventory())
 
     def __str__(self) -> str:
         """
@@ -21,16 +73,34 @@ class Store(models.Model):
 
 
 # car
-class Car(models.Model):
+class Car(CentsModel):
     """
     Model representing a car.
     """
     make = models.CharField(max_length=50)
     model = models.CharField(max_length=50)
     price = models.DecimalField(max_digits=10, decimal_places=2)
-    store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name='cars')
+    # the price in integer cents, set from it by a database trigger on every write, see dealer.money
+    price_cents = models.BigIntegerField(default=0, editable=False)
+    price_from_cents = CentsAmount('price')
+    # indexed through the composite per-store indexes below, which all lead with store
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name='cars', db_index=False)
     submission_date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Composite indexes backing keyset pagination for every car list ordering,
+        # across all stores and within a single store
+        indexes = [
+            models.Index(fields=['price', 'id'], name='dealer_car_price_id_idx'),
+            models.Index(fields=['make', 'id'], name='dealer_car_make_id_idx'),
+            models.Index(fields=['model', 'id'], name='dealer_car_model_id_idx'),
+            models.Index(fields=['submission_date', 'id'], name='dealer_car_submitted_id_idx'),
+            models.Index(fields=['store', 'price', 'id'], name='dealer_car_store_price_idx'),
+            models.Index(fields=['store', 'make', 'id'], name='dealer_car_store_make_idx'),
+            models.Index(fields=['store', 'model', 'id'], name='dealer_car_store_model_idx'),
+            models.Index(fields=['store', 'submission_date', 'id'], name='dealer_car_store_submitted_idx'),
+        ]
+
     def __str__(self) -> str:
         """
         String representation of the car.
@@ -39,7 +109,7 @@ class Car(models.Model):
 
 
 # transaction
-class Transaction(models.Model):
+class Transaction(CentsModel):
     """
     Model representing a transaction.
     """
@@ -54,7 +124,20 @@ class Transaction(models.Model):
     seller = models.CharField(max_length=100)
     transaction_type = models.CharField(max_length=6, choices=TRANSACTION_TYPES)
     transaction_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    # the amount in integer cents, set from it by a database trigger on every write, see dealer.money
+    transaction_amount_cents = models.BigIntegerField(default=0, editable=False)
+    transaction_amount_from_cents = CentsAmount('transaction_amount')
     transaction_date = models.DateTimeField(auto_now_add=True)
+    # indexed through the composite (store, transaction_type, transaction_date) index below
+    store = models.ForeignKey(Store, null=True, blank=True, on_delete=models.SET_NULL, related_name='transactions', db_index=False)
+    # no database constraint, so the id of a sold car is kept after the car is deleted
+    car = models.ForeignKey(Car, null=True, blank=True, on_delete=models.DO_NOTHING, db_constraint=False, related_name='transactions')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['transaction_date', 'id'], name='dealer_txn_date_id_idx'),
+            models.Index(fields=['store', 'transaction_type', 'transaction_date', 'id'], name='dealer_txn_store_type_date_idx'),
+        ]
 
     @classmethod
     def total_bought_amount(cls) -> Decimal:
@@ -62,11 +145,12 @@ class Transaction(models.Model):
         Calculate the total amount spent on bought transactions.
         """
         try:
-            total = cls.objects.filter(transaction_type='bought').aggregate(total=models.Sum('transaction_amount'))['total']
-            return total or 0
+            cents = cents_enabled()
+            total = cls.objects.filter(transaction_type='bought').aggregate(total=models.Sum(money_column('transaction_amount', cents)))['total']
+            return read_money(total, cents)
         except Exception as e:
             logging.error(f"Error occurred while calculating total bought amount: {e}")
-            return 0
+            return Decimal('0.00')
 
     @classmethod
     def total_sold_amount(cls) -> Decimal:
@@ -74,11 +158,12 @@ class Transaction(models.Model):
         Calculate the total amount earned from sold transactions.
         """
         try:
-            total = cls.objects.filter(transaction_type='sold').aggregate(total=models.Sum('transaction_amount'))['total']
-            return total or 0
+            cents = cents_enabled()
+            total = cls.objects.filter(transaction_type='sold').aggregate(total=models.Sum(money_column('transaction_amount', cents)))['total']
+            return read_money(total, cents)
         except Exception as e:
             logging.error(f"Error occurred while calculating total sold amount: {e}")
-            return 0
+            return Decimal('0.00')
 
     @classmethod
     def total_transaction_count(cls) -> int:
@@ -118,3 +203,372 @@ class Transaction(models.Model):
         String representation of the transaction.
         """
         return f"{self.transaction_type} - {self.transaction_amount} - {self.transaction_date}"
+
+
+# transaction summary
+class TransactionSummary(models.Model):
+    """
+    Model representing running transaction totals for a store.
+
+    Rows are updated in the same database transaction that creates the
+    Transaction they account for, so every summary is a consistent snapshot.
+    The row without a store holds transactions that cannot be attributed to
+    any store. Global totals are the sum over all rows, which keeps writers
+    in different stores from contending on a shared row.
+    """
+    # rows of a deleted store are folded into the row without one, see unattribute()
+    store = models.ForeignKey(Store, null=True, blank=True, on_delete=models.SET_NULL, related_name='transaction_summaries')
+    bought_count = models.PositiveBigIntegerField(default=0)
+    bought_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    sold_count = models.PositiveBigIntegerField(default=0)
+    sold_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    last_transaction_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Coalesce('store', 0), name='dealer_transactionsummary_unique_store'),
+        ]
+
+    @classmethod
+    def record(cls, store: Optional[Store], transaction_type: str, amount: Decimal, count: int = 1) -> None:
+        """
+        Add transactions to the summary of a store.
+
+        Must be called inside the atomic block that creates the transactions. They are
+        added to the daily rollup of the store as well.
+
+        Args:
+            store (Optional[Store]): The store the transactions belong to.
+            transaction_type (str): Either 'bought' or 'sold'.
+            amount (Decimal): The summed amount of the transactions.
+            count (int): The number of transactions.
+        """
+        changes = {
+            f'{transaction_type}_count': F(f'{transaction_type}_count') + count,
+            f'{transaction_type}_amount': F(f'{transaction_type}_amount') + amount,
+            'last_transaction_at': Now(),
+        }
+        if not cls.objects.filter(store=store).update(**changes):
+            cls.objects.get_or_create(store=store)
+            cls.objects.filter(store=store).update(**changes)
+        TransactionRollup.record(store, transaction_type, amount, count)
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """
+        Recompute every summary row from the transaction table.
+
+        Transactions are attributed by their store foreign key, which migration 0007
+        backfilled for older transactions. Those without a store go to the row
+        without one, as when they were recorded.
+
+        Returns:
+            int: The number of summary rows written.
+        """
+        summaries = {}
+        cents = cents_enabled()
+        rows = Transaction.objects.values('transaction_type', 'store').annotate(
+            count=Count('id'),
+            amount=Sum(money_column('transaction_amount', cents)),
+            last_transaction_at=Max('transaction_date'),
+        )
+        for row in rows.order_by():
+            transaction_type = row['transaction_type']
+            store_id = row['store']
+            summary = summaries.setdefault(store_id, cls(store_id=store_id))
+            setattr(summary, f'{transaction_type}_count', getattr(summary, f'{transaction_type}_count') + row['count'])
+            setattr(summary, f'{transaction_type}_amount', getattr(summary, f'{transaction_type}_amount') + read_money(row['amount'], cents))
+            if summary.last_transaction_at is None or row['last_transaction_at'] > summary.last_transaction_at:
+                summary.last_transaction_at = row['last_transaction_at']
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(summaries.values())
+        return len(summaries)
+
+    @classmethod
+    def unattribute(cls, store: Store) -> None:
+        """
+        Fold the summary of a store into the row without a store, along with its rollups.
+
+        Called before the store is deleted. Its transactions are kept without a store,
+        so their totals move to the row rebuild() would put them in.
+
+        Args:
+            store (Store): The store about to be deleted.
+        """
+        summary = cls.objects.select_for_update().filter(store=store).first()
+        if summary is not None:
+            changes = {
+                'bought_count': F('bought_count') + summary.bought_count,
+                'bought_amount': F('bought_amount') + summary.bought_amount,
+                'sold_count': F('sold_count') + summary.sold_count,
+                'sold_amount': F('sold_amount') + summary.sold_amount,
+            }
+            if not cls.objects.filter(store=None).update(**changes):
+                cls.objects.get_or_create(store=None)
+                cls.objects.filter(store=None).update(**changes)
+            if summary.last_transaction_at is not None:
+                cls.objects.filter(store=None).filter(
+                    Q(last_transaction_at__isnull=True) | Q(last_transaction_at__lt=summary.last_transaction_at)
+                ).update(last_transaction_at=summary.last_transaction_at)
+            summary.delete()
+        TransactionRollup.unattribute(store)
+
+    @classmethod
+    def totals(cls, store: Union[Store, int, None] = None) -> dict:
+        """
+        Read the transaction totals with a single query.
+
+        Args:
+            store (Store | int | None): Limit the totals to this store or store id, or None for global totals.
+
+        Returns:
+            dict: The bought, sold and overall transaction counts and amounts.
+        """
+        return cls.summarize(store)[0]
+
+    @classmethod
+    def summarize(cls, store: Union[Store, int, None] = None) -> tuple:
+        """
+        Read the transaction totals and the time of the latest transaction with a single query.
+
+        Args:
+            store (Store | int | None): Limit the totals to this store or store id, or None for global totals.
+
+        Returns:
+            tuple: The totals as returned by totals() and the time of the latest transaction, or None.
+        """
+        summaries = cls.objects.all() if store is None else cls.objects.filter(store=store)
+        return cls._format_totals(summaries.aggregate(**cls._aggregates()))
+
+    @classmethod
+    async def asummarize(cls, store: Union[Store, int, None] = None) -> tuple:
+        """
+        Async version of summarize(), reading the totals with the async ORM.
+        """
+        summaries = cls.objects.all() if store is None else cls.objects.filter(store=store)
+        return cls._format_totals(await summaries.aaggregate(**cls._aggregates()))
+
+    @staticmethod
+    def _aggregates() -> dict:
+        """
+        Return the aggregates read by summarize().
+        """
+        return {
+            'bought_count': Sum('bought_count'),
+            'bought_amount': Sum('bought_amount'),
+            'sold_count': Sum('sold_count'),
+            'sold_amount': Sum('sold_amount'),
+            'last_transaction_at': Max('last_transaction_at'),
+        }
+
+    @staticmethod
+    def _format_totals(totals: dict) -> tuple:
+        """
+        Turn the aggregates read by summarize() into the totals and the time of the latest transaction.
+        """
+        bought_count = totals['bought_count'] or 0
+        sold_count = totals['sold_count'] or 0
+        return {
+            'total_bought_amount': totals['bought_amount'] or 0,
+            'total_sold_amount': totals['sold_amount'] or 0,
+            'total_transaction_count': bought_count + sold_count,
+            'total_bought_transaction_count': bought_count,
+            'total_sold_transaction_count': sold_count,
+        }, totals['last_transaction_at']
+
+    def __str__(self) -> str:
+        """
+        String representation of the transaction summary.
+        """
+        return f"{self.store or 'Unattributed'} - {self.bought_count} bought - {self.sold_count} sold"
+
+
+# transaction rollup
+class TransactionRollup(models.Model):
+    """
+    Model representing the transactions of one type made by a store on one day.
+
+    Rows are updated along with the transaction summary, in the same database
+    transaction that creates the Transactions they account for. Days are calendar
+    days in the TIME_ZONE setting. Time series read these rows, one per store, day
+    and type, instead of the transactions themselves.
+    """
+    # rows of a deleted store are folded into the rows without one, see unattribute()
+    store = models.ForeignKey(Store, null=True, blank=True, on_delete=models.SET_NULL, related_name='transaction_rollups')
+    day = models.DateField()
+    transaction_type = models.CharField(max_length=6, choices=Transaction.TRANSACTION_TYPES)
+    count = models.PositiveBigIntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Coalesce('store', 0), 'day', 'transaction_type', name='dealer_transactionrollup_unique_day'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='dealer_rollup_day_idx'),
+            models.Index(fields=['store', 'day'], name='dealer_rollup_store_day_idx'),
+        ]
+
+    @classmethod
+    def record(cls, store: Optional[Store], transaction_type: str, amount: Decimal, count: int = 1) -> None:
+        """
+        Add transactions made today to the rollup of a store.
+
+        Must be called inside the atomic block that creates the transactions.
+
+        Args:
+            store (Optional[Store]): The store the transactions belong to.
+            transaction_type (str): Either 'bought' or 'sold'.
+            amount (Decimal): The summed amount of the transactions.
+            count (int): The number of transactions.
+        """
+        day = timezone.localdate()
+        changes = {'count': F('count') + count, 'amount': F('amount') + amount}
+        rollups = cls.objects.filter(store=store, day=day, transaction_type=transaction_type)
+        if not rollups.update(**changes):
+            cls.objects.get_or_create(store=store, day=day, transaction_type=transaction_type)
+            rollups.update(**changes)
+
+    @classmethod
+    def unattribute(cls, store: Store) -> None:
+        """
+        Fold the rollups of a store into the rows without a store of the same days.
+
+        Args:
+            store (Store): The store about to be deleted.
+        """
+        for rollup in cls.objects.select_for_update().filter(store=store):
+            changes = {'count': F('count') + rollup.count, 'amount': F('amount') + rollup.amount}
+            rollups = cls.objects.filter(store=None, day=rollup.day, transaction_type=rollup.transaction_type)
+            if not rollups.update(**changes):
+                cls.objects.get_or_create(store=None, day=rollup.day, transaction_type=rollup.transaction_type)
+                rollups.update(**changes)
+        cls.objects.filter(store=store).delete()
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """
+        Recompute every rollup row from the transaction table.
+
+        Transactions are attributed by their store foreign key, as by TransactionSummary.rebuild()
+        and migration 0014.
+
+        Returns:
+            int: The number of rollup rows written.
+        """
+        rollups = {}
+        cents = cents_enabled()
+        rows = Transaction.objects.values('transaction_type', 'store', day=TruncDate('transaction_date')).annotate(
+            count=Count('id'),
+            amount=Sum(money_column('transaction_amount', cents)),
+        )
+        for row in rows.order_by():
+            store_id = row['store']
+            key = (store_id, row['day'], row['transaction_type'])
+            rollup = rollups.setdefault(key, cls(store_id=store_id, day=row['day'], transaction_type=row['transaction_type']))
+            rollup.count += row['count']
+            rollup.amount += read_money(row['amount'], cents)
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(rollups.values())
+        return len(rollups)
+
+
+# purchase ticket
+class PurchaseTicket(models.Model):
+    """
+    Model representing a queued request to buy a car.
+
+    Tickets are processed in id order by the purchase worker, many per database
+    transaction. The car and store are plain ids, so a ticket keeps its request after
+    the car is sold.
+    """
+    STATUSES: tuple = (
+        ('pending', 'Pending'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+
+    car_id = models.PositiveBigIntegerField()
+    # only sell the car if it belongs to this store
+    store_id = models.PositiveBigIntegerField(null=True, blank=True)
+    status = models.CharField(max_length=9, choices=STATUSES, default='pending')
+    transaction = models.ForeignKey(Transaction, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    error = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # the pending tickets only, which the worker drains in id order
+            models.Index(fields=['id'], condition=models.Q(status='pending'), name='dealer_ticket_pending_idx'),
+        ]
+
+    def __str__(self) -> str:
+        """
+        String representation of the purchase ticket.
+        """
+        return f"Ticket {self.pk} - car {self.car_id} - {self.status}"
+
+
+# change log
+class Change(models.Model):
+    """
+    Model representing an entry of the inventory change log.
+
+    Every write to a store or its cars adds entries in the same database transaction:
+    one for the store, whose budget changed, and one per car added or removed. Removed
+    cars leave an entry marked deleted, as the car row itself is gone. The change feed
+    reads the log in (txid, id) order. On PostgreSQL a trigger sets txid to the id of
+    the writing transaction, elsewhere it stays 0 and entries are read in id order.
+
+    Attributes:
+        kind (str): Either 'car' or 'store'.
+        object_id (int): The id of the changed car or store.
+        store_id (int): The store of the car, or the store itself.
+        deleted (bool): Whether the object was deleted.
+    """
+    KINDS: tuple = (
+        ('car', 'Car'),
+        ('store', 'Store'),
+    )
+
+    kind = models.CharField(max_length=5, choices=KINDS)
+    object_id = models.PositiveBigIntegerField()
+    store_id = models.PositiveBigIntegerField()
+    deleted = models.BooleanField(default=False)
+    txid = models.PositiveBigIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['txid', 'id'], name='dealer_change_txid_id_idx'),
+            models.Index(fields=['store_id', 'txid', 'id'], name='dealer_change_store_txid_idx'),
+        ]
+
+    @classmethod
+    def record(cls, store_id: int, car_ids: Iterable[int] = (), deleted_car_ids: Iterable[int] = (), store: bool = True) -> None:
+        """
+        Log changes to a store and its cars with a single INSERT.
+
+        Must be called inside the atomic block making the changes.
+
+        Args:
+            store_id (int): The store written to.
+            car_ids (Iterable[int]): The cars added to or updated in the store.
+            deleted_car_ids (Iterable[int]): The cars removed from the store.
+            store (bool): Whether the store itself changed, e.g. its budget.
+        """
+        changes = [cls(kind='store', object_id=store_id, store_id=store_id)] if store else []
+        changes += [cls(kind='car', object_id=car_id, store_id=store_id) for car_id in car_ids]
+        changes += [cls(kind='car', object_id=car_id, store_id=store_id, deleted=True) for car_id in deleted_car_ids]
+        cls.objects.bulk_create(changes)
+
+    def __str__(self) -> str:
+        """
+        String representation of the change.
+        """
+        return f"{self.kind} {self.object_id} - {'deleted' if self.deleted else 'changed'}"
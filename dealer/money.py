@@ -0,0 +1,131 @@
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import DEFAULT_DB_ALIAS, connections, models
+
+
+# decimal places of the money fields, whose values are also stored in integer cents
+MONEY_DECIMAL_PLACES: int = 2
+
+# the database vendors whose triggers maintain the cents columns, see migration 0015
+CENTS_VENDORS: tuple = ('postgresql', 'sqlite')
+
+
+def cents_enabled(using: str = DEFAULT_DB_ALIAS) -> bool:
+    """
+    Tell whether aggregates and list encoders read money from the integer cents columns.
+
+    Opted into with the MONEY_CENTS setting, on the databases maintaining the columns.
+    """
+    return settings.MONEY_CENTS and connections[using].vendor in CENTS_VENDORS
+
+
+def money_column(field_name: str, cents: bool) -> str:
+    """
+    Return the column a money field is read from: its cents column, or itself.
+    """
+    return cents_column(field_name) if cents else field_name
+
+
+def read_money(value, cents: bool) -> Decimal:
+    """
+    Convert a value read from money_column() to an amount, None counting as zero.
+    """
+    if cents:
+        return from_cents(value or 0)
+    return value if value is not None else Decimal('0.00')
+
+
+def cents_column(field_name: str) -> str:
+    """
+    Return the name of the integer cents column shadowing a money field.
+    """
+    return f'{field_name}_cents'
+
+
+def has_cents_column(field: models.Field) -> bool:
+    """
+    Tell whether a field is a money field shadowed by an integer cents column.
+    """
+    if not isinstance(field, models.DecimalField) or field.decimal_places != MONEY_DECIMAL_PLACES:
+        return False
+    try:
+        field.model._meta.get_field(cents_column(field.name))
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def to_cents(amount) -> int:
+    """
+    Convert an amount to integer cents, rounding half away from zero as the database ROUND() does.
+    """
+    amount = Decimal(str(amount)) if isinstance(amount, float) else Decimal(amount)
+    return int(amount.scaleb(MONEY_DECIMAL_PLACES).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> Decimal:
+    """
+    Convert integer cents to an amount with two decimal places.
+    """
+    return Decimal(cents).scaleb(-MONEY_DECIMAL_PLACES)
+
+
+def format_cents(cents: int) -> str:
+    """
+    Format integer cents as a DecimalField with two decimal places is serialized,
+    without building a Decimal.
+    """
+    units, rest = divmod(abs(cents), 100)
+    return f'{"-" if cents < 0 else ""}{units}.{rest:02d}'
+
+
+def divide_cents(cents: int, count: int) -> int:
+    """
+    Divide integer cents by a positive count, rounding half to even as Decimal.quantize() does.
+    """
+    quotient, remainder = divmod(cents, count)
+    if remainder * 2 > count or (remainder * 2 == count and quotient % 2):
+        quotient += 1
+    return quotient
+
+
+class CentsAmount:
+    """
+    Accessor exposing the cents column of a money field as a Decimal amount.
+
+    Reads need only the cents column, e.g. rows loaded with only(). Assigning an
+    amount sets both the money field and its cents column.
+    """
+    def __init__(self, field_name: str) -> None:
+        self.field_name = field_name
+
+    def __get__(self, instance, owner=None) -> Optional[Decimal]:
+        if instance is None:
+            return self
+        return from_cents(getattr(instance, cents_column(self.field_name)))
+
+    def __set__(self, instance, value) -> None:
+        setattr(instance, self.field_name, from_cents(to_cents(value)))
+        setattr(instance, cents_column(self.field_name), to_cents(value))
+
+
+class CentsModel(models.Model):
+    """
+    Model whose money fields are shadowed by integer cents columns.
+
+    The database triggers keep the columns in step on every write, and save() sets
+    them on the instance too, so a saved instance does not hold stale cents.
+    """
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs) -> None:
+        for field in self._meta.concrete_fields:
+            value = getattr(self, field.attname)
+            # expressions such as F() are left to the trigger
+            if value is not None and not hasattr(value, 'resolve_expression') and has_cents_column(field):
+                setattr(self, cents_column(field.name), to_cents(value))
+        super().save(*args, **kwargs)
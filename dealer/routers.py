@@ -0,0 +1,65 @@
+import random
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+# the database reads are routed to in the current thread or task, None for the primary
+_read_alias: ContextVar[Optional[str]] = ContextVar('dealer_read_alias', default=None)
+
+
+def replica_aliases() -> List[str]:
+    """
+    Return the aliases of the read replicas, from the DATABASE_REPLICAS setting.
+    """
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+def pick_replica() -> Optional[str]:
+    """
+    Pick the replica serving a request, None when there is none.
+    """
+    replicas = replica_aliases()
+    return random.choice(replicas) if replicas else None
+
+
+@contextmanager
+def reading_from(alias: Optional[str]) -> Iterator[None]:
+    """
+    Route the reads made within the block to a database alias, None meaning the primary.
+    """
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Database router sending writes to the primary and reads where the request allows.
+
+    Reads go to the primary unless a block selects a replica with reading_from(), which
+    ReplicaRoutingMiddleware does for safe requests of clients that have not written
+    lately. Management commands, workers and write requests therefore read what they
+    write. Objects read from a replica follow their relations on the same replica.
+    """
+    def db_for_read(self, model, **hints) -> str:
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return _read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints) -> str:
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> Optional[bool]:
+        # replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
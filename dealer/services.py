@@ -0,0 +1,370 @@
+from collections import defaultdict
+from decimal import Decimal
+from typing import Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from .models import Store, Car, Transaction, TransactionSummary, PurchaseTicket, Change
+
+
+# rows per INSERT statement for batched writes
+BATCH_SIZE: int = 1000
+
+# attempts at the conditional budget debit before giving up on a bulk submission
+BULK_DEBIT_ATTEMPTS: int = 5
+
+# tickets applied per database transaction by the purchase worker
+PURCHASE_BATCH_SIZE: int = 500
+
+
+class InsufficientBudget(Exception):
+    """
+    Raised when the store does not have enough money to buy a car.
+    """
+
+
+class BudgetConflict(Exception):
+    """
+    Raised when the store budget keeps changing underneath a bulk submission.
+    """
+
+
+def bump_inventory_version(store_id: int, car_ids: Iterable[int] = (), deleted_car_ids: Iterable[int] = ()) -> None:
+    """
+    Invalidate the cached responses of a store, recount its inventory and log the change
+    after a change made outside this module.
+
+    Args:
+        store_id (int): The store changed.
+        car_ids (Iterable[int]): The cars added to or updated in the store.
+        deleted_car_ids (Iterable[int]): The cars removed from the store.
+    """
+    with transaction.atomic():
+        Store.objects.filter(pk=store_id).update(
+            inventory_version=F('inventory_version') + 1,
+            inventory_updated_at=Now(),
+            **Store.counted_inventory(),
+        )
+        Change.record(store_id, car_ids, deleted_car_ids)
+
+
+def submit_car(store: Store, make: str, model: str, price: Decimal) -> Car:
+    """
+    Buy a car for a store.
+
+    The budget check and debit are one conditional UPDATE, so concurrent submissions
+    can neither overdraw the store nor lose each other's updates.
+
+    Args:
+        store (Store): The store buying the car.
+        make (str): The make of the car.
+        model (str): The model of the car.
+        price (Decimal): The price the store pays.
+
+    Returns:
+        Car: The car added to the store inventory.
+
+    Raises:
+        InsufficientBudget: If the store does not have enough money to buy the car.
+    """
+    with transaction.atomic():
+        debited = Store.objects.filter(pk=store.pk, budget__gte=price).update(
+            budget=F('budget') - price,
+            inventory_version=F('inventory_version') + 1,
+            inventory_updated_at=Now(),
+            inventory_count=F('inventory_count') + 1,
+            inventory_value=F('inventory_value') + price,
+        )
+        if not debited:
+            raise InsufficientBudget('The store does not have enough money to buy this car.')
+
+        car = Car.objects.create(make=make, model=model, price=price, store=store)
+
+        # Create transaction object
+        Transaction.objects.create(
+            car_make=make,
+            car_model=model,
+            buyer=store.name,
+            seller='User',
+            transaction_type='bought',
+            transaction_amount=price,
+            store=store,
+            car=car,
+        )
+        TransactionSummary.record(store, 'bought', price)
+        Change.record(store.pk, car_ids=[car.pk])
+    return car
+
+
+def purchase_car(car_id: int, store_id: Optional[int] = None) -> Transaction:
+    """
+    Sell a car from a store inventory.
+
+    The car row is locked first, so concurrent buyers of the same car queue up and all
+    but the first find it gone. The store budget is credited with an F() expression.
+
+    Args:
+        car_id (int): The ID of the car to purchase.
+        store_id (Optional[int]): Only sell the car if it belongs to this store.
+
+    Returns:
+        Transaction: The sold transaction.
+
+    Raises:
+        Car.DoesNotExist: If the car does not exist, belongs to another store or has already been sold.
+    """
+    cars = Car.objects.select_for_update(of=('self',)).select_related('store')
+    if store_id is not None:
+        cars = cars.filter(store_id=store_id)
+
+    with transaction.atomic():
+        car = cars.get(pk=car_id)
+        store = car.store
+
+        Store.objects.filter(pk=store.pk).update(
+            budget=F('budget') + car.price,
+            inventory_version=F('inventory_version') + 1,
+            inventory_updated_at=Now(),
+            inventory_count=F('inventory_count') - 1,
+            inventory_value=F('inventory_value') - car.price,
+        )
+
+        # Create transaction object
+        transaction_obj = Transaction.objects.create(
+            car_make=car.make,
+            car_model=car.model,
+            buyer='User',
+            seller=store.name,
+            transaction_type='sold',
+            transaction_amount=car.price,
+            store=store,
+            car=car,
+        )
+        TransactionSummary.record(store, 'sold', car.price)
+        Change.record(store.pk, deleted_car_ids=[car.pk])
+
+        Car.objects.filter(pk=car.pk).delete()
+    return transaction_obj
+
+
+def submit_cars_bulk(store: Store, cars: List[dict]) -> List[Optional[Car]]:
+    """
+    Buy many cars for a store, writing them in batched inserts.
+
+    Cars are accepted in the given order while the running total stays within the
+    store budget, and cars that would overdraw it are rejected. The budget is
+    debited with a single conditional UPDATE, so the write only succeeds if no
+    concurrent request has spent the money in the meantime. Otherwise the
+    selection is recomputed from the fresh budget.
+
+    Args:
+        store (Store): The store buying the cars.
+        cars (List[dict]): Validated car data with 'make', 'model' and 'price'.
+
+    Returns:
+        List[Optional[Car]]: The created car for each accepted item, None for each rejected item.
+
+    Raises:
+        BudgetConflict: If the budget changed concurrently on every attempt.
+    """
+    for _ in range(BULK_DEBIT_ATTEMPTS):
+        remaining = store.budget
+        accepted = []
+        for data in cars:
+            if data['price'] <= remaining:
+                remaining -= data['price']
+                accepted.append(data)
+            else:
+                accepted.append(None)
+
+        if all(data is None for data in accepted):
+            return [None] * len(cars)
+
+        total = sum((data['price'] for data in accepted if data is not None), Decimal('0'))
+        with transaction.atomic():
+            count = sum(data is not None for data in accepted)
+            debited = Store.objects.filter(pk=store.pk, budget__gte=total).update(
+                budget=F('budget') - total,
+                inventory_version=F('inventory_version') + 1,
+                inventory_updated_at=Now(),
+                inventory_count=F('inventory_count') + count,
+                inventory_value=F('inventory_value') + total,
+            )
+            if not debited:
+                store.refresh_from_db(fields=['budget'])
+                continue
+
+            new_cars = [Car(store=store, **data) for data in accepted if data is not None]
+            Car.objects.bulk_create(new_cars, batch_size=BATCH_SIZE)
+            Transaction.objects.bulk_create([
+                Transaction(
+                    car_make=car.make,
+                    car_model=car.model,
+                    buyer=store.name,
+                    seller='User',
+                    transaction_type='bought',
+                    transaction_amount=car.price,
+                    store=store,
+                    car=car,
+                )
+                for car in new_cars
+            ], batch_size=BATCH_SIZE)
+            TransactionSummary.record(store, 'bought', total, count=len(new_cars))
+            Change.record(store.pk, car_ids=[car.pk for car in new_cars])
+
+        store.budget -= total
+        created = iter(new_cars)
+        return [next(created) if data is not None else None for data in accepted]
+
+    raise BudgetConflict('The store budget changed during the submission. Please try again.')
+
+
+def enqueue_purchase(car_id: int, store_id: Optional[int] = None) -> PurchaseTicket:
+    """
+    Queue the sale of a car for the purchase worker.
+
+    Args:
+        car_id (int): The ID of the car to purchase.
+        store_id (Optional[int]): Only sell the car if it belongs to this store.
+
+    Returns:
+        PurchaseTicket: The pending ticket.
+
+    Raises:
+        Car.DoesNotExist: If the car does not exist or belongs to another store.
+    """
+    cars = Car.objects.filter(pk=car_id)
+    if store_id is not None:
+        cars = cars.filter(store_id=store_id)
+    if not cars.exists():
+        raise Car.DoesNotExist('Car not found.')
+    return PurchaseTicket.objects.create(car_id=car_id, store_id=store_id)
+
+
+def process_purchase_queue(batch_size: int = PURCHASE_BATCH_SIZE) -> int:
+    """
+    Apply a batch of pending purchase tickets in one database transaction.
+
+    The oldest pending tickets and their cars are locked, skipping tickets locked by
+    another worker. Each car goes to the first ticket asking for it, and the other
+    tickets fail, as concurrent synchronous buyers would. The cars are sold as by
+    purchase_cars() and the tickets updated with one batched statement, so the sales
+    of a batch share one commit.
+
+    Args:
+        batch_size (int): The largest number of tickets applied.
+
+    Returns:
+        int: The number of tickets processed, 0 once the queue is empty.
+    """
+    with transaction.atomic():
+        tickets = list(
+            PurchaseTicket.objects.select_for_update(skip_locked=True).filter(status='pending').order_by('id')[:batch_size]
+        )
+        if not tickets:
+            return 0
+
+        cars = _lock_cars({ticket.car_id for ticket in tickets})
+        sold = []
+        for ticket in tickets:
+            car = cars.get(ticket.car_id)
+            if car is None or (ticket.store_id is not None and car.store_id != ticket.store_id):
+                ticket.status = 'failed'
+                ticket.error = 'Car not found.'
+                continue
+            del cars[car.pk]
+            sold.append((ticket, car))
+
+        transactions = _sell_cars([car for _, car in sold])
+        for (ticket, _), transaction_obj in zip(sold, transactions):
+            ticket.status = 'completed'
+            ticket.transaction = transaction_obj
+
+        processed_at = timezone.now()
+        for ticket in tickets:
+            ticket.processed_at = processed_at
+        PurchaseTicket.objects.bulk_update(tickets, ['status', 'transaction', 'error', 'processed_at'], batch_size=BATCH_SIZE)
+    return len(tickets)
+
+
+def purchase_cars(car_ids: List[int], store_id: Optional[int] = None) -> List[Optional[Transaction]]:
+    """
+    Sell many cars in one database transaction.
+
+    The cars are locked in id order, so concurrent batches sharing cars wait for each
+    other instead of deadlocking. The sold transactions are inserted in one batch, each
+    store is credited once with the summed amount and the cars are deleted with one
+    statement, so the cost hardly grows with the number of cars.
+
+    Args:
+        car_ids (List[int]): The IDs of the cars to purchase.
+        store_id (Optional[int]): Only sell the cars belonging to this store.
+
+    Returns:
+        List[Optional[Transaction]]: The sold transaction for each requested car, None for cars
+            that do not exist, belong to another store, have already been sold or are repeated.
+    """
+    with transaction.atomic():
+        cars = _lock_cars(car_ids, store_id)
+        requested = [cars.pop(car_id, None) for car_id in car_ids]
+        transactions = iter(_sell_cars([car for car in requested if car is not None]))
+    return [next(transactions) if car is not None else None for car in requested]
+
+
+def _lock_cars(car_ids: Iterable[int], store_id: Optional[int] = None) -> dict:
+    """
+    Lock the cars with the given ids in id order, so concurrent sales cannot deadlock.
+
+    Returns:
+        dict: The cars found, with their stores, by id.
+    """
+    cars = Car.objects.select_for_update(of=('self',)).select_related('store').filter(pk__in=set(car_ids))
+    if store_id is not None:
+        cars = cars.filter(store_id=store_id)
+    return {car.pk: car for car in cars.order_by('pk')}
+
+
+def _sell_cars(cars: List[Car]) -> List[Transaction]:
+    """
+    Sell locked cars with batched statements: one transaction insert, one budget,
+    summary and change log update per store, in store id order, and one car delete.
+
+    Returns:
+        List[Transaction]: The sold transactions, in the order of the cars.
+    """
+    transactions = Transaction.objects.bulk_create([
+        Transaction(
+            car_make=car.make,
+            car_model=car.model,
+            buyer='User',
+            seller=car.store.name,
+            transaction_type='sold',
+            transaction_amount=car.price,
+            store=car.store,
+            car=car,
+        )
+        for car in cars
+    ], batch_size=BATCH_SIZE)
+
+    by_store = defaultdict(list)
+    for car in cars:
+        by_store[car.store].append(car)
+    for store in sorted(by_store, key=lambda store: store.pk):
+        store_cars = by_store[store]
+        amount = sum((car.price for car in store_cars), Decimal('0'))
+        Store.objects.filter(pk=store.pk).update(
+            budget=F('budget') + amount,
+            inventory_version=F('inventory_version') + 1,
+            inventory_updated_at=Now(),
+            inventory_count=F('inventory_count') - len(store_cars),
+            inventory_value=F('inventory_value') - amount,
+        )
+        TransactionSummary.record(store, 'sold', amount, count=len(store_cars))
+        Change.record(store.pk, deleted_car_ids=[car.pk for car in store_cars])
+
+    if cars:
+        Car.objects.filter(pk__in=[car.pk for car in cars]).delete()
+    return transactions
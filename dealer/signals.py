@@ -0,0 +1,12 @@
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from .models import Store, TransactionSummary
+
+
+@receiver(pre_delete, sender=Store)
+def unattribute_transaction_totals(sender, instance: Store, **kwargs) -> None:
+    """
+    Keep the totals of a deleted store's transactions, which outlive it without a store.
+    """
+    TransactionSummary.unattribute(instance)
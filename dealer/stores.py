@@ -0,0 +1,65 @@
+from typing import Optional
+
+from django.http import HttpRequest
+
+from .models import Store
+
+
+# request header selecting the store on routes without a store in the URL
+STORE_HEADER: str = 'HTTP_X_STORE_ID'
+
+
+class InvalidStore(Exception):
+    """
+    Raised when the store requested by the client is not a valid store id.
+    """
+
+
+def requested_store_id(request: HttpRequest, store_id: Optional[int] = None) -> Optional[int]:
+    """
+    Return the id of the store a request is scoped to.
+
+    The store in the URL takes precedence over the X-Store-Id header.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        store_id (Optional[int]): The store id captured from the URL, if any.
+
+    Returns:
+        Optional[int]: The requested store id, or None if the request names no store.
+
+    Raises:
+        InvalidStore: If the header is not a valid store id.
+    """
+    if store_id is not None:
+        return store_id
+    header = request.META.get(STORE_HEADER)
+    if header is None:
+        return None
+    if not header.isdigit():
+        raise InvalidStore('The X-Store-Id header must be a store id.')
+    return int(header)
+
+
+def get_store(store_id: Optional[int]) -> Store:
+    """
+    Fetch the store a write is routed to.
+
+    Requests naming no store fall back to the first store, which keeps single-store
+    deployments working unchanged.
+
+    Args:
+        store_id (Optional[int]): The requested store id, or None.
+
+    Returns:
+        Store: The store.
+
+    Raises:
+        Store.DoesNotExist: If the store does not exist.
+    """
+    if store_id is not None:
+        return Store.objects.get(pk=store_id)
+    store = Store.objects.first()
+    if store is None:
+        raise Store.DoesNotExist('No store found.')
+    return store
@@ -0,0 +1,591 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.urls import reverse
+from django.utils import timezone
+
+from dealer import services
+from dealer.api.serializers import CarSerializer, TransactionSerializer
+from dealer.exports import accepts_gzip
+from dealer.models import Store, Car, Transaction, TransactionRollup
+
+
+class CarListPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = Store.objects.create(name='Test Store', budget=25000)
+        # Repeated prices, makes and models so that pages split inside runs of equal values
+        for i in range(25):
+            Car.objects.create(make=f'Make{i % 3}', model=f'Model{i % 4}', price=1000 + (i % 5) * 100, store=cls.store)
+
+    def fetch_all(self, ordering: str, page_size: int = 4) -> list:
+        ids = []
+        url = f"{reverse('car-list')}?ordering={ordering}&page_size={page_size}"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.json()['results']), page_size)
+            ids.extend(car['id'] for car in response.json()['results'])
+            url = response.json()['next']
+        return ids
+
+    def test_every_ordering_visits_each_car_once_in_order(self):
+        for ordering in ['price', '-price', 'make', '-make', 'model', '-model', 'submission_date', '-submission_date']:
+            with self.subTest(ordering=ordering):
+                pk_ordering = '-pk' if ordering.startswith('-') else 'pk'
+                expected = list(Car.objects.order_by(ordering, pk_ordering).values_list('id', flat=True))
+                self.assertEqual(self.fetch_all(ordering), expected)
+
+    def test_first_page_has_next_link(self):
+        response = self.client.get(reverse('car-list'), {'page_size': 10})
+        self.assertEqual(len(response.json()['results']), 10)
+        self.assertIn('cursor=', response.json()['next'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('car-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_from_other_ordering(self):
+        response = self.client.get(reverse('car-list'), {'ordering': 'price', 'page_size': 2})
+        cursor = response.json()['next'].split('cursor=')[1].split('&')[0]
+        response = self.client.get(reverse('car-list'), {'ordering': 'make', 'cursor': cursor})
+        self.assertEqual(response.status_code, 400)
+
+
+class TransactionListPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(7):
+            Transaction.objects.create(transaction_type='bought', transaction_amount=Decimal('100.00') * i)
+
+    def test_pages(self):
+        response = self.client.get(reverse('transaction-list'), {'page_size': 5})
+        self.assertEqual(len(response.json()['results']), 5)
+        response = self.client.get(response.json()['next'])
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertIsNone(response.json()['next'])
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = Store.objects.create(name='Test Store', budget=25000)
+        Car.objects.create(make='Škoda', model='Octavia', price=Decimal('5000.50'), store=cls.store)
+        Car.objects.create(make='Make, Inc.', model='Model "2"', price=7500, store=cls.store)
+        Transaction.objects.create(car_make='Škoda', car_model='Octavia', buyer='Test Store', seller='User',
+                                   transaction_type='bought', transaction_amount=Decimal('5000.50'))
+
+    def read(self, response) -> bytes:
+        return b''.join(response.streaming_content)
+
+    def test_ndjson_matches_serializers(self):
+        response = self.client.get(reverse('export', args=['cars', 'ndjson']))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in self.read(response).decode().splitlines()]
+        self.assertEqual(rows, CarSerializer(Car.objects.order_by('id'), many=True).data)
+
+        response = self.client.get(reverse('export', args=['transactions', 'ndjson']))
+        rows = [json.loads(line) for line in self.read(response).decode().splitlines()]
+        self.assertEqual(rows, TransactionSerializer(Transaction.objects.order_by('id'), many=True).data)
+
+    def test_csv(self):
+        response = self.client.get(reverse('export', args=['cars', 'csv']))
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(io.StringIO(self.read(response).decode())))
+        self.assertEqual(rows[0], ['id', 'make', 'model', 'price', 'store', 'submission_date'])
+        self.assertEqual(rows[2][1:4], ['Make, Inc.', 'Model "2"', '7500.00'])
+
+    def test_gzip(self):
+        response = self.client.get(reverse('export', args=['cars', 'ndjson']), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(gzip.decompress(self.read(response)).splitlines()), 2)
+
+    def test_gzip_refused(self):
+        for accept_encoding in ('gzip;q=0', 'br, gzip; q=0.0', '*;q=0', 'identity'):
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.client.get(reverse('export', args=['cars', 'ndjson']), HTTP_ACCEPT_ENCODING=accept_encoding)
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(len(self.read(response).splitlines()), 2)
+
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip('gzip, deflate, br'))
+        self.assertTrue(accepts_gzip('br;q=1.0, gzip;q=0.5'))
+        self.assertTrue(accepts_gzip('*'))
+        self.assertFalse(accepts_gzip('gzip;q=0, *'))
+        self.assertFalse(accepts_gzip(''))
+
+    def test_unknown_export(self):
+        response = self.client.get(reverse('export', args=['stores', 'ndjson']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'transactions.csv.gz')
+            call_command('export_data', 'transactions', '--format', 'csv', '--gzip', '--output', path)
+            with gzip.open(path, 'rt') as output:
+                self.assertEqual(len(output.read().splitlines()), 2)
+
+
+class StoreScopedApiTest(TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name='Store A', budget=Decimal('10000.00'))
+        self.other_store = Store.objects.create(name='Store B', budget=Decimal('10000.00'))
+
+    def test_submit_to_store_in_url(self):
+        url = reverse('store-car-submit', kwargs={'store_id': self.other_store.id})
+        response = self.client.post(url, {'make': 'Make', 'model': 'Model', 'price': 4000})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Store.objects.get(pk=self.store.pk).budget, Decimal('10000.00'))
+        self.assertEqual(Store.objects.get(pk=self.other_store.pk).budget, Decimal('6000.00'))
+        self.assertEqual(Transaction.objects.get().buyer, 'Store B')
+
+    def test_submit_to_store_in_header(self):
+        response = self.client.post(reverse('car-submit'), {'make': 'Make', 'model': 'Model', 'price': 4000},
+                                    HTTP_X_STORE_ID=str(self.other_store.id))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Car.objects.get().store, self.other_store)
+
+    def test_submit_to_unknown_store(self):
+        url = reverse('store-car-submit', kwargs={'store_id': 999})
+        response = self.client.post(url, {'make': 'Make', 'model': 'Model', 'price': 4000})
+        self.assertEqual(response.status_code, 404)
+
+    def test_bulk_submit_to_store(self):
+        url = reverse('store-car-submit-bulk', kwargs={'store_id': self.other_store.id})
+        response = self.client.post(url, [{'make': 'Make', 'model': 'Model', 'price': '100'}], content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Car.objects.get().store, self.other_store)
+
+    def test_buy_only_from_own_store(self):
+        car = Car.objects.create(make='Make', model='Model', price=1000, store=self.store)
+
+        response = self.client.post(reverse('store-car-buy', kwargs={'store_id': self.other_store.id, 'car_id': car.id}))
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Car.objects.filter(pk=car.pk).exists())
+
+        response = self.client.post(reverse('store-car-buy', kwargs={'store_id': self.store.id, 'car_id': car.id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Store.objects.get(pk=self.store.pk).budget, Decimal('11000.00'))
+
+    def test_store_car_list(self):
+        Car.objects.create(make='Make1', model='Model', price=1000, store=self.store)
+        Car.objects.create(make='Make2', model='Model', price=1000, store=self.other_store)
+
+        response = self.client.get(reverse('store-car-list', kwargs={'store_id': self.other_store.id}))
+        self.assertEqual([car['make'] for car in response.json()['results']], ['Make2'])
+
+        response = self.client.get(reverse('car-list'), HTTP_X_STORE_ID=str(self.store.id))
+        self.assertEqual([car['make'] for car in response.json()['results']], ['Make1'])
+
+    def test_invalid_store_header(self):
+        response = self.client.get(reverse('car-list'), HTTP_X_STORE_ID='first')
+        self.assertEqual(response.status_code, 400)
+
+
+class TransactionFilterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = Store.objects.create(name='Store A', budget=Decimal('10000.00'))
+        cls.other_store = Store.objects.create(name='Store B', budget=Decimal('10000.00'))
+        cls.car = Car.objects.create(make='Make', model='Model', price=1000, store=cls.store)
+        Transaction.objects.create(transaction_type='bought', transaction_amount=1000, store=cls.store, car=cls.car)
+        Transaction.objects.create(transaction_type='sold', transaction_amount=2000, store=cls.store)
+        Transaction.objects.create(transaction_type='sold', transaction_amount=3000, store=cls.other_store)
+        old = Transaction.objects.create(transaction_type='sold', transaction_amount=4000, store=cls.store)
+        Transaction.objects.filter(pk=old.pk).update(transaction_date='2020-01-15T12:00:00Z')
+
+    def amounts(self, **params) -> list:
+        response = self.client.get(reverse('transaction-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return [int(Decimal(item['transaction_amount'])) for item in response.json()['results']]
+
+    def test_filters(self):
+        self.assertEqual(self.amounts(store=self.store.id), [1000, 2000, 4000])
+        self.assertEqual(self.amounts(store=self.store.id, type='sold'), [2000, 4000])
+        self.assertEqual(self.amounts(car=self.car.id), [1000])
+        self.assertEqual(self.amounts(date_to='2020-01-15'), [4000])
+        self.assertEqual(self.amounts(date_from='2020-01-16', type='sold'), [2000, 3000])
+        self.assertEqual(self.amounts(date_from='2020-01-15T12:00:00', date_to='2020-01-15T12:00:00'), [4000])
+
+    def test_invalid_filters(self):
+        for params in [{'store': 'x'}, {'type': 'leased'}, {'date_from': 'yesterday'}]:
+            with self.subTest(params=params):
+                response = self.client.get(reverse('transaction-list'), params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_sold_car_keeps_transaction_links(self):
+        response = self.client.post(reverse('car-buy', kwargs={'car_id': self.car.id}))
+        self.assertEqual(response.status_code, 200)
+
+        sold = Transaction.objects.get(car_id=self.car.id, transaction_type='sold')
+        self.assertEqual(sold.store, self.store)
+        self.assertEqual(self.amounts(car=self.car.id), [1000, 1000])
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = Store.objects.create(name='Test Store', budget=Decimal('10000.00'))
+        services.submit_car(cls.store, 'Make', 'Model', Decimal('1000.00'))
+
+    def urls(self) -> list:
+        return [
+            reverse('car-list'),
+            reverse('store-detail', kwargs={'pk': self.store.id}),
+            reverse('store-detail', kwargs={'pk': self.store.id}) + '?include=cars',
+            reverse('transaction-summary'),
+        ]
+
+    def test_if_none_match_skips_the_view(self):
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response['ETag'].startswith('"'))
+                self.assertIn('Last-Modified', response)
+
+                # One query for the validators, none for the body
+                with self.assertNumQueries(1):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_if_modified_since(self):
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+                self.assertEqual(response.status_code, 304)
+
+    def test_write_changes_etag(self):
+        etags = [self.client.get(url)['ETag'] for url in self.urls()]
+        services.submit_car(self.store, 'Make', 'Other', Decimal('500.00'))
+
+        for url, etag in zip(self.urls(), etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_query(self):
+        url = reverse('car-list')
+        self.assertNotEqual(self.client.get(url)['ETag'], self.client.get(url, {'ordering': 'make'})['ETag'])
+
+    def test_errors_carry_no_validators(self):
+        response = self.client.get(reverse('transaction-summary'), {'store': 'x'})
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('ETag', response)
+
+
+class AsyncApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = Store.objects.create(name='Test Store', budget=Decimal('10000.00'))
+        services.submit_car(cls.store, 'Make0', 'Model', Decimal('1000.00'))
+        services.submit_car(cls.store, 'Make1', 'Model', Decimal('2000.00'))
+        services.purchase_car(Car.objects.get(make='Make0').id)
+
+    async def test_matches_sync_views(self):
+        for sync_name, async_name, kwargs, params in [
+            ('store-list-create', 'async-store-list', {}, {}),
+            ('store-detail', 'async-store-detail', {'pk': self.store.id}, {}),
+            ('store-detail', 'async-store-detail', {'pk': self.store.id}, {'include': 'cars'}),
+            ('car-list', 'async-car-list', {}, {'ordering': '-price'}),
+            ('store-car-list', 'async-store-car-list', {'store_id': self.store.id}, {}),
+            ('transaction-list', 'async-transaction-list', {}, {'page_size': 1}),
+            ('transaction-list', 'async-transaction-list', {}, {'type': 'sold'}),
+            ('transaction-summary', 'async-transaction-summary', {}, {'store': self.store.id}),
+        ]:
+            with self.subTest(view=async_name, params=params):
+                expected = await self.async_client.get(reverse(sync_name, kwargs=kwargs), params)
+                response = await self.async_client.get(reverse(async_name, kwargs=kwargs), params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], expected['Content-Type'])
+                self.assertEqual(response.content.replace(b'/async', b''), expected.content)
+
+    async def test_errors(self):
+        response = await self.async_client.get(reverse('async-store-detail', kwargs={'pk': 999999}))
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get(reverse('async-car-list'), {'cursor': 'x'})
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.get(reverse('async-transaction-list'), {'type': 'leased'})
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.post(reverse('async-car-list'))
+        self.assertEqual(response.status_code, 405)
+
+    # the applications serve requests on other threads, which SQLite locks out of the test transaction
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_benchmark_command(self):
+        output = io.StringIO()
+        call_command('benchmark_asgi', '--requests', '2', '--concurrency', '2', stdout=output, stderr=output)
+        self.assertIn('/api/cars/', output.getvalue())
+        self.assertNotIn('failed', output.getvalue())
+
+
+class CarSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = Store.objects.create(name='Store A', budget=Decimal('100000.00'))
+        cls.other_store = Store.objects.create(name='Store B', budget=Decimal('100000.00'))
+        Car.objects.create(make='Toyota', model='Corolla', price=1000, store=cls.store)
+        Car.objects.create(make='Toyota', model='Camry', price=2000, store=cls.store)
+        Car.objects.create(make='Tesla', model='Model 3', price=3000, store=cls.store)
+        Car.objects.create(make='Skoda', model='Octavia 100%', price=4000, store=cls.other_store)
+        old = Car.objects.create(make='Ford', model='Mustang', price=5000, store=cls.other_store)
+        Car.objects.filter(pk=old.pk).update(submission_date='2020-01-15T12:00:00Z')
+
+    def models(self, url=None, **params) -> list:
+        response = self.client.get(url or reverse('car-search'), params)
+        self.assertEqual(response.status_code, 200)
+        return [car['model'] for car in response.json()['results']]
+
+    def test_filters(self):
+        self.assertEqual(self.models(make='toy'), ['Corolla', 'Camry'])
+        self.assertEqual(self.models(make='T', model='c'), ['Corolla', 'Camry'])
+        self.assertEqual(self.models(q='AMR'), ['Camry'])
+        self.assertEqual(self.models(q='oda'), ['Octavia 100%'])
+        self.assertEqual(self.models(q='00%'), ['Octavia 100%'])
+        self.assertEqual(self.models(price_min='2000', price_max='3000.00'), ['Camry', 'Model 3'])
+        self.assertEqual(self.models(date_to='2020-01-15'), ['Mustang'])
+        self.assertEqual(self.models(date_from='2020-01-16', make='S'), ['Octavia 100%'])
+        self.assertEqual(self.models(make='Toyota', ordering='-price'), ['Camry', 'Corolla'])
+
+    def test_store_scope_and_pagination(self):
+        url = reverse('store-car-search', kwargs={'store_id': self.store.id})
+        self.assertEqual(self.models(url, make='t'), ['Corolla', 'Camry', 'Model 3'])
+
+        response = self.client.get(url, {'make': 't', 'page_size': 2})
+        self.assertEqual(len(response.json()['results']), 2)
+        response = self.client.get(response.json()['next'])
+        self.assertEqual([car['model'] for car in response.json()['results']], ['Model 3'])
+
+    def test_invalid_filters(self):
+        for params in [{'q': 'ab'}, {'price_min': 'cheap'}, {'price_max': 'NaN'}, {'date_from': 'yesterday'}]:
+            with self.subTest(params=params):
+                response = self.client.get(reverse('car-search'), params)
+                self.assertEqual(response.status_code, 400)
+
+
+class CarFacetsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = Store.objects.create(name='Store A', budget=Decimal('100000.00'))
+        cls.other_store = Store.objects.create(name='Store B', budget=Decimal('100000.00'))
+        Car.objects.create(make='Toyota', model='Corolla', price=Decimal('1000.00'), store=cls.store)
+        Car.objects.create(make='Toyota', model='Corolla', price=Decimal('6000.00'), store=cls.store)
+        Car.objects.create(make='Toyota', model='Camry', price=Decimal('7000.50'), store=cls.store)
+        Car.objects.create(make='Tesla', model='Model 3', price=Decimal('12000.00'), store=cls.other_store)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_facets(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('car-facets'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'count': 4,
+            'price': {'min': '1000.00', 'avg': '6500.12', 'max': '12000.00'},
+            'makes': [{'make': 'Toyota', 'count': 3}, {'make': 'Tesla', 'count': 1}],
+            'models': [
+                {'make': 'Toyota', 'model': 'Corolla', 'count': 2},
+                {'make': 'Tesla', 'model': 'Model 3', 'count': 1},
+                {'make': 'Toyota', 'model': 'Camry', 'count': 1},
+            ],
+            'price_bands': [
+                {'from': '0.00', 'to': '5000.00', 'count': 1},
+                {'from': '5000.00', 'to': '10000.00', 'count': 2},
+                {'from': '10000.00', 'to': '15000.00', 'count': 1},
+            ],
+        })
+
+    def test_filters_and_store(self):
+        url = reverse('store-car-facets', kwargs={'store_id': self.store.id})
+        data = self.client.get(url, {'model': 'co', 'price_band': '1000'}).json()
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(data['price_bands'], [
+            {'from': '1000.00', 'to': '2000.00', 'count': 1},
+            {'from': '6000.00', 'to': '7000.00', 'count': 1},
+        ])
+
+        data = self.client.get(reverse('car-facets'), {'make': 'Ford'}).json()
+        self.assertEqual(data['count'], 0)
+        self.assertEqual(data['price'], {'min': None, 'avg': None, 'max': None})
+
+    def test_cached_until_inventory_changes(self):
+        self.client.get(reverse('car-facets'))
+        with self.assertNumQueries(1):
+            self.client.get(reverse('car-facets'))
+
+        services.submit_car(self.store, 'Ford', 'Focus', Decimal('500.00'))
+        self.assertEqual(self.client.get(reverse('car-facets')).json()['count'], 5)
+
+    def test_invalid_parameters(self):
+        for params in [{'price_band': '10'}, {'price_band': 'wide'}, {'price_min': 'x'}]:
+            with self.subTest(params=params):
+                response = self.client.get(reverse('car-facets'), params)
+                self.assertEqual(response.status_code, 400)
+
+
+class ChangeFeedTest(TransactionTestCase):
+    """
+    Runs outside a test transaction, as PostgreSQL only serves the changes of finished transactions.
+    """
+    def setUp(self):
+        self.store = Store.objects.create(name='Test Store', budget=Decimal('10000.00'))
+        self.other_store = Store.objects.create(name='Other Store', budget=Decimal('10000.00'))
+
+    def sync(self, url: str, **params) -> tuple:
+        """
+        Follow the feed until no more changes are waiting, returning the results and the link to poll next.
+        """
+        results = []
+        while True:
+            data = self.client.get(url, params).json()
+            params = {}
+            results += data['results']
+            url = data['next']
+            if not data['more']:
+                return results, url
+
+    def test_incremental_sync(self):
+        kept = services.submit_car(self.store, 'Make0', 'Model', Decimal('1000.00'))
+        sold = services.submit_car(self.store, 'Make1', 'Model', Decimal('2000.00'))
+        results, next_url = self.sync(reverse('change-feed'), page_size=2)
+        # entries of the same object are merged within a page, each showing its current state
+        self.assertEqual([(item['kind'], item['id'], item['deleted']) for item in results], [
+            ('store', self.store.pk, False), ('car', kept.pk, False), ('store', self.store.pk, False), ('car', sold.pk, False),
+        ])
+        self.assertEqual(results[1]['data'], CarSerializer(kept).data)
+        self.assertEqual(results[0]['data']['budget'], '7000.00')
+
+        results, _ = self.sync(reverse('change-feed'))
+        self.assertEqual([(item['kind'], item['id']) for item in results], [
+            ('car', kept.pk), ('store', self.store.pk), ('car', sold.pk),
+        ])
+
+        services.purchase_car(sold.pk)
+        services.submit_cars_bulk(self.other_store, [{'make': 'Make2', 'model': 'Model', 'price': Decimal('10.00')}])
+        results, next_url = self.sync(next_url)
+        other_car = Car.objects.get(make='Make2')
+        self.assertEqual([(item['kind'], item['id'], item['deleted']) for item in results], [
+            ('store', self.store.pk, False), ('car', sold.pk, True),
+            ('store', self.other_store.pk, False), ('car', other_car.pk, False),
+        ])
+        self.assertIsNone(results[1]['data'])
+
+        results, _ = self.sync(next_url)
+        self.assertEqual(results, [])
+
+    def test_store_feed(self):
+        services.submit_car(self.store, 'Make0', 'Model', Decimal('1000.00'))
+        services.submit_car(self.other_store, 'Make1', 'Model', Decimal('1000.00'))
+
+        results, _ = self.sync(reverse('change-feed'), store=self.other_store.pk)
+        self.assertEqual({item['store'] for item in results}, {self.other_store.pk})
+        self.assertEqual(len(results), 2)
+
+    def test_query_count(self):
+        for i in range(20):
+            services.submit_car(self.store, f'Make{i}', 'Model', Decimal('10.00'))
+        # log entries, cars, stores
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('change-feed'))
+        self.assertEqual(len(response.json()['results']), 21)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('change-feed'), {'since': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+
+class StoreInventoryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = Store.objects.create(name='Test Store', budget=Decimal('10000.00'))
+        services.submit_car(cls.store, 'Make0', 'Model', Decimal('1000.00'))
+        services.submit_car(cls.store, 'Make1', 'Model', Decimal('2000.50'))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_store_detail_reads_no_car(self):
+        url = reverse('store-detail', kwargs={'pk': self.store.id})
+        # validators, store
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertNotIn('cars', response.data)
+        self.assertEqual(response.data['store']['inventory_count'], 2)
+        self.assertEqual(response.data['store']['inventory_value'], '3000.50')
+
+        response = self.client.get(url, {'include': 'cars'})
+        self.assertEqual([car['make'] for car in response.data['cars']], ['Make0', 'Make1'])
+
+    def test_store_list(self):
+        response = self.client.get(reverse('store-list-create'))
+        self.assertEqual(response.data[0]['inventory_count'], 2)
+        self.assertIsNotNone(response.data[0]['inventory_updated_at'])
+
+
+class TransactionTimeseriesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = Store.objects.create(name='Test Store', budget=Decimal('10000.00'))
+        cls.other_store = Store.objects.create(name='Other Store', budget=Decimal('10000.00'))
+        cls.today = timezone.localdate()
+        car = services.submit_car(cls.store, 'Make', 'Model', Decimal('1000.00'))
+        services.submit_car(cls.other_store, 'Make', 'Model', Decimal('300.00'))
+        services.purchase_car(car.id, cls.store.id)
+        # earlier days, as left by the backfill
+        TransactionRollup.objects.bulk_create([
+            TransactionRollup(store=cls.store, day=cls.today - timedelta(days=2), transaction_type='bought', count=2, amount=Decimal('500.00')),
+            TransactionRollup(store=cls.store, day=cls.today - timedelta(days=40), transaction_type='sold', count=1, amount=Decimal('90.00')),
+        ])
+
+    def test_daily_series(self):
+        url = reverse('transaction-timeseries')
+        # validators, rollups
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'from': (self.today - timedelta(days=2)).isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['granularity'], 'day')
+        self.assertEqual([entry['period'] for entry in response.data['results']], [self.today - timedelta(days=n) for n in (2, 1, 0)])
+        self.assertEqual(response.data['results'][0]['bought_count'], 2)
+        self.assertEqual(response.data['results'][1]['bought_count'], 0)
+        self.assertEqual(response.data['results'][1]['sold_amount'], 0)
+        today = response.data['results'][2]
+        self.assertEqual((today['bought_count'], today['bought_amount']), (2, Decimal('1300.00')))
+        self.assertEqual((today['sold_count'], today['sold_amount']), (1, Decimal('1000.00')))
+
+    def test_store_and_granularity(self):
+        response = self.client.get(reverse('transaction-timeseries'), {'granularity': 'month', 'store': self.store.id})
+        periods = response.data['results']
+        # the series starts at the month of the first rollup of the store
+        self.assertEqual(periods[0]['period'], (self.today - timedelta(days=40)).replace(day=1))
+        self.assertEqual(periods[-1]['period'], self.today.replace(day=1))
+        self.assertEqual(sum(entry['bought_count'] for entry in periods), 3)
+        self.assertEqual(sum(entry['sold_amount'] for entry in periods), Decimal('1090.00'))
+
+        response = self.client.get(reverse('transaction-timeseries'), {'granularity': 'week', 'from': self.today.isoformat(), 'to': self.today.isoformat()})
+        self.assertEqual([entry['period'] for entry in response.data['results']], [self.today - timedelta(days=self.today.weekday())])
+
+    def test_invalid_parameters(self):
+        url = reverse('transaction-timeseries')
+        for params in ({'granularity': 'year'}, {'from': 'yesterday'}, {'store': 'x'},
+                       {'from': self.today.isoformat(), 'to': (self.today - timedelta(days=1)).isoformat()},
+                       {'from': '1900-01-01'}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400, params)
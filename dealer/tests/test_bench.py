@@ -0,0 +1,59 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from dealer import bench
+from dealer.management.commands.bench import BASELINE_PATH
+
+
+class BenchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.fixtures = bench.seed(stores=2, cars=50, transactions=50)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_every_url_has_a_case(self):
+        self.assertEqual(sorted(bench.url_names()), sorted(case.name for case in bench.CASES))
+
+    def test_query_counts_within_baseline(self):
+        results = bench.run(self.fixtures, iterations=2)
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertLess(result['status'], 400)
+
+        with open(BASELINE_PATH) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        # Latency depends on the machine, so only the query counts are gated here
+        self.assertEqual(bench.compare(results, baseline, latency_tolerance=float('inf')), [])
+
+    def test_compare(self):
+        baseline = {'car-list': {'queries': 1, 'p95_ms': 10.0}}
+        self.assertEqual(bench.compare({'car-list': {'queries': 1, 'p95_ms': 14.0}}, baseline, 0.5), [])
+        self.assertEqual(len(bench.compare({'car-list': {'queries': 2, 'p95_ms': 16.0}}, baseline, 0.5)), 2)
+        self.assertEqual(bench.compare({'other': {'queries': 9, 'p95_ms': 99.0}}, baseline, 0.5), [])
+
+    def test_merge_baseline(self):
+        baseline = {
+            'car-list': {'status': 200, 'queries': 1, 'p95_ms': 10.0},
+            'car-buy': {'status': 200, 'queries': 8, 'p95_ms': 20.0},
+            'removed': {'status': 200, 'queries': 1, 'p95_ms': 5.0},
+        }
+        results = {
+            'car-list': {'status': 200, 'queries': 1, 'p95_ms': 12.0},
+            'car-buy': {'status': 200, 'queries': 9, 'p95_ms': 21.0},
+            'added': {'status': 200, 'queries': 2, 'p95_ms': 7.0},
+        }
+        self.assertEqual(bench.merge_baseline(results, baseline), {
+            'car-list': baseline['car-list'],
+            'car-buy': results['car-buy'],
+            'added': results['added'],
+        })
+
+    def test_percentile(self):
+        values = [float(value) for value in range(1, 101)]
+        self.assertEqual(bench.percentile(values, 50), 50.0)
+        self.assertEqual(bench.percentile(values, 99), 99.0)
+        self.assertEqual(bench.percentile([3.0], 95), 3.0)
@@ -0,0 +1,105 @@
+import threading
+
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from dealer.cache import get_or_build, inventory_version, versioned_key
+from dealer.models import Store, Car
+
+
+class VersionedCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.store = Store.objects.create(name='Test Store', budget=Decimal('10000.00'))
+        Car.objects.create(make='Make1', model='Model', price=1000, store=self.store)
+
+    def test_car_list_is_cached_until_inventory_changes(self):
+        url = reverse('store-car-list', kwargs={'store_id': self.store.id})
+        self.client.get(url)
+
+        # only the version is read on a hit
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(len(response.json()['results']), 1)
+
+        self.client.post(reverse('store-car-submit', kwargs={'store_id': self.store.id}),
+                         {'make': 'Make2', 'model': 'Model', 'price': 1000})
+        response = self.client.get(url)
+        self.assertEqual([car['make'] for car in response.json()['results']], ['Make1', 'Make2'])
+
+        response = self.client.get(reverse('car-list'))
+        car_id = response.json()['results'][0]['id']
+        self.client.post(reverse('car-buy', kwargs={'car_id': car_id}))
+        response = self.client.get(reverse('car-list'))
+        self.assertEqual([car['make'] for car in response.json()['results']], ['Make2'])
+
+    def test_orderings_are_cached_separately(self):
+        Car.objects.create(make='Make0', model='Model', price=2000, store=self.store)
+        response = self.client.get(reverse('car-list'), {'ordering': 'price'})
+        self.assertEqual(response.json()['results'][0]['make'], 'Make1')
+        response = self.client.get(reverse('car-list'), {'ordering': 'make'})
+        self.assertEqual(response.json()['results'][0]['make'], 'Make0')
+
+    def test_store_detail_follows_budget(self):
+        url = reverse('store-detail', kwargs={'pk': self.store.id}) + '?include=cars'
+        self.client.get(url)
+        self.client.post(reverse('car-submit'), {'make': 'Make2', 'model': 'Model', 'price': 500})
+
+        response = self.client.get(url)
+        self.assertEqual(response.data['store']['budget'], '9500.00')
+        self.assertEqual(len(response.data['cars']), 2)
+
+    def test_html_car_list(self):
+        self.client.get(reverse('car_list'))
+        self.client.post(reverse('submit_car'), {'make': 'Make2', 'model': 'Model', 'price': 500})
+        response = self.client.get(reverse('car_list'))
+        self.assertEqual(len(response.context['cars']), 2)
+
+    def test_versions(self):
+        version = inventory_version(self.store.id)
+        combined = inventory_version()
+        self.client.post(reverse('car-submit'), {'make': 'Make2', 'model': 'Model', 'price': 500})
+        self.assertNotEqual(inventory_version(self.store.id), version)
+        self.assertNotEqual(inventory_version(), combined)
+
+
+class StampedeProtectionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_only_one_builder(self):
+        key = versioned_key('test', None, 1)
+        started = threading.Event()
+        release = threading.Event()
+        builds = []
+
+        def slow_build():
+            builds.append(1)
+            started.set()
+            release.wait(5)
+            return 'value'
+
+        results = []
+        builder = threading.Thread(target=lambda: results.append(get_or_build(key, slow_build)))
+        builder.start()
+        started.wait(5)
+
+        waiter = threading.Thread(target=lambda: results.append(get_or_build(key, slow_build)))
+        waiter.start()
+        release.set()
+        builder.join()
+        waiter.join()
+
+        self.assertEqual(results, ['value', 'value'])
+        self.assertEqual(len(builds), 1)
+
+    def test_waiter_builds_when_builder_stalls(self):
+        key = versioned_key('test', None, 2)
+        cache.add(f'{key}:lock', 1)
+
+        with mock.patch('dealer.cache.REBUILD_LOCK_TIMEOUT', 0.05), mock.patch('dealer.cache.REBUILD_POLL_INTERVAL', 0.01):
+            self.assertEqual(get_or_build(key, lambda: 'value'), 'value')
@@ -0,0 +1,169 @@
+import io
+import json
+
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+
+from dealer.api.columnar import ColumnarEncoder, ColumnarRenderer
+from dealer.api.encoders import RowEncoder, render_page
+from dealer.api.serializers import CarSerializer, StoreSerializer, TransactionSerializer
+from dealer.models import Store, Car, Transaction
+
+
+class EncoderTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = Store.objects.create(name='Store "Ü"', budget=Decimal('10000.00'))
+        Store.objects.create(name='Overdrawn', budget=Decimal('-0.05'))
+        Car.objects.create(make='Škoda', model='Octavia RS', price=Decimal('0.50'), store=cls.store)
+        Car.objects.create(make='Make "quoted" \\ slash', model='Model\n\u2028', price=Decimal('12345678.00'), store=cls.store)
+        car = Car.objects.create(make='Make', model='Model', price=Decimal('1000.00'), store=cls.store)
+        Transaction.objects.create(transaction_type='bought', transaction_amount=Decimal('1000.00'), store=cls.store, car=car, buyer='Ü')
+        Transaction.objects.create(transaction_type='sold', transaction_amount=Decimal('99.99'), car_id=999999)
+        Transaction.objects.create(transaction_type='sold', transaction_amount=Decimal('1.00'))
+
+
+class RowEncoderTest(EncoderTestCase):
+    def assertEncodesLikeSerializer(self, serializer_class):
+        queryset = serializer_class.Meta.model.objects.order_by('id')
+        expected = JSONRenderer().render({'next': None, 'results': serializer_class(queryset, many=True).data})
+        for cents in (False, True):
+            with self.subTest(cents=cents):
+                encoder = RowEncoder(serializer_class, cents=cents)
+                self.assertEqual(render_page(None, encoder.encode(queryset.values_list(*encoder.columns))), expected)
+
+    def test_cars(self):
+        self.assertEncodesLikeSerializer(CarSerializer)
+
+    def test_transactions(self):
+        self.assertEncodesLikeSerializer(TransactionSerializer)
+
+    def test_stores(self):
+        self.assertEncodesLikeSerializer(StoreSerializer)
+
+    def test_cents_columns(self):
+        self.assertEqual(RowEncoder(CarSerializer).columns, tuple(CarSerializer.Meta.fields))
+        self.assertIn('price_cents', RowEncoder(CarSerializer, cents=True).columns)
+        self.assertNotIn('price', RowEncoder(CarSerializer, cents=True).columns)
+
+    def test_list_endpoints_match_serializers(self):
+        for url, serializer_class in [(reverse('car-list'), CarSerializer), (reverse('transaction-list'), TransactionSerializer)]:
+            with self.subTest(url=url):
+                response = self.client.get(url, {'page_size': 2})
+                model = serializer_class.Meta.model
+                page = model.objects.order_by('price' if model is Car else 'id', 'id')[:2]
+                expected = JSONRenderer().render({
+                    'next': response.json()['next'],
+                    'results': serializer_class(page, many=True).data,
+                })
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertEqual(response.content, expected)
+
+    def test_browsable_api_uses_serializers(self):
+        response = self.client.get(reverse('car-list'), HTTP_ACCEPT='text/html')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Škoda')
+
+    def test_benchmark_command(self):
+        output = io.StringIO()
+        call_command('benchmark_serializers', 'transactions', '--rows', '10', stdout=output, stderr=output)
+        self.assertNotIn('differs', output.getvalue())
+        self.assertEqual(Transaction.objects.count(), 3)
+
+    def test_money_benchmark_command(self):
+        output = io.StringIO()
+        call_command('benchmark_money', '--rows', '10', stdout=output, stderr=output)
+        self.assertNotIn('differ', output.getvalue())
+        self.assertEqual(Transaction.objects.count(), 3)
+
+
+def decode_columnar(page: dict) -> list:
+    """
+    Rebuild the rows of a columnar page as the row format lists them.
+    """
+    columns = {
+        name: [None if code is None else page['dictionaries'][name][code] for code in values] if name in page['dictionaries'] else values
+        for name, values in page['columns'].items()
+    }
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+class ColumnarEncoderTest(EncoderTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def assertEncodesLikeSerializer(self, serializer_class):
+        queryset = serializer_class.Meta.model.objects.order_by('id')
+        expected = json.loads(JSONRenderer().render(serializer_class(queryset, many=True).data))
+        strings = [name for name in serializer_class.Meta.fields if name in ('make', 'model', 'name', 'buyer', 'seller', 'transaction_type')]
+        for cents in (False, True):
+            with self.subTest(cents=cents):
+                encoder = ColumnarEncoder(serializer_class, strings, cents=cents)
+                page = json.loads(encoder.encode(queryset.values_list(*encoder.columns)))
+                self.assertEqual(page['count'], len(expected))
+                self.assertEqual(list(page['columns']), list(serializer_class.Meta.fields))
+                self.assertEqual(list(page['dictionaries']), strings)
+                self.assertEqual(decode_columnar(page), expected)
+
+    def test_dictionary_codes(self):
+        encoder = ColumnarEncoder(TransactionSerializer, ('transaction_type', 'buyer'))
+        page = json.loads(encoder.encode(Transaction.objects.order_by('id').values_list(*encoder.columns)))
+        self.assertEqual(page['dictionaries']['transaction_type'], ['bought', 'sold'])
+        self.assertEqual(page['columns']['transaction_type'], [0, 1, 1])
+
+    def test_empty_page(self):
+        encoder = ColumnarEncoder(CarSerializer, ('make',))
+        page = json.loads(encoder.encode([]))
+        self.assertEqual(page, {'count': 0, 'columns': {name: [] for name in CarSerializer.Meta.fields}, 'dictionaries': {'make': []}})
+
+    def test_cars(self):
+        self.assertEncodesLikeSerializer(CarSerializer)
+
+    def test_transactions(self):
+        self.assertEncodesLikeSerializer(TransactionSerializer)
+
+    def test_stores(self):
+        self.assertEncodesLikeSerializer(StoreSerializer)
+
+    def test_cents_columns(self):
+        self.assertIn('price_cents', ColumnarEncoder(CarSerializer, cents=True).columns)
+
+    def test_list_endpoints_match_serializers(self):
+        for url, serializer_class in [(reverse('car-list'), CarSerializer), (reverse('transaction-list'), TransactionSerializer)]:
+            with self.subTest(url=url):
+                response = self.client.get(url, {'page_size': 2, 'format': 'columnar'})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], ColumnarRenderer.media_type)
+                data = response.json()
+                self.assertIn('format=columnar', data['next'])
+                model = serializer_class.Meta.model
+                page = model.objects.order_by('price' if model is Car else 'id', 'id')[:2]
+                self.assertEqual(decode_columnar(data['results']), json.loads(JSONRenderer().render(serializer_class(page, many=True).data)))
+
+
+    def test_smaller_than_rows(self):
+        Car.objects.bulk_create(Car(make='Škoda', model=f'Model {i % 5}', price=Decimal(i), store=self.store) for i in range(50))
+        url = reverse('car-list')
+        columnar = self.client.get(url, {'format': 'columnar'})
+        rows = self.client.get(url)
+        self.assertEqual(columnar.json()['results']['count'], len(rows.json()['results']))
+        self.assertLess(len(columnar.content), len(rows.content) / 2)
+
+    def test_accept_header(self):
+        url = reverse('car-list')
+        self.assertEqual(self.client.get(url)['Content-Type'], 'application/json')
+        # the cached plain JSON page is not served for the columnar media type
+        response = self.client.get(url, HTTP_ACCEPT=ColumnarRenderer.media_type)
+        self.assertEqual(response['Content-Type'], ColumnarRenderer.media_type)
+        self.assertIn('columns', response.json()['results'])
+
+    def test_errors_render_as_json(self):
+        response = self.client.get(reverse('transaction-list'), {'format': 'columnar', 'cursor': 'invalid'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.json())
@@ -0,0 +1,91 @@
+import logging
+
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TransactionTestCase, skipUnlessDBFeature
+
+from dealer import load
+from dealer.models import Store, Car, Transaction, TransactionSummary, TransactionRollup
+
+
+class LoadTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.store_ids = load.seed_stores(2, 30)
+
+    def test_parse_mix(self):
+        self.assertEqual(load.parse_mix('list=3, buy=1'), {'list': 3, 'buy': 1})
+        for value in ('list=1,sell=1', 'list=x', 'list=0,buy=0', ''):
+            with self.subTest(value=value):
+                with self.assertRaises(load.InvalidMix):
+                    load.parse_mix(value)
+
+    def test_seed(self):
+        for store in Store.objects.filter(pk__in=self.store_ids):
+            self.assertEqual(store.budget, load.INITIAL_BUDGET)
+            self.assertEqual(store.inventory_count, 30)
+        self.assertEqual(load.reconcile(self.store_ids), [])
+
+    def test_sequence_is_seeded(self):
+        first = load.Load(self.store_ids, load.DEFAULT_MIX, 50, seed=1).operations
+        self.assertEqual(load.Load(self.store_ids, load.DEFAULT_MIX, 50, seed=1).operations, first)
+        self.assertEqual({operation for operation, _ in first}, set(load.OPERATIONS))
+        only_lists = load.Load(self.store_ids, {'list': 1, 'buy': 0}, 20).operations
+        self.assertEqual({operation for operation, _ in only_lists}, {'list'})
+
+    def test_run_reconciles(self):
+        run = load.Load(self.store_ids, load.DEFAULT_MIX, 40)
+        outcomes = run.run(load.ClientTransport().send, threads=1)
+        self.assertEqual(len(outcomes), 40)
+        results = load.report(outcomes, elapsed=1.0)
+        self.assertEqual(results['all']['requests'], 40)
+        self.assertEqual(results['all']['errors'], 0)
+        self.assertEqual(results['all']['rejected'], 0)
+        self.assertEqual(sum(results[operation]['requests'] for operation in load.OPERATIONS), 40)
+        self.assertEqual(
+            Transaction.objects.filter(store__in=self.store_ids, transaction_type='sold').count(),
+            results['buy']['requests'],
+        )
+        self.assertEqual(load.reconcile(self.store_ids, outcomes), [])
+
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_concurrent_run_reconciles(self):
+        run = load.Load(self.store_ids, {'submit': 1, 'buy': 1}, 40)
+        # requests failing under contention log errors
+        logging.disable(logging.ERROR)
+        try:
+            outcomes = run.run(load.ClientTransport().send, threads=4)
+        finally:
+            logging.disable(logging.NOTSET)
+        # whatever fails under contention leaves nothing behind
+        self.assertEqual(load.reconcile(self.store_ids, outcomes), [])
+
+    def test_reconcile_reports_discrepancies(self):
+        run = load.Load(self.store_ids, {'submit': 1, 'buy': 1}, 10)
+        outcomes = run.run(load.ClientTransport().send, threads=1)
+        store_id = self.store_ids[0]
+        Store.objects.filter(pk=store_id).update(budget=load.INITIAL_BUDGET + Decimal('0.01'))
+        Car.objects.filter(store=self.store_ids[1]).first().delete()
+        TransactionSummary.objects.filter(store=store_id).delete()
+        TransactionRollup.objects.filter(store=store_id).delete()
+        problems = load.reconcile(self.store_ids, outcomes)
+        self.assertTrue(any('budget' in problem for problem in problems))
+        self.assertTrue(any('inventory' in problem for problem in problems))
+        self.assertTrue(any('summary' in problem for problem in problems))
+        self.assertTrue(any('rollups' in problem for problem in problems))
+
+        lost = [load.Outcome('buy', 200, 0.0)] * (len(outcomes) + 1)
+        self.assertTrue(any('requests succeeded' in problem for problem in load.reconcile(self.store_ids, lost)))
+
+    def test_errored_requests_may_have_committed(self):
+        run = load.Load(self.store_ids, {'buy': 1}, 4)
+        outcomes = run.run(load.ClientTransport().send, threads=1)
+        self.assertEqual(load.reconcile(self.store_ids, outcomes), [])
+        # a request failing after its commit may have written, one rejected may not
+        errored = [outcome._replace(status=500) for outcome in outcomes]
+        self.assertEqual(load.reconcile(self.store_ids, errored), [])
+        errored[0] = errored[0]._replace(status=None)
+        self.assertEqual(load.reconcile(self.store_ids, errored), [])
+        rejected = [outcome._replace(status=404) for outcome in outcomes]
+        self.assertTrue(any('4 sold transactions' in problem for problem in load.reconcile(self.store_ids, rejected)))
@@ -0,0 +1,149 @@
+import json
+
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from dealer.middleware import STICKY_COOKIE
+from dealer.models import Store, Car
+from dealer.routers import ReplicaRouter, reading_from
+
+
+def server_timing(response) -> dict:
+    metrics = {}
+    for metric in response['Server-Timing'].split(', '):
+        name, *params = metric.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+@override_settings(REQUEST_INSTRUMENTATION=True, SLOW_REQUEST_THRESHOLD_MS=10000, REPEATED_QUERY_THRESHOLD=5)
+class InstrumentationMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = Store.objects.create(name='Test Store', budget=Decimal('10000.00'))
+        Car.objects.create(make='Make', model='Model', price=Decimal('1000.00'), store=cls.store)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_server_timing(self):
+        with self.assertLogs('dealer.instrumentation', 'INFO') as logs:
+            response = self.client.get(reverse('store_info'))
+        self.assertEqual(response.status_code, 200)
+
+        metrics = server_timing(response)
+        self.assertEqual(set(metrics), {'db', 'render', 'view'})
+        self.assertGreater(float(metrics['render']['dur']), 0)
+        self.assertGreaterEqual(float(metrics['view']['dur']), float(metrics['db']['dur']))
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        self.assertEqual(line['path'], reverse('store_info'))
+        self.assertEqual(metrics['db']['desc'], f'"{line["queries"]} queries"')
+        self.assertGreater(line['queries'], 0)
+        self.assertFalse(line['slow'])
+        self.assertEqual(line['repeated_queries'], [])
+
+    @override_settings(REPEATED_QUERY_THRESHOLD=1)
+    def test_flags_repeated_queries(self):
+        with self.assertLogs('dealer.instrumentation', 'INFO') as logs:
+            self.client.get(reverse('transaction-summary'))
+        self.assertEqual(logs.records[0].levelname, 'WARNING')
+        self.assertTrue(json.loads(logs.records[0].getMessage())['repeated_queries'])
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_flags_slow_requests(self):
+        with self.assertLogs('dealer.instrumentation', 'INFO') as logs:
+            self.client.get(reverse('car-list'))
+        self.assertEqual(logs.records[0].levelname, 'WARNING')
+        self.assertTrue(json.loads(logs.records[0].getMessage())['slow'])
+
+    @override_settings(REQUEST_INSTRUMENTATION=False)
+    def test_disabled(self):
+        response = self.client.get(reverse('car-list'))
+        self.assertNotIn('Server-Timing', response)
+
+
+class ReplicaRouterTest(SimpleTestCase):
+    def test_routes(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Car), 'default')
+        with reading_from('replica'):
+            self.assertEqual(router.db_for_read(Car), 'replica')
+            self.assertEqual(router.db_for_write(Car), 'default')
+            # relations are followed on the database the instance was read from
+            car = Car()
+            car._state.db = 'default'
+            self.assertEqual(router.db_for_read(Store, instance=car), 'default')
+        self.assertEqual(router.db_for_read(Car), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_STICKINESS_SECONDS=60)
+class ReplicaRoutingMiddlewareTest(TransactionTestCase):
+    """
+    Nothing replicates between the two test databases, so the replica stands for one
+    lagging behind every write.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.store = Store.objects.create(name='Test Store', budget=Decimal('10000.00'))
+        self.detail_url = reverse('store-detail', kwargs={'pk': self.store.id})
+
+    def test_reads_go_to_replica(self):
+        with CaptureQueriesContext(connections['default']) as primary, CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get(reverse('store-list-create'))
+        self.assertEqual(response.data, [])
+        self.assertEqual(len(primary), 0)
+        self.assertGreater(len(replica), 0)
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+        # async views run with the routing of the request
+        self.assertEqual(self.client.get(reverse('async-store-detail', kwargs={'pk': self.store.id})).status_code, 404)
+
+    def test_writer_reads_its_writes(self):
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.post(reverse('store-car-submit', kwargs={'store_id': self.store.id}),
+                                        {'make': 'Make', 'model': 'Model', 'price': 1000})
+        self.assertEqual(len(replica), 0)
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        self.assertEqual(Car.objects.using('replica').count(), 0)
+
+        response = self.client.get(self.detail_url, {'include': 'cars'})
+        self.assertEqual([car['make'] for car in response.data['cars']], ['Make'])
+        # other clients read the lagging replica
+        self.assertEqual(Client().get(self.detail_url).status_code, 404)
+
+    def test_buyer_reads_its_purchase(self):
+        car = Car.objects.create(make='Make', model='Model', price=Decimal('1000.00'), store=self.store)
+        # the replica has caught up with the store and its car, but not with what follows
+        Store.objects.using('replica').create(pk=self.store.pk, name='Test Store', budget=Decimal('10000.00'))
+        Car.objects.using('replica').create(pk=car.pk, make='Make', model='Model', price=Decimal('1000.00'), store_id=self.store.pk)
+        store_url = reverse('store_detail', kwargs={'store_id': self.store.id})
+        buy_url = reverse('store_buy_car', kwargs={'store_id': self.store.id, 'car_id': car.id})
+
+        # the store page offers the purchase as a form, so buying is a write
+        page = self.client.get(store_url).content.decode()
+        self.assertIn(f'<form action="{buy_url}" method="post"', page)
+        self.assertEqual(self.client.get(buy_url).status_code, 405)
+
+        response = self.client.post(buy_url)
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        self.assertFalse(Car.objects.filter(pk=car.pk).exists())
+
+        # the redirect lands on the primary, where the car is gone
+        response = self.client.get(response.url)
+        self.assertNotIn(buy_url, response.content.decode())
+        self.assertIn(buy_url, Client().get(store_url).content.decode())
+
+    def test_stickiness_expires(self):
+        self.client.cookies[STICKY_COOKIE] = '0'
+        self.assertEqual(self.client.get(self.detail_url).status_code, 404)
+        self.client.cookies[STICKY_COOKIE] = 'invalid'
+        self.assertEqual(self.client.get(self.detail_url).status_code, 404)
@@ -1,6 +1,15 @@
-from django.test import TestCase
-from dealer.models import Store, Car, Transaction
-from datetime import datetime
+from importlib import import_module
+
+from django.apps import apps
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from dealer import facets
+from dealer.models import Store, Car, Transaction, TransactionSummary, TransactionRollup
+from dealer.money import divide_cents, format_cents, to_cents
+from decimal import Decimal
+from django.db.models import F
+from datetime import datetime, timedelta
+from django.utils import timezone
 
 
 # store
@@ -91,3 +100,244 @@ class TransactionModelTest(TestCase):
     def test_total_sold_transaction_count(self):
         total_sold_transaction_count = Transaction.total_sold_transaction_count()
         self.assertEqual(total_sold_transaction_count, 0)
+
+
+# transaction summary
+class TransactionSummaryModelTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = Store.objects.create(name='Test Store', budget=10000.00)
+        cls.other_store = Store.objects.create(name='Other Store', budget=10000.00)
+
+    def test_record_and_totals(self):
+        TransactionSummary.record(self.store, 'bought', 1000)
+        TransactionSummary.record(self.store, 'bought', 500)
+        TransactionSummary.record(self.store, 'sold', 2000)
+        TransactionSummary.record(self.other_store, 'sold', 300)
+
+        totals = TransactionSummary.totals()
+        self.assertEqual(totals['total_bought_amount'], 1500)
+        self.assertEqual(totals['total_sold_amount'], 2300)
+        self.assertEqual(totals['total_transaction_count'], 4)
+        self.assertEqual(totals['total_bought_transaction_count'], 2)
+        self.assertEqual(totals['total_sold_transaction_count'], 2)
+
+        store_totals = TransactionSummary.totals(self.other_store)
+        self.assertEqual(store_totals['total_sold_amount'], 300)
+        self.assertEqual(store_totals['total_transaction_count'], 1)
+
+    def test_totals_single_query(self):
+        TransactionSummary.record(self.store, 'bought', 1000)
+        with self.assertNumQueries(1):
+            TransactionSummary.totals()
+
+    def test_totals_empty(self):
+        totals = TransactionSummary.totals()
+        self.assertEqual(totals['total_bought_amount'], 0)
+        self.assertEqual(totals['total_transaction_count'], 0)
+
+    def test_rebuild(self):
+        Transaction.objects.create(buyer='Test Store', seller='User', transaction_type='bought', transaction_amount=1000, store=self.store)
+        Transaction.objects.create(buyer='User', seller='Test Store', transaction_type='sold', transaction_amount=1500, store=self.store)
+        # attributed by the store foreign key only, never by name
+        Transaction.objects.create(buyer='Test Store', seller='User', transaction_type='bought', transaction_amount=200)
+
+        TransactionSummary.rebuild()
+
+        self.assertEqual(TransactionSummary.totals(self.store)['total_transaction_count'], 2)
+        self.assertEqual(TransactionSummary.totals()['total_bought_amount'], Transaction.total_bought_amount())
+        self.assertEqual(TransactionSummary.totals()['total_sold_amount'], Transaction.total_sold_amount())
+        self.assertEqual(TransactionSummary.objects.get(store=None).bought_amount, 200)
+
+    def test_deleted_store_keeps_its_totals(self):
+        for store, transaction_type, amount in (
+            (self.store, 'bought', 1000), (self.store, 'sold', 1500), (self.other_store, 'bought', 300), (None, 'sold', 200),
+        ):
+            Transaction.objects.create(buyer='Buyer', seller='Seller', transaction_type=transaction_type, transaction_amount=amount, store=store)
+            TransactionSummary.record(store, transaction_type, amount)
+
+        self.store.delete()
+
+        def maintained():
+            return (
+                TransactionSummary.totals(),
+                sorted(TransactionSummary.objects.values_list('store', 'bought_count', 'bought_amount', 'sold_count', 'sold_amount'), key=str),
+                sorted(TransactionRollup.objects.values_list('store', 'day', 'transaction_type', 'count', 'amount'), key=str),
+            )
+        written = maintained()
+        self.assertEqual(TransactionSummary.objects.get(store=None).sold_amount, 1700)
+        TransactionSummary.rebuild()
+        TransactionRollup.rebuild()
+        self.assertEqual(written, maintained())
+
+
+# transaction rollup
+class TransactionRollupModelTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = Store.objects.create(name='Test Store', budget=10000.00)
+
+    def test_summary_record_updates_todays_rollup(self):
+        TransactionSummary.record(self.store, 'bought', 1000)
+        TransactionSummary.record(self.store, 'bought', 500, count=2)
+        TransactionSummary.record(self.store, 'sold', 2000)
+        TransactionSummary.record(None, 'sold', 300)
+
+        rollup = TransactionRollup.objects.get(store=self.store, transaction_type='bought')
+        self.assertEqual((rollup.day, rollup.count, rollup.amount), (timezone.localdate(), 3, 1500))
+        self.assertEqual(TransactionRollup.objects.get(store=self.store, transaction_type='sold').amount, 2000)
+        self.assertEqual(TransactionRollup.objects.get(store=None).count, 1)
+
+    def test_rebuild(self):
+        Transaction.objects.create(buyer='Test Store', seller='User', transaction_type='bought', transaction_amount=1000, store=self.store)
+        yesterday = Transaction.objects.create(buyer='Test Store', seller='User', transaction_type='bought', transaction_amount=400, store=self.store)
+        Transaction.objects.filter(pk=yesterday.pk).update(transaction_date=yesterday.transaction_date - timedelta(days=1))
+        Transaction.objects.create(buyer='User', seller='Test Store', transaction_type='sold', transaction_amount=1500, store=self.store)
+        Transaction.objects.create(buyer='Test Store', seller='User', transaction_type='bought', transaction_amount=200)
+
+        self.assertEqual(TransactionRollup.rebuild(), 4)
+
+        today = timezone.localdate()
+        rollups = TransactionRollup.objects.values_list('store', 'day', 'transaction_type', 'count', 'amount')
+        self.assertCountEqual(rollups, [
+            (self.store.pk, today, 'bought', 1, 1000),
+            (self.store.pk, today - timedelta(days=1), 'bought', 1, 400),
+            (self.store.pk, today, 'sold', 1, 1500),
+            (None, today, 'bought', 1, 200),
+        ])
+
+
+# money
+class MoneyCentsTest(TestCase):
+    def test_cents_follow_every_write(self):
+        store = Store.objects.create(name='Test Store', budget=Decimal('10000.29'))
+        Car.objects.bulk_create([Car(make='Make', model='Model', price=Decimal('0.29'), store=store)])
+        car = Car.objects.create(make='Make', model='Model', price=Decimal('12345678.99'), store=store)
+        Transaction.objects.create(transaction_type='sold', transaction_amount=Decimal('99.99'))
+
+        Store.objects.filter(pk=store.pk).update(budget=F('budget') - Decimal('0.30'))
+        car.price = Decimal('5.10')
+        car.save()
+
+        self.assertEqual(Store.objects.values_list('budget_cents', flat=True).get(), 999999)
+        self.assertEqual(list(Car.objects.order_by('id').values_list('price_cents', flat=True)), [29, 510])
+        self.assertEqual(Transaction.objects.values_list('transaction_amount_cents', flat=True).get(), 9999)
+        self.assertEqual(Transaction.total_sold_amount(), Decimal('99.99'))
+
+    def test_saved_instances_hold_cents(self):
+        store = Store.objects.create(name='Test Store', budget=10000.29)
+        car = Car.objects.create(make='Make', model='Model', price='12.30', store=store)
+        self.assertEqual((store.budget_cents, car.price_cents), (1000029, 1230))
+        car.price = Decimal('5.10')
+        car.save()
+        self.assertEqual(car.price_cents, 510)
+        # expressions are left to the trigger
+        store.budget = F('budget') + 1
+        store.save()
+        store.refresh_from_db()
+        self.assertEqual(store.budget_cents, 1000129)
+
+    def test_accessors(self):
+        store = Store.objects.create(name='Test Store', budget=Decimal('10000.29'))
+        car = Car.objects.create(make='Make', model='Model', price=Decimal('0.05'), store=store)
+        loaded = Car.objects.only('id', 'price_cents').get()
+        self.assertEqual(loaded.price_from_cents, Decimal('0.05'))
+        self.assertEqual(Store.objects.get().budget_from_cents, Decimal('10000.29'))
+        car.price_from_cents = Decimal('7.5')
+        self.assertEqual((car.price, car.price_cents), (Decimal('7.50'), 750))
+
+    def test_readers_agree(self):
+        store = Store.objects.create(name='Test Store', budget=Decimal('10000.00'))
+        for price in ('0.05', '0.10', '1999.99'):
+            Car.objects.create(make='Make', model='Model', price=Decimal(price), store=store)
+            Transaction.objects.create(transaction_type='bought', transaction_amount=Decimal(price), store=store)
+        outputs = []
+        for cents in (False, True):
+            with self.subTest(cents=cents), override_settings(MONEY_CENTS=cents):
+                TransactionSummary.rebuild()
+                TransactionRollup.rebuild()
+                totals = (Transaction.total_bought_amount(), Transaction.total_sold_amount())
+                self.assertEqual(totals, (Decimal('2000.14'), Decimal('0.00')))
+                self.assertTrue(all(isinstance(total, Decimal) for total in totals))
+                outputs.append((
+                    totals,
+                    list(TransactionSummary.objects.values_list('bought_count', 'bought_amount')),
+                    list(TransactionRollup.objects.values_list('count', 'amount')),
+                    facets.car_facets(Car.objects.all()),
+                    self.client.get(reverse('car-list')).content,
+                    self.client.get(reverse('transaction-list')).content,
+                ))
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0][3]['price'], {'min': '0.05', 'avg': '666.71', 'max': '1999.99'})
+
+    def test_format_and_divide(self):
+        self.assertEqual([format_cents(cents) for cents in (0, 5, -5, 100, -123456)], ['0.00', '0.05', '-0.05', '1.00', '-1234.56'])
+        self.assertEqual(to_cents(Decimal('-12.30')), -1230)
+        self.assertEqual([to_cents(amount) for amount in (Decimal('0.005'), Decimal('-0.005'), 1000, '12.3', 0.1)], [1, -1, 100000, 1230, 10])
+        for cents, count in ((5, 2), (7, 2), (10, 4), (-5, 2), (2, 3)):
+            expected = (Decimal(cents) / count).quantize(Decimal('1'))
+            self.assertEqual(divide_cents(cents, count), int(expected), (cents, count))
+
+
+class TransactionBackfillTest(TestCase):
+    def test_backfill_store_and_car(self):
+        store = Store.objects.create(name='Test Store', budget=10000.00)
+        car = Car.objects.create(make='Make', model='Model', price=1000, store=store)
+        bought = Transaction.objects.create(car_make='Make', car_model='Model', buyer='Test Store', seller='User',
+                                            transaction_type='bought', transaction_amount=1000)
+        sold = Transaction.objects.create(car_make='Other', car_model='Model', buyer='User', seller='Test Store',
+                                          transaction_type='sold', transaction_amount=500)
+        unknown = Transaction.objects.create(car_make='Make', car_model='Model', buyer='Nobody', seller='User',
+                                             transaction_type='bought', transaction_amount=1000)
+
+        migration = import_module('dealer.migrations.0007_backfill_transaction_store_car')
+        migration.backfill_transaction_store_car(apps, None)
+
+        bought.refresh_from_db()
+        sold.refresh_from_db()
+        unknown.refresh_from_db()
+        self.assertEqual((bought.store, bought.car), (store, car))
+        self.assertEqual((sold.store, sold.car), (store, None))
+        self.assertIsNone(unknown.store)
+
+    def test_backfill_leaves_ambiguous_cars_unlinked(self):
+        store = Store.objects.create(name='Test Store', budget=10000.00)
+        Car.objects.create(make='Twin', model='Model', price=1000, store=store)
+        Car.objects.create(make='Twin', model='Model', price=1000, store=store)
+        Car.objects.create(make='Single', model='Model', price=1000, store=store)
+        twin = Transaction.objects.create(car_make='Twin', car_model='Model', buyer='Test Store', seller='User',
+                                          transaction_type='bought', transaction_amount=1000)
+        repeated = [
+            Transaction.objects.create(car_make='Single', car_model='Model', buyer='Test Store', seller='User',
+                                       transaction_type='bought', transaction_amount=1000)
+            for _ in range(2)
+        ]
+
+        migration = import_module('dealer.migrations.0007_backfill_transaction_store_car')
+        batch_sizes = migration.BATCH_SIZE, migration.CAR_BATCH_SIZE
+        migration.BATCH_SIZE = migration.CAR_BATCH_SIZE = 1
+        try:
+            migration.backfill_transaction_store_car(apps, None)
+        finally:
+            migration.BATCH_SIZE, migration.CAR_BATCH_SIZE = batch_sizes
+
+        for transaction_obj in [twin, *repeated]:
+            transaction_obj.refresh_from_db()
+            self.assertEqual((transaction_obj.store, transaction_obj.car), (store, None))
+
+    def test_backfill_links_cars_across_batches(self):
+        store = Store.objects.create(name='Test Store', budget=10000.00)
+        cars = Car.objects.bulk_create(Car(make='Make', model='Model', price=price, store=store) for price in range(1, 501))
+        Transaction.objects.bulk_create(
+            Transaction(car_make='Make', car_model='Model', buyer='Test Store', seller='User',
+                        transaction_type='bought', transaction_amount=price, store=store)
+            for price in range(1, 501)
+        )
+        migration = import_module('dealer.migrations.0007_backfill_transaction_store_car')
+
+        migration.backfill_transaction_car(apps)
+
+        self.assertEqual(
+            sorted(Transaction.objects.values_list('transaction_amount', 'car__price')),
+            [(car.price, car.price) for car in sorted(cars, key=lambda car: car.price)],
+        )
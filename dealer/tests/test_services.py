@@ -0,0 +1,428 @@
+import io
+import logging
+import os
+import tempfile
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from decimal import Decimal
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.urls import reverse
+from django.utils import timezone
+
+from dealer.models import Store, Car, Transaction, TransactionSummary, TransactionRollup, PurchaseTicket
+from dealer.imports import InvalidImport, import_inventory
+from dealer.services import (
+    InsufficientBudget, enqueue_purchase, process_purchase_queue, purchase_car, purchase_cars, submit_car, submit_cars_bulk,
+)
+
+
+class SubmitCarTest(TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name='Test Store', budget=Decimal('10000.00'))
+
+    def test_submit_car(self):
+        car = submit_car(self.store, 'Make', 'Model', Decimal('4000.00'))
+
+        self.assertEqual(car.store, self.store)
+        self.assertEqual(Store.objects.get(pk=self.store.pk).budget, Decimal('6000.00'))
+        self.assertEqual(TransactionSummary.totals(self.store)['total_bought_amount'], Decimal('4000.00'))
+
+    def test_insufficient_budget(self):
+        with self.assertRaises(InsufficientBudget):
+            submit_car(self.store, 'Make', 'Model', Decimal('10000.01'))
+
+        self.assertFalse(Car.objects.exists())
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(Store.objects.get(pk=self.store.pk).budget, Decimal('10000.00'))
+
+    def test_purchase_car(self):
+        car = Car.objects.create(make='Make', model='Model', price=Decimal('2500.00'), store=self.store)
+
+        transaction_obj = purchase_car(car.pk)
+
+        self.assertEqual(transaction_obj.transaction_type, 'sold')
+        self.assertEqual(transaction_obj.seller, 'Test Store')
+        self.assertFalse(Car.objects.filter(pk=car.pk).exists())
+        self.assertEqual(Store.objects.get(pk=self.store.pk).budget, Decimal('12500.00'))
+        with self.assertRaises(Car.DoesNotExist):
+            purchase_car(car.pk)
+
+
+class WriteQueryBudgetTest(TestCase):
+    """
+    Every write endpoint runs a fixed number of queries. The counts include the
+    SAVEPOINT and RELEASE issued because each test already runs inside a transaction.
+    """
+    def setUp(self):
+        self.store = Store.objects.create(name='Test Store', budget=Decimal('10000.00'))
+        TransactionSummary.objects.create(store=self.store)
+        for transaction_type in ('bought', 'sold'):
+            TransactionRollup.objects.create(store=self.store, day=timezone.localdate(), transaction_type=transaction_type)
+        self.car = Car.objects.create(make='Make', model='Model', price=Decimal('2500.00'), store=self.store)
+
+    def test_html_submit(self):
+        # store lookup, budget debit, car insert, transaction insert, summary update, rollup update, change log insert
+        with self.assertNumQueries(9):
+            response = self.client.post(reverse('submit_car'), {'make': 'Make', 'model': 'Model', 'price': 1000})
+        self.assertEqual(response.status_code, 302)
+
+    def test_html_buy(self):
+        # car lock, budget credit, transaction insert, summary update, rollup update, change log insert, car delete
+        with self.assertNumQueries(9):
+            response = self.client.post(reverse('buy_car', kwargs={'car_id': self.car.id}))
+        self.assertEqual(response.status_code, 302)
+
+    def test_api_submit(self):
+        with self.assertNumQueries(9):
+            response = self.client.post(reverse('car-submit'), {'make': 'Make', 'model': 'Model', 'price': 1000})
+        self.assertEqual(response.status_code, 302)
+
+    def test_api_buy(self):
+        with self.assertNumQueries(9):
+            response = self.client.post(reverse('car-buy', kwargs={'car_id': self.car.id}))
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_bulk_submit(self):
+        cars = [{'make': 'Make', 'model': 'Model', 'price': '10'} for _ in range(50)]
+        # few enough rows for single INSERTs on SQLite too
+        # store lookup, budget debit, car insert, transaction insert, summary update, rollup update, change log insert
+        with self.assertNumQueries(9):
+            response = self.client.post(reverse('car-submit-bulk'), cars, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentBudgetTest(TransactionTestCase):
+    """
+    Many threads submit and buy cars at once, each on its own database connection.
+    """
+    threads = 16
+
+    def run_in_threads(self, target, args_list: list) -> list:
+        def call(args: tuple):
+            try:
+                return target(*args)
+            except Exception as e:
+                return e
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            return list(executor.map(call, args_list))
+
+    def test_parallel_submissions_never_overdraw(self):
+        store = Store.objects.create(name='Test Store', budget=Decimal('10000.00'))
+
+        results = self.run_in_threads(submit_car, [(store, 'Make', 'Model', Decimal('1000.00'))] * 40)
+
+        accepted = [result for result in results if isinstance(result, Car)]
+        rejected = [result for result in results if isinstance(result, InsufficientBudget)]
+        self.assertEqual(len(accepted), 10)
+        self.assertEqual(len(rejected), 30)
+        self.assertEqual(Store.objects.get(pk=store.pk).budget, 0)
+        self.assertEqual(Transaction.objects.count(), 10)
+        self.assertEqual(TransactionSummary.totals(store)['total_bought_amount'], Decimal('10000.00'))
+
+    def test_parallel_submissions_across_stores(self):
+        stores = [Store.objects.create(name=f'Store {i}', budget=Decimal('1000.00')) for i in range(4)]
+
+        results = self.run_in_threads(submit_car, [(store, 'Make', 'Model', Decimal('100.00')) for store in stores] * 10)
+
+        self.assertTrue(all(isinstance(result, Car) for result in results))
+        for store in stores:
+            self.assertEqual(Store.objects.get(pk=store.pk).budget, 0)
+            self.assertEqual(Car.objects.filter(store=store).count(), 10)
+            self.assertEqual(TransactionSummary.totals(store)['total_bought_transaction_count'], 10)
+
+    def test_parallel_buyers_sell_each_car_once(self):
+        store = Store.objects.create(name='Test Store', budget=0)
+        cars = [Car.objects.create(make='Make', model='Model', price=Decimal('100.00'), store=store) for _ in range(20)]
+        # four buyers race for every car
+        args_list = [(car.pk,) for car in cars] * 4
+
+        started = time.perf_counter()
+        results = self.run_in_threads(purchase_car, args_list)
+        elapsed = time.perf_counter() - started
+
+        sold = [result for result in results if isinstance(result, Transaction)]
+        missed = [result for result in results if isinstance(result, Car.DoesNotExist)]
+        self.assertEqual(len(sold), 20)
+        self.assertEqual(len(missed), 60)
+        self.assertFalse(Car.objects.exists())
+        self.assertEqual(Store.objects.get(pk=store.pk).budget, Decimal('2000.00'))
+        self.assertEqual(Transaction.objects.filter(transaction_type='sold').count(), 20)
+        self.assertEqual(TransactionSummary.totals(store)['total_sold_amount'], Decimal('2000.00'))
+        logging.info(f"{len(args_list)} concurrent purchase attempts in {elapsed:.3f}s "
+                     f"({len(args_list) / elapsed:.0f} requests/s)")
+
+
+class SubmitCarsBulkTest(TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name='Test Store', budget=Decimal('10000.00'))
+
+    def test_accepts_in_order_within_budget(self):
+        cars = submit_cars_bulk(self.store, [
+            {'make': 'Make1', 'model': 'Model1', 'price': Decimal('6000.00')},
+            {'make': 'Make2', 'model': 'Model2', 'price': Decimal('5000.00')},
+            {'make': 'Make3', 'model': 'Model3', 'price': Decimal('4000.00')},
+        ])
+
+        self.assertEqual([car is not None for car in cars], [True, False, True])
+        self.store.refresh_from_db()
+        self.assertEqual(self.store.budget, 0)
+        self.assertEqual(Car.objects.filter(store=self.store).count(), 2)
+        self.assertEqual(Transaction.objects.filter(transaction_type='bought').count(), 2)
+        self.assertEqual(TransactionSummary.totals(self.store)['total_bought_amount'], 10000)
+
+    def test_fixed_query_count(self):
+        TransactionSummary.objects.create(store=self.store)
+        TransactionRollup.objects.create(store=self.store, day=timezone.localdate(), transaction_type='bought')
+        cars = [{'make': 'Make', 'model': 'Model', 'price': Decimal('1.00')} for _ in range(50)]
+        # savepoint, budget debit, car insert, transaction insert, summary update, rollup update,
+        # change log insert, release
+        with self.assertNumQueries(8):
+            submit_cars_bulk(self.store, cars)
+        self.assertEqual(Car.objects.count(), 50)
+
+    def test_budget_changed_concurrently(self):
+        stale = Store.objects.get(pk=self.store.pk)
+        Store.objects.filter(pk=self.store.pk).update(budget=Decimal('100.00'))
+
+        cars = submit_cars_bulk(stale, [{'make': 'Make', 'model': 'Model', 'price': Decimal('5000.00')}])
+
+        self.assertEqual(cars, [None])
+        self.assertEqual(Store.objects.get(pk=self.store.pk).budget, Decimal('100.00'))
+
+
+class BulkSubmitApiTest(TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name='Test Store', budget=Decimal('10000.00'))
+
+    def test_partial_acceptance(self):
+        response = self.client.post(reverse('car-submit-bulk'), [
+            {'make': 'Make1', 'model': 'Model1', 'price': '6000'},
+            {'make': 'Make2', 'price': '100'},
+            {'make': 'Make3', 'model': 'Model3', 'price': '-5'},
+            {'make': 'Make4', 'model': 'Model4', 'price': '5000'},
+            {'make': 'Make5', 'model': 'Model5', 'price': '4000'},
+        ], content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['accepted'], 2)
+        self.assertEqual([item['status'] for item in response.data['results']],
+                         ['accepted', 'rejected', 'rejected', 'rejected', 'accepted'])
+        self.assertIn('model', response.data['results'][1]['errors'])
+        self.assertEqual(response.data['results'][4]['car']['make'], 'Make5')
+
+    def test_not_a_list(self):
+        response = self.client.post(reverse('car-submit-bulk'), {'make': 'Make1'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ImportInventoryTest(TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name='Test Store', budget=Decimal('10000.00'))
+
+    def test_import(self):
+        lines = io.StringIO(
+            'make,model,price,color\n'
+            'Make1,Model1,6000.00,red\n'
+            'Make2,,100\n'
+            'Make3,Model3,-5\n'
+            'Make4,Model4,5000\n'
+            'Make5,Model5,abc\n'
+            'Make6,Model6,4000\n'
+        )
+        result = import_inventory(self.store, lines, batch_size=2)
+
+        self.assertEqual(result.accepted, 2)
+        self.assertEqual(result.total, Decimal('10000.00'))
+        self.assertEqual([rejection.line for rejection in result.rejections], [3, 4, 5, 6])
+        self.assertEqual(list(result.rejections[0].errors), ['model'])
+        self.assertEqual(result.rejections[2].errors, {'price': ['The store does not have enough money to buy this car.']})
+        self.assertEqual(list(Car.objects.order_by('id').values_list('make', flat=True)), ['Make1', 'Make6'])
+        self.assertEqual(Transaction.objects.filter(transaction_type='bought', car__isnull=False).count(), 2)
+        self.assertEqual(Store.objects.get(pk=self.store.pk).budget, 0)
+        self.assertEqual(TransactionSummary.totals(self.store)['total_bought_transaction_count'], 2)
+
+    def test_missing_column(self):
+        with self.assertRaises(InvalidImport):
+            import_inventory(self.store, io.StringIO('make,price\nMake,1\n'))
+
+    def test_command_report(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cars.csv')
+            report = os.path.join(directory, 'rejected.csv')
+            with open(path, 'w') as input_file:
+                input_file.write('make,model,price\nMake1,Model1,100\nMake2,Model2,20000\n')
+            call_command('import_inventory', path, '--store', str(self.store.pk), '--report', report, stderr=io.StringIO())
+
+            with open(report) as report_file:
+                self.assertEqual(report_file.read().splitlines(), [
+                    'line,make,model,price,errors',
+                    '3,Make2,Model2,20000,price: The store does not have enough money to buy this car.',
+                ])
+        self.assertEqual(Car.objects.get().make, 'Make1')
+
+    def test_upload(self):
+        upload = SimpleUploadedFile('cars.csv', b'make,model,price\nMake1,Model1,100\nMake2,Model2,x\n', 'text/csv')
+        response = self.client.post(reverse('store-car-import', kwargs={'store_id': self.store.pk}), {'file': upload})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['accepted'], 1)
+        self.assertEqual(response.data['total'], '100.00')
+        self.assertEqual(response.data['rejections'][0]['line'], 3)
+        self.assertIn('price', response.data['rejections'][0]['errors'])
+
+    def test_upload_without_file(self):
+        response = self.client.post(reverse('car-import'))
+        self.assertEqual(response.status_code, 400)
+
+
+class PurchaseQueueTest(TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name='Test Store', budget=Decimal('10000.00'))
+        self.other_store = Store.objects.create(name='Other Store', budget=Decimal('10000.00'))
+        self.car = Car.objects.create(make='Make', model='Model', price=Decimal('2500.00'), store=self.store)
+        self.other_car = Car.objects.create(make='Make', model='Model', price=Decimal('1500.00'), store=self.other_store)
+
+    def test_process_batch(self):
+        first = enqueue_purchase(self.car.pk)
+        second = enqueue_purchase(self.car.pk)
+        wrong_store = enqueue_purchase(self.other_car.pk)
+        PurchaseTicket.objects.filter(pk=wrong_store.pk).update(store_id=self.store.pk)
+        other = enqueue_purchase(self.other_car.pk, self.other_store.pk)
+
+        self.assertEqual(process_purchase_queue(), 4)
+        self.assertEqual(process_purchase_queue(), 0)
+
+        tickets = {ticket.pk: ticket for ticket in PurchaseTicket.objects.all()}
+        self.assertEqual([tickets[t.pk].status for t in (first, second, wrong_store, other)], ['completed', 'failed', 'failed', 'completed'])
+        self.assertEqual(tickets[first.pk].transaction.car_id, self.car.pk)
+        self.assertEqual(tickets[second.pk].error, 'Car not found.')
+        self.assertFalse(Car.objects.exists())
+        self.assertEqual(Store.objects.get(pk=self.store.pk).budget, Decimal('12500.00'))
+        self.assertEqual(Store.objects.get(pk=self.other_store.pk).budget, Decimal('11500.00'))
+        self.assertEqual(TransactionSummary.totals(self.store)['total_sold_amount'], Decimal('2500.00'))
+
+    def test_fixed_query_count(self):
+        for store in (self.store, self.other_store):
+            TransactionSummary.objects.create(store=store)
+            TransactionRollup.objects.create(store=store, day=timezone.localdate(), transaction_type='sold')
+            for _ in range(10):
+                enqueue_purchase(Car.objects.create(make='Make', model='Model', price=Decimal('1.00'), store=store).pk)
+        # savepoint, tickets, cars, transaction insert, budget, summary, rollup and change log
+        # writes per store, car delete, ticket update, release
+        with self.assertNumQueries(15):
+            self.assertEqual(process_purchase_queue(), 20)
+
+    def test_enqueue_missing_car(self):
+        with self.assertRaises(Car.DoesNotExist):
+            enqueue_purchase(self.car.pk, self.other_store.pk)
+
+    @override_settings(QUEUED_PURCHASES=True)
+    def test_queued_api(self):
+        response = self.client.post(reverse('car-buy', kwargs={'car_id': self.car.pk}))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertTrue(Car.objects.filter(pk=self.car.pk).exists())
+
+        call_command('process_purchases', '--once', stdout=io.StringIO())
+
+        response = self.client.get(response.data['url'])
+        self.assertEqual(response.data['status'], 'completed')
+        self.assertEqual(Transaction.objects.get(pk=response.data['transaction']).car_id, self.car.pk)
+        self.assertFalse(Car.objects.filter(pk=self.car.pk).exists())
+
+    @override_settings(QUEUED_PURCHASES=True)
+    def test_queued_api_missing_car(self):
+        response = self.client.post(reverse('store-car-buy', kwargs={'store_id': self.other_store.pk, 'car_id': self.car.pk}))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(PurchaseTicket.objects.exists())
+
+
+class BatchPurchaseTest(TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name='Test Store', budget=Decimal('10000.00'))
+        self.other_store = Store.objects.create(name='Other Store', budget=Decimal('10000.00'))
+        self.cars = [submit_car(self.store, 'Make', f'Model{i}', Decimal('100.00')) for i in range(3)]
+        self.other_car = submit_car(self.other_store, 'Make', 'Other', Decimal('250.00'))
+
+    def test_sells_found_cars(self):
+        car_ids = [self.cars[2].pk, self.other_car.pk, 0, self.cars[0].pk, self.cars[2].pk]
+        transactions = purchase_cars(car_ids)
+
+        self.assertEqual([obj.car_id if obj else None for obj in transactions],
+                         [self.cars[2].pk, self.other_car.pk, None, self.cars[0].pk, None])
+        self.assertEqual(list(Car.objects.values_list('pk', flat=True)), [self.cars[1].pk])
+        store = Store.objects.get(pk=self.store.pk)
+        self.assertEqual((store.budget, store.inventory_count), (Decimal('9900.00'), 1))
+        self.assertEqual(Store.objects.get(pk=self.other_store.pk).budget, Decimal('10000.00'))
+        self.assertEqual(TransactionSummary.totals(self.store)['total_sold_transaction_count'], 2)
+
+    def test_store_scope(self):
+        transactions = purchase_cars([self.cars[0].pk, self.other_car.pk], self.store.pk)
+        self.assertIsNone(transactions[1])
+        self.assertTrue(Car.objects.filter(pk=self.other_car.pk).exists())
+
+    def test_fixed_query_count(self):
+        cars = [submit_car(store, 'Make', 'Model', Decimal('1.00')) for store in (self.store, self.other_store) for _ in range(10)]
+        for store in (self.store, self.other_store):
+            TransactionRollup.objects.create(store=store, day=timezone.localdate(), transaction_type='sold')
+        # savepoint, cars, transaction insert, budget, summary, rollup and change log writes
+        # per store, car delete, release
+        with self.assertNumQueries(13):
+            purchase_cars([car.pk for car in cars])
+
+    def test_api(self):
+        response = self.client.post(reverse('car-buy-batch'), [self.cars[0].pk, 0], content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['sold'], response.data['failed']), (1, 1))
+        self.assertEqual(response.data['results'][0]['transaction']['transaction_amount'], '100.00')
+        self.assertEqual(response.data['results'][1], {'index': 1, 'car': 0, 'status': 'failed', 'error': 'Car not found.'})
+
+        url = reverse('store-car-buy-batch', kwargs={'store_id': self.store.pk})
+        response = self.client.post(url, [self.other_car.pk], content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+
+        for data in ({'cars': [1]}, ['1'], [True]):
+            response = self.client.post(reverse('car-buy-batch'), data, content_type='application/json')
+            self.assertEqual(response.status_code, 400, data)
+
+
+class StoreInventoryCounterTest(TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name='Test Store', budget=Decimal('100000.00'))
+
+    def assertCountersMatchCars(self):
+        self.store.refresh_from_db()
+        counters = (self.store.inventory_count, self.store.inventory_value)
+        Store.rebuild_inventory()
+        self.store.refresh_from_db()
+        self.assertEqual(counters, (self.store.inventory_count, self.store.inventory_value))
+
+    def test_write_paths(self):
+        car = submit_car(self.store, 'Make', 'Model', Decimal('1000.00'))
+        submit_cars_bulk(self.store, [{'make': 'Make', 'model': 'Model', 'price': Decimal('10.25')}] * 3)
+        import_inventory(self.store, io.StringIO('make,model,price\nMake,Model,99.99\n'))
+        self.assertCountersMatchCars()
+        self.assertEqual(self.store.inventory_count, 5)
+        self.assertEqual(self.store.inventory_value, Decimal('1130.74'))
+
+        purchase_car(car.pk)
+        enqueue_purchase(Car.objects.first().pk)
+        process_purchase_queue()
+        self.assertCountersMatchCars()
+        self.assertEqual(self.store.inventory_count, 3)
+
+    def test_rebuild_command(self):
+        Car.objects.create(make='Make', model='Model', price=Decimal('5.00'), store=self.store)
+        call_command('rebuild_store_inventory', stdout=io.StringIO())
+        self.store.refresh_from_db()
+        self.assertEqual((self.store.inventory_count, self.store.inventory_value), (1, Decimal('5.00')))
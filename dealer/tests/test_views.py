@@ -8,7 +8,7 @@ from django.contrib.auth.models import User
 from django.contrib.messages.storage.fallback import FallbackStorage
 
 from dealer.views import submit_car, buy_car, car_list, transactions_summary
-from dealer.models import Store, Car, Transaction
+from dealer.models import Store, Car, Transaction, TransactionSummary
 
 
 class SubmitCarViewTest(TestCase):
@@ -110,3 +110,51 @@ class TransactionsSummaryViewTest(TestCase):
         self.assertEqual(total_bought_transaction_count, 2)
         self.assertEqual(total_sold_transaction_count, 2)
 
+
+
+class TransactionsSummaryLedgerTest(TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name='Test Store', budget=Decimal('25000.00'))
+
+    def test_summary_follows_submit_and_buy(self):
+        self.client.post(reverse('submit_car'), {'make': 'Make1', 'model': 'Model1', 'price': 5000})
+        car = Car.objects.get(make='Make1')
+        self.client.post(reverse('buy_car', kwargs={'car_id': car.id}))
+
+        response = self.client.get(reverse('transactions_summary'))
+        self.assertEqual(response.context['total_bought_amount'], 5000)
+        self.assertEqual(response.context['total_sold_amount'], 5000)
+        self.assertEqual(response.context['total_transaction_count'], 2)
+        self.assertEqual(TransactionSummary.totals(self.store)['total_transaction_count'], 2)
+
+
+class StoreScopedViewTest(TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name='Store A', budget=Decimal('10000.00'))
+        self.other_store = Store.objects.create(name='Store B', budget=Decimal('10000.00'))
+
+    def test_submit_and_buy_in_store(self):
+        url = reverse('store_submit_car', kwargs={'store_id': self.other_store.id})
+        response = self.client.post(url, {'make': 'Make', 'model': 'Model', 'price': 1000})
+        self.assertRedirects(response, reverse('store_detail', kwargs={'store_id': self.other_store.id}))
+
+        car = Car.objects.get()
+        self.assertEqual(car.store, self.other_store)
+
+        self.client.post(reverse('store_buy_car', kwargs={'store_id': self.store.id, 'car_id': car.id}))
+        self.assertTrue(Car.objects.filter(pk=car.pk).exists())
+
+        self.client.post(reverse('store_buy_car', kwargs={'store_id': self.other_store.id, 'car_id': car.id}))
+        self.assertFalse(Car.objects.filter(pk=car.pk).exists())
+        self.assertEqual(Store.objects.get(pk=self.store.pk).budget, Decimal('10000.00'))
+
+    def test_store_info(self):
+        Car.objects.create(make='Make1', model='Model', price=1000, store=self.store)
+        Car.objects.create(make='Make2', model='Model', price=1000, store=self.other_store)
+
+        response = self.client.get(reverse('store_detail', kwargs={'store_id': self.other_store.id}))
+        self.assertEqual(response.context['store'], self.other_store)
+        self.assertEqual([car['make'] for car in response.context['cars']], ['Make2'])
+
+        response = self.client.get(reverse('store_detail', kwargs={'store_id': 999}))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,98 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from django.db.models import DateField, Min, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .models import Transaction, TransactionRollup
+
+
+# the lengths of the periods a time series can be bucketed by
+GRANULARITIES: Tuple[str, ...] = ('day', 'week', 'month')
+
+# largest number of periods in one series, about ten years of days
+MAX_PERIODS: int = 3660
+
+
+class InvalidRange(Exception):
+    """
+    Raised when a time series range is reversed or holds too many periods.
+    """
+
+
+def period_start(day: date, granularity: str) -> date:
+    """
+    Return the first day of the period holding a day, weeks starting on Monday.
+    """
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_period(start: date, granularity: str) -> date:
+    """
+    Return the first day of the period following the one starting on a day.
+    """
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start + timedelta(days=1)
+
+
+def transaction_timeseries(granularity: str, date_from: Optional[date] = None, date_to: Optional[date] = None, store_id: Optional[int] = None) -> List[dict]:
+    """
+    Compute the bought and sold transaction counts and amounts per period.
+
+    Only the daily rollups are read, with one grouped aggregate query, so a year of
+    days costs at most one row per store, day and type whatever the number of
+    transactions. Every period of the range is listed, those without transactions
+    with zeros, so the series can be charted as is.
+
+    Args:
+        granularity (str): One of GRANULARITIES.
+        date_from (Optional[date]): The first day, by default the day of the first rollup.
+        date_to (Optional[date]): The last day, inclusive, by default today.
+        store_id (Optional[int]): Only count the transactions of this store.
+
+    Returns:
+        List[dict]: The first day of every period and its bought and sold counts and amounts, in order.
+
+    Raises:
+        InvalidRange: If date_from is after date_to or the range holds more than MAX_PERIODS periods.
+    """
+    rollups = TransactionRollup.objects.all()
+    if store_id is not None:
+        rollups = rollups.filter(store=store_id)
+    if date_to is None:
+        date_to = timezone.localdate()
+    if date_from is None:
+        date_from = rollups.aggregate(first=Min('day'))['first'] or date_to
+    if date_from > date_to:
+        raise InvalidRange("'from' must not be after 'to'.")
+
+    start = period_start(date_from, granularity)
+    end = period_start(date_to, granularity)
+    series = {}
+    while start <= end:
+        if len(series) == MAX_PERIODS:
+            raise InvalidRange(f'The range holds more than {MAX_PERIODS} periods, use a coarser granularity.')
+        series[start] = {'period': start}
+        for transaction_type, _ in Transaction.TRANSACTION_TYPES:
+            series[start][f'{transaction_type}_count'] = 0
+            series[start][f'{transaction_type}_amount'] = Decimal('0.00')
+        start = next_period(start, granularity)
+
+    groups = rollups.filter(day__gte=date_from, day__lte=date_to).values(
+        'transaction_type',
+        period=Trunc('day', granularity, output_field=DateField()),
+    ).annotate(count=Sum('count'), amount=Sum('amount')).order_by()
+    for group in groups:
+        entry = series[group['period']]
+        entry[f"{group['transaction_type']}_count"] = group['count']
+        entry[f"{group['transaction_type']}_amount"] = group['amount']
+    return list(series.values())
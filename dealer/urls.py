@@ -9,4 +9,10 @@ urlpatterns = [
 
     path('', views.car_list, name='car_list'),
     path('transactions_summary/', views.transactions_summary, name='transactions_summary'),
+
+    # store-scoped pages, routing every write to the store in the URL
+    path('stores/<int:store_id>/', views.store_info, name='store_detail'),
+    path('stores/<int:store_id>/cars/', views.car_list, name='store_car_list'),
+    path('stores/<int:store_id>/submit_car/', views.submit_car, name='store_submit_car'),
+    path('stores/<int:store_id>/buy_car/<int:car_id>/', views.buy_car, name='store_buy_car'),
 ]
@@ -1,139 +1,147 @@
 import logging
 
+from typing import Optional
+
 from django.contrib import messages
-from django.db import transaction
 
-from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpRequest, HttpResponse
+from django.shortcuts import render, redirect
+from django.http import Http404, HttpRequest, HttpResponse
+from django.views.decorators.http import require_POST
 
+from . import services
+from .cache import get_or_build, inventory_version, versioned_key
 from .forms import CarForm
-from .models import Store, Car, Transaction
+from .models import Store, Car, TransactionSummary
+from .stores import STORE_HEADER, InvalidStore, get_store, requested_store_id
+
+
+def _store_for_request(request: HttpRequest, store_id: Optional[int]) -> Store:
+    """
+    Resolve the store a request is scoped to from the URL or the X-Store-Id header.
+
+    Raises:
+        Http404: If the store does not exist or the header is not a store id.
+    """
+    try:
+        return get_store(requested_store_id(request, store_id))
+    except (InvalidStore, Store.DoesNotExist):
+        raise Http404('Store not found.')
+
+
+def _redirect_to_store(store_id: Optional[int]) -> HttpResponse:
+    """
+    Redirect to the information page of the store, or of the default store.
+    """
+    if store_id is None:
+        return redirect('store_info')
+    return redirect('store_detail', store_id=store_id)
 
 
-def submit_car(request: HttpRequest) -> HttpResponse:
+def submit_car(request: HttpRequest, store_id: Optional[int] = None) -> HttpResponse:
     """
     View function for submitting a car.
 
     Args:
         request (HttpRequest): The HTTP request object.
+        store_id (Optional[int]): The ID of the store buying the car, defaults to the first store.
 
     Returns:
         HttpResponse: The HTTP response after submitting the car.
 
     Raises:
+        Http404: If the requested store does not exist.
         Redirect: If the form submission is successful, redirects to the store information page.
     """
     if request.method == 'POST':
         form = CarForm(request.POST)
         if form.is_valid():
-            car = form.save(commit=False)
-            store = Store.objects.first()  # Assuming there's only one store for simplicity
-
-            if store.budget >= car.price:
-                try:
-                    with transaction.atomic():
-                        car.store = store
-                        car.save()
-                        store.budget -= car.price
-                        store.save()
-
-                        # Create transaction object
-                        Transaction.objects.create(
-                            car_make=car.make,
-                            car_model=car.model,
-                            buyer=store.name,
-                            seller='User',
-                            transaction_type='bought',
-                            transaction_amount=car.price
-                        )
-
-                        return redirect('store_info')
-                except Exception as e:
-                    logging.error(f"An error occurred while submitting car: {e}")
-                    messages.error(request, 'An unexpected error occurred. Please try again later.')
-            else:
+            store = _store_for_request(request, store_id)
+
+            try:
+                services.submit_car(store, form.cleaned_data['make'], form.cleaned_data['model'], form.cleaned_data['price'])
+                return _redirect_to_store(store_id)
+            except services.InsufficientBudget:
                 messages.warning(request, 'The store does not have enough money to buy this car.')
+            except Exception as e:
+                logging.error(f"An error occurred while submitting car: {e}")
+                messages.error(request, 'An unexpected error occurred. Please try again later.')
     else:
         form = CarForm()
 
-    return render(request, 'dealer/submit_car_form.html', {'form': form})
+    return render(request, 'dealer/submit_car_form.html', {'form': form, 'store_id': store_id})
 
 
-def buy_car(request: HttpRequest, car_id: int) -> HttpResponse:
+@require_POST
+def buy_car(request: HttpRequest, car_id: int, store_id: Optional[int] = None) -> HttpResponse:
     """
     View function for purchasing a car.
 
+    Only POST requests buy, so the purchase counts as a write wherever requests are
+    told apart by method, e.g. by the replica routing.
+
     Args:
         request (HttpRequest): The HTTP request object.
         car_id (int): The ID of the car to purchase.
+        store_id (Optional[int]): Only sell the car if it belongs to this store.
 
     Returns:
         HttpResponse: The HTTP response after purchasing the car.
 
     Raises:
         Redirect: If the car is successfully purchased, redirects to the store information page.
+        HTTP 405 Error: If the request is not a POST.
     """
     try:
-        with transaction.atomic():
-            car = get_object_or_404(Car, id=car_id)
-            store = car.store
-            transaction_amount = car.price
-
-            # Create transaction object
-            transaction_obj = Transaction.objects.create(
-                car_make=car.make,
-                car_model=car.model,
-                buyer='User',
-                seller=store.name,
-                transaction_type='sold',
-                transaction_amount=transaction_amount
-            )
-
-            if transaction_obj:
-                store.budget += transaction_amount
-                store.save()
-
-                car.delete()
-
-                messages.success(request, 'Car successfully purchased.')
-                return redirect('store_info')
-
+        services.purchase_car(car_id, requested_store_id(request, store_id))
+        messages.success(request, 'Car successfully purchased.')
+    except (Car.DoesNotExist, InvalidStore):
+        messages.error(request, 'This car is no longer available.')
     except Exception as e:
         logging.error(f"An error occurred while buying car: {e}")
         messages.error(request, 'An unexpected error occurred. Please try again later.')
 
-    return redirect('store_info')
+    return _redirect_to_store(store_id)
 
 
-def store_info(request: HttpRequest) -> HttpResponse:
+def store_info(request: HttpRequest, store_id: Optional[int] = None) -> HttpResponse:
     """
     View function for displaying store information.
 
     Args:
         request (HttpRequest): The HTTP request object.
+        store_id (Optional[int]): The ID of the store to display, defaults to the first store.
 
     Returns:
         HttpResponse: The HTTP response containing the store information.
 
     Raises:
+        Http404: If the requested store does not exist.
         Redirect: If an unexpected error occurs, redirects to the store information page.
     """
+    if store_id is None and request.META.get(STORE_HEADER) is None:
+        store = Store.objects.first()  # Single-store deployments name no store
+    else:
+        store = _store_for_request(request, store_id)
+
     try:
-        store = Store.objects.first()  # Assuming there's only one store for simplicity
-        cars = Car.objects.filter(store=store)
-        return render(request, 'dealer/store_info.html', {'store': store, 'cars': cars})
+        cars = []
+        if store is not None:
+            key = versioned_key('html:store_cars', store.pk, store.inventory_version)
+            cars = get_or_build(key, lambda: list(Car.objects.filter(store=store).values('id', 'make', 'model', 'price')))
+        return render(request, 'dealer/store_info.html', {'store': store, 'cars': cars, 'store_id': store_id})
     except Exception as e:
         logging.error(f"An error occurred while fetching store information: {e}")
         messages.error(request, 'An unexpected error occurred while fetching store information.')
         return redirect('store_info')
 
 
-def car_list(request: HttpRequest) -> HttpResponse:
+def car_list(request: HttpRequest, store_id: Optional[int] = None) -> HttpResponse:
     """
     View function for displaying a list of cars with optional ordering.
 
     Args:
         request (HttpRequest): The HTTP request object.
+        store_id (Optional[int]): Only list the cars of this store.
 
     Returns:
         HttpResponse: The HTTP response containing the list of cars.
@@ -157,11 +165,20 @@ def car_list(request: HttpRequest) -> HttpResponse:
         ordering = request.GET.get('ordering', 'price')
         ordering_field = ordering_options.get(ordering, 'price')
 
-        cars = Car.objects.all().order_by(ordering_field)
+        cars = Car.objects.all()
+        store_id = requested_store_id(request, store_id)
+        if store_id is not None:
+            cars = cars.filter(store_id=store_id)
+        cars = cars.order_by(ordering_field).values('id', 'make', 'model', 'price')
+
+        # The list is cached per store inventory version and ordering
+        key = versioned_key('html:car_list', store_id, inventory_version(store_id), ordering_field)
+        cars = get_or_build(key, lambda: list(cars))
 
         context = {
             'cars': cars,
             'ordering': ordering,
+            'store_id': store_id,
         }
         return render(request, 'dealer/store_info.html', context)
     except Exception as e:
@@ -184,19 +201,8 @@ def transactions_summary(request: HttpRequest) -> HttpResponse:
         Redirect: If an unexpected error occurs, redirects to the store information page.
     """
     try:
-        total_bought_amount = Transaction.total_bought_amount()
-        total_sold_amount = Transaction.total_sold_amount()
-        total_transaction_count = Transaction.total_transaction_count()
-        total_bought_transaction_count = Transaction.total_bought_transaction_count()
-        total_sold_transaction_count = Transaction.total_sold_transaction_count()
-
-        context = {
-            'total_bought_amount': total_bought_amount,
-            'total_sold_amount': total_sold_amount,
-            'total_transaction_count': total_transaction_count,
-            'total_bought_transaction_count': total_bought_transaction_count,
-            'total_sold_transaction_count': total_sold_transaction_count,
-        }
+        # Totals are maintained on write, so this is a single read of the summary rows
+        context = TransactionSummary.totals()
         return render(request, 'dealer/transactions.html', context)
     except Exception as e:
         logging.error(f"An error occurred in transactions_summary view: {e}")